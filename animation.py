@@ -0,0 +1,272 @@
+"""
+animation.py - 小铁皮的动画状态机
+用一张状态表描述所有动画模式（优先级、精灵、进入/退出、每帧更新、绘制），
+每帧只分派给当前激活的状态
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from scheduler import FrameTimer
+
+
+# ============ 状态表 ============
+# 表中顺序即每帧更新和绘制的顺序；priority 只决定显示哪个精灵（大的优先）
+#
+# sprite:    精灵名（直接查 get_sprite）
+# sprite_fn: 返回精灵的方法名，返回 None 时让给下一个状态
+# update:    每帧更新的方法名
+# draw:      叠加绘制的方法名，参数 (pad, oy)
+# enter/exit: 进入/退出时调用的方法名
+# timer:     对应的帧计时器属性，到期自动退出
+# freeze:    激活时暂停普通行为（走动、跳跃、坐下等 pausable 状态）
+# pausable:  被 freeze 状态暂停
+
+ANIMATION_STATES = {
+    'dragging': {
+        'priority': 100,
+        'sprite': 'dragging',
+    },
+    'dizzy': {
+        'priority': 95,
+        'sprite': 'dizzy',
+        'draw': '_draw_dizzy_stars',
+        'timer': 'dizzy_timer',
+        'exit': '_start_falling',
+        'freeze': True,
+    },
+    'falling': {
+        'priority': 95,
+        'sprite': 'dizzy',
+        'update': '_update_falling',
+        'draw': '_draw_dizzy_stars',
+        'freeze': True,
+    },
+    'dead': {
+        'priority': 90,
+        'sprite': 'dead',
+    },
+    'shake_angry': {
+        'priority': 85,
+        'sprite_fn': '_hiding_sprite',
+        'timer': 'shake_angry_timer',
+        'exit': '_end_shake_angry',
+    },
+    'comforted': {
+        'priority': 80,
+        'sprite': 'comforted',
+        'timer': 'comfort_timer',
+    },
+    'reading': {
+        'priority': 75,
+        'sprite_fn': '_reading_sprite',
+        'update': '_update_reading',
+        'draw': '_draw_paper',
+    },
+    'sleep_disturb': {
+        'priority': 70,
+        'sprite_fn': '_sleep_disturb_sprite',
+        'timer': 'sleep_disturb_timer',
+        'exit': '_end_sleep_disturb',
+    },
+    'yawn': {
+        'priority': 65,
+        'sprite': 'yawn',
+        'timer': 'yawn_timer',
+    },
+    'sit': {
+        'priority': 60,
+        'sprite': 'sit',
+        'update': '_update_sit',
+        'timer': 'sit_timer',
+        'pausable': True,
+    },
+    'happy': {
+        'priority': 55,
+        'sprite': 'happy',
+        'timer': 'happy_timer',
+    },
+    'blink': {
+        'priority': 50,
+        'sprite': 'blink',
+    },
+    'look': {
+        'priority': 45,
+        'sprite_fn': '_look_sprite',
+    },
+    'walking': {
+        'priority': 40,
+        'sprite_fn': '_walking_sprite',
+        'update': '_update_walking',
+        'pausable': True,
+    },
+    'jump': {
+        'update': '_update_jump',
+        'pausable': True,
+    },
+    'bath': {
+        'update': '_update_bath',
+        'draw': '_draw_bath',
+        'timer': 'bath_timer',
+        'exit': '_end_bath',
+    },
+    'eating': {
+        'update': '_update_eating',
+        'draw': '_draw_eating',
+        'timer': 'eat_timer',
+        'exit': '_end_eating',
+    },
+    'playing': {
+        'update': '_update_playing',
+        'draw': '_draw_playing',
+        'timer': 'play_timer',
+        'exit': '_end_playing',
+    },
+    'dream': {
+        'update': '_update_dream',
+        'draw': '_draw_dream',
+        'timer': 'dream_timer',
+        'exit': '_end_dream',
+    },
+    'happy_event': {
+        'update': '_update_happy_event',
+        'draw': '_draw_happy_event',
+        'timer': 'happy_event_timer',
+        'exit': '_end_happy_event',
+    },
+}
+
+
+class StateFlag:
+    """把布尔属性映射到状态机中的一个状态（兼容原来的 is_* 写法）"""
+
+    def __init__(self, state: str):
+        self.state = state
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.anim.is_active(self.state)
+
+    def __set__(self, obj, value):
+        obj.anim.set(self.state, bool(value))
+
+
+class StateTimer(FrameTimer):
+    """状态计时器：赋值即进入对应状态，到期由状态机自动退出"""
+
+    def __init__(self, state: str):
+        self.state = state
+
+    def __set__(self, obj, frames):
+        super().__set__(obj, frames)
+        if frames > 0:
+            obj.anim.enter(self.state)
+
+
+class AnimationStateMachine:
+    """表驱动的动画状态机"""
+
+    def __init__(self, owner, states: Dict[str, dict] = None):
+        self.owner = owner
+        self.states = states if states is not None else ANIMATION_STATES
+        self.active = set()
+
+        # 预先绑定每个状态的回调，避免每帧 getattr
+        self._order = {name: i for i, name in enumerate(self.states)}
+        self._hooks: Dict[str, Dict[str, Callable]] = {}
+        for name, spec in self.states.items():
+            hooks = {}
+            for key in ('update', 'draw', 'enter', 'exit', 'sprite_fn'):
+                if spec.get(key):
+                    hooks[key] = getattr(owner, spec[key])
+            self._hooks[name] = hooks
+
+        # 激活状态缓存（只在进入/退出时重建）
+        self._ordered: List[str] = []
+        self._by_priority: List[str] = []
+        self._freeze_count = 0
+
+    # ===== 状态切换 =====
+
+    def is_active(self, name: str) -> bool:
+        return name in self.active
+
+    def enter(self, name: str) -> None:
+        """进入状态（已激活时忽略）"""
+        if name in self.active:
+            return
+        self.active.add(name)
+        if self.states[name].get('freeze'):
+            self._freeze_count += 1
+        self._rebuild()
+        hook = self._hooks[name].get('enter')
+        if hook:
+            hook()
+
+    def exit(self, name: str) -> None:
+        """退出状态（未激活时忽略）"""
+        if name not in self.active:
+            return
+        self.active.discard(name)
+        if self.states[name].get('freeze'):
+            self._freeze_count -= 1
+        self._rebuild()
+        hook = self._hooks[name].get('exit')
+        if hook:
+            hook()
+
+    def set(self, name: str, on: bool) -> None:
+        if on:
+            self.enter(name)
+        else:
+            self.exit(name)
+
+    @property
+    def frozen(self) -> bool:
+        """是否有状态暂停了普通行为（晕倒、下落）"""
+        return self._freeze_count > 0
+
+    def _rebuild(self) -> None:
+        self._ordered = sorted(self.active, key=self._order.__getitem__)
+        self._by_priority = sorted(
+            (n for n in self.active
+             if 'sprite' in self.states[n] or 'sprite_fn' in self.states[n]),
+            key=lambda n: (-self.states[n].get('priority', 0), self._order[n])
+        )
+
+    # ===== 每帧分派 =====
+
+    def update(self) -> None:
+        """更新所有激活状态（计时器到期的先退出）"""
+        frozen = self.frozen
+        for name in self._ordered:
+            if name not in self.active:
+                continue
+            spec = self.states[name]
+            timer = spec.get('timer')
+            if timer and getattr(self.owner, timer) <= 0:
+                self.exit(name)
+                continue
+            if frozen and spec.get('pausable'):
+                continue
+            update = self._hooks[name].get('update')
+            if update:
+                update()
+
+    def draw(self, pad: int, oy: int) -> None:
+        """绘制所有激活状态的叠加层"""
+        for name in self._ordered:
+            draw = self._hooks[name].get('draw')
+            if draw:
+                draw(pad, oy)
+
+    def sprite(self, body_type: str, get_sprite: Callable) -> Optional[list]:
+        """按优先级取当前精灵，没有状态提供时返回 None"""
+        for name in self._by_priority:
+            spec = self.states[name]
+            if 'sprite' in spec:
+                return get_sprite(body_type, spec['sprite'])[0]
+            sprite = self._hooks[name]['sprite_fn'](body_type)
+            if sprite is not None:
+                return sprite
+        return None
@@ -9,6 +9,8 @@ import random
 import json
 from datetime import datetime, date
 
+from bubble_surface import BubbleSurface, get_surface_pool
+
 # 自定义台词文件路径
 CUSTOM_DIALOGUES_FILE = Path.home() / '.xiaotiepi' / 'my_dialogues.txt'
 BUBBLE_STATE_FILE = Path.home() / '.xiaotiepi' / 'bubble_state.json'
@@ -270,109 +272,64 @@ class Bubble:
 
     def __init__(self, parent_window: tk.Tk):
         self.parent = parent_window
-        self.window: Optional[tk.Toplevel] = None
+        self.pool = get_surface_pool(parent_window)
+        self.surface: Optional[BubbleSurface] = None
+        self.anchor: Optional[tuple] = None  # 宠物窗口位置（由位置管理器推送）
         self.hide_job: Optional[str] = None
-        self.label: Optional[tk.Label] = None
         self.on_click: Optional[Callable] = None  # 点击回调
         self.clickable: bool = False  # 是否可点击
 
+    @property
+    def window(self) -> Optional[tk.Toplevel]:
+        return self.surface.window if self.surface else None
+
     def show(self, text: str, duration: int = 3000, clickable: bool = False,
              on_click: Callable = None) -> None:
-        self.hide()
+        self._cancel_hide()
 
         self.clickable = clickable
         self.on_click = on_click
 
-        self.window = tk.Toplevel(self.parent)
-        self.window.overrideredirect(True)
-        self.window.wm_attributes('-topmost', True)
-
         try:
-            self.window.wm_attributes('-transparent', True)
-            self.window.config(bg='systemTransparent')
-            bg_color = 'systemTransparent'
+            if self.surface is None:
+                self.surface = self.pool.acquire()
+            # 可点击时边框变橙色、手型光标
+            self.surface.configure(text,
+                                   border='#FF9F43' if clickable else '#D4856A',
+                                   fill='#FFF5EE', fg='#333333',
+                                   wraplength=150, min_w=80,
+                                   cursor='hand2' if clickable and on_click else '')
+            self.surface.on_click = self._handle_click if clickable and on_click else None
+            self._update_position()
+            self.surface.show()
         except tk.TclError:
-            bg_color = '#2D2D2D'
-            self.window.config(bg=bg_color)
-
-        temp_label = tk.Label(self.window, text=text, font=('PingFang SC', 11))
-        temp_label.update_idletasks()
-        text_w = max(80, temp_label.winfo_reqwidth() + 20)
-        text_h = temp_label.winfo_reqheight() + 16
-        temp_label.destroy()
-
-        ps = 3
-        canvas_w = text_w + ps * 4
-        canvas_h = text_h + ps * 4 + ps * 3
-
-        canvas = tk.Canvas(self.window, width=canvas_w, height=canvas_h,
-                          highlightthickness=0, bg=bg_color)
-        canvas.pack()
-
-        # 可点击时边框变橙色
-        border_color = '#FF9F43' if clickable else '#D4856A'
-        fill_color = '#FFF5EE'
-
-        for i in range(ps, canvas_w - ps, ps):
-            canvas.create_rectangle(i, 0, i + ps, ps, fill=border_color, outline=border_color)
-            canvas.create_rectangle(i, text_h + ps * 3, i + ps, text_h + ps * 4,
-                                   fill=border_color, outline=border_color)
-
-        for i in range(ps, text_h + ps * 3, ps):
-            canvas.create_rectangle(0, i, ps, i + ps, fill=border_color, outline=border_color)
-            canvas.create_rectangle(canvas_w - ps, i, canvas_w, i + ps,
-                                   fill=border_color, outline=border_color)
-
-        canvas.create_rectangle(ps, ps, canvas_w - ps, text_h + ps * 3,
-                               fill=fill_color, outline=fill_color)
-
-        tail_x = canvas_w // 2
-        tail_y = text_h + ps * 4
-        for i, w in enumerate([3, 2, 1]):
-            canvas.create_rectangle(tail_x - w * ps, tail_y + i * ps,
-                                   tail_x + w * ps, tail_y + (i + 1) * ps,
-                                   fill=border_color, outline=border_color)
-
-        self.label = tk.Label(canvas, text=text, font=('PingFang SC', 11),
-                             bg=fill_color, fg='#333333', wraplength=150, justify='left')
-        canvas.create_window(canvas_w // 2, (text_h + ps * 4) // 2, window=self.label)
-
-        # 可点击时添加点击事件和手型光标
-        if clickable and on_click:
-            canvas.config(cursor='hand2')
-            canvas.bind('<Button-1>', self._handle_click)
-            self.label.config(cursor='hand2')
-            self.label.bind('<Button-1>', self._handle_click)
+            self.surface = None
+            return
 
-        self._update_position()
         self.hide_job = self.parent.after(duration, self.hide)
 
     def _handle_click(self, event=None) -> None:
         """处理点击事件"""
         if self.clickable and self.on_click:
+            callback = self.on_click
             self.hide()
-            self.on_click()
+            callback()
 
     def _update_position(self) -> None:
         """更新气泡位置（在宠物上方）"""
-        if not self.window:
+        if not self.surface:
             return
 
         try:
-            # 获取父窗口位置
-            parent_x = self.parent.winfo_x()
-            parent_y = self.parent.winfo_y()
+            # 父窗口位置（没有位置管理器时才向窗口查询）
+            parent_x, parent_y = self.anchor or (self.parent.winfo_x(), self.parent.winfo_y())
 
             # 气泡在宠物上方
-            bubble_x = parent_x
-            bubble_y = parent_y - 60
-
-            self.window.geometry(f'+{bubble_x}+{bubble_y}')
+            self.surface.move(parent_x, parent_y - 60)
         except tk.TclError:
             pass
 
-    def hide(self) -> None:
-        """隐藏气泡"""
+    def _cancel_hide(self) -> None:
         if self.hide_job:
             try:
                 self.parent.after_cancel(self.hide_job)
@@ -380,17 +337,22 @@ class Bubble:
                 pass
             self.hide_job = None
 
-        if self.window:
-            try:
-                self.window.destroy()
-            except tk.TclError:
-                pass
-            self.window = None
+    def hide(self) -> None:
+        """隐藏气泡（窗口放回池中复用）"""
+        self._cancel_hide()
+        if self.surface:
+            self.pool.release(self.surface)
+            self.surface = None
 
     def update_position(self) -> None:
         """外部调用更新位置"""
         self._update_position()
 
+    def follow(self, x: int, y: int) -> None:
+        """宠物窗口移动到 (x, y) 时跟随"""
+        self.anchor = (x, y)
+        self._update_position()
+
     def say_random(self, status: str) -> None:
         """根据状态说随机台词"""
         hour = datetime.now().hour
@@ -422,7 +384,10 @@ class PaperBubbleManager:
 
     def __init__(self, parent_window: tk.Tk):
         self.parent = parent_window
-        self.bubble_window: Optional[tk.Toplevel] = None
+        self.pool = get_surface_pool(parent_window)
+        self.surface: Optional[BubbleSurface] = None
+        self.anchor: Optional[tuple] = None
+        self.screen_w: Optional[int] = None
         self.hide_job: Optional[str] = None
         self.hover_paused = False
         self.on_click_callback: Optional[Callable] = None
@@ -525,102 +490,54 @@ class PaperBubbleManager:
 
         return True
 
+    @property
+    def bubble_window(self) -> Optional[tk.Toplevel]:
+        return self.surface.window if self.surface else None
+
     def _show_bubble(self, text: str, duration: int = 10000) -> None:
         """显示气泡"""
         self.hide()
 
-        self.bubble_window = tk.Toplevel(self.parent)
-        self.bubble_window.overrideredirect(True)
-        self.bubble_window.wm_attributes('-topmost', True)
-
         try:
-            self.bubble_window.wm_attributes('-transparent', True)
-            self.bubble_window.config(bg='systemTransparent')
-            bg_color = 'systemTransparent'
+            self.surface = self.pool.acquire()
+            # 暖色系配色（和聊天窗口一致）
+            self.surface.configure(text, border='#CD853F', fill='#FFF5E6', fg='#3E2723',
+                                   wraplength=160, min_w=100, max_w=180,
+                                   pad_w=24, pad_h=20, cursor='hand2')
+            self.surface.on_click = self._on_click
+            self.surface.on_enter = self._on_enter
+            self.surface.on_leave = self._on_leave
+            self._update_position()
+            self.surface.show()
         except tk.TclError:
-            bg_color = '#2D2D2D'
-            self.bubble_window.config(bg=bg_color)
-
-        # 计算文字尺寸
-        temp_label = tk.Label(self.bubble_window, text=text, font=('PingFang SC', 11))
-        temp_label.update_idletasks()
-        text_w = max(100, min(180, temp_label.winfo_reqwidth() + 24))
-        text_h = temp_label.winfo_reqheight() + 20
-        temp_label.destroy()
-
-        ps = 3
-        canvas_w = text_w + ps * 4
-        canvas_h = text_h + ps * 4 + ps * 3
-
-        canvas = tk.Canvas(self.bubble_window, width=canvas_w, height=canvas_h,
-                          highlightthickness=0, bg=bg_color)
-        canvas.pack()
-
-        # 暖色系配色（和聊天窗口一致）
-        border_color = '#CD853F'
-        fill_color = '#FFF5E6'
-
-        # 绘制边框
-        for i in range(ps, canvas_w - ps, ps):
-            canvas.create_rectangle(i, 0, i + ps, ps, fill=border_color, outline=border_color)
-            canvas.create_rectangle(i, text_h + ps * 3, i + ps, text_h + ps * 4,
-                                   fill=border_color, outline=border_color)
-
-        for i in range(ps, text_h + ps * 3, ps):
-            canvas.create_rectangle(0, i, ps, i + ps, fill=border_color, outline=border_color)
-            canvas.create_rectangle(canvas_w - ps, i, canvas_w, i + ps,
-                                   fill=border_color, outline=border_color)
-
-        # 填充背景
-        canvas.create_rectangle(ps, ps, canvas_w - ps, text_h + ps * 3,
-                               fill=fill_color, outline=fill_color)
-
-        # 小三角（指向下方的小铁皮）
-        tail_x = canvas_w // 2
-        tail_y = text_h + ps * 4
-        for i, w in enumerate([3, 2, 1]):
-            canvas.create_rectangle(tail_x - w * ps, tail_y + i * ps,
-                                   tail_x + w * ps, tail_y + (i + 1) * ps,
-                                   fill=border_color, outline=border_color)
-
-        # 文字标签
-        label = tk.Label(canvas, text=text, font=('PingFang SC', 11),
-                        bg=fill_color, fg='#3E2723', wraplength=160, justify='left',
-                        cursor='hand2')
-        canvas.create_window(canvas_w // 2, (text_h + ps * 4) // 2, window=label)
-
-        # 绑定事件
-        label.bind('<Button-1>', self._on_click)
-        label.bind('<Enter>', self._on_enter)
-        label.bind('<Leave>', self._on_leave)
-        canvas.bind('<Button-1>', self._on_click)
-
-        self._update_position()
+            self.surface = None
+            return
 
         # 10秒后自动消失
         self.hide_job = self.parent.after(duration, self.hide)
 
     def _update_position(self) -> None:
         """更新气泡位置"""
-        if not self.bubble_window:
+        if not self.surface:
             return
 
         try:
-            parent_x = self.parent.winfo_x()
-            parent_y = self.parent.winfo_y()
+            parent_x, parent_y = self.anchor or (self.parent.winfo_x(), self.parent.winfo_y())
 
-            bubble_w = self.bubble_window.winfo_reqwidth()
+            bubble_w = self.surface.width
             bubble_x = parent_x + 30 - bubble_w // 2
             bubble_y = parent_y - 70
 
             # 防止超出屏幕
-            screen_w = self.parent.winfo_screenwidth()
+            if self.screen_w is None:
+                self.screen_w = self.parent.winfo_screenwidth()
+            screen_w = self.screen_w
             if bubble_x < 10:
                 bubble_x = 10
             if bubble_x + bubble_w > screen_w - 10:
                 bubble_x = screen_w - bubble_w - 10
 
-            self.bubble_window.geometry(f'+{bubble_x}+{bubble_y}')
+            self.surface.move(bubble_x, bubble_y)
         except tk.TclError:
             pass
 
@@ -655,15 +572,17 @@ class PaperBubbleManager:
                 pass
             self.hide_job = None
 
-        if self.bubble_window:
-            try:
-                self.bubble_window.destroy()
-            except:
-                pass
-            self.bubble_window = None
+        if self.surface:
+            self.pool.release(self.surface)
+            self.surface = None
 
         self.hover_paused = False
 
     def update_position(self) -> None:
         """更新位置（小铁皮移动时调用）"""
         self._update_position()
+
+    def follow(self, x: int, y: int) -> None:
+        """宠物窗口移动到 (x, y) 时跟随"""
+        self.anchor = (x, y)
+        self._update_position()
@@ -0,0 +1,227 @@
+"""
+bubble_surface.py - 可复用的气泡窗口
+气泡窗口只创建一次，之后隐藏/显示复用；文字尺寸走字体度量缓存，
+像素边框按（尺寸档位, 颜色）缓存成图片，显示气泡只需要改配置
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+BUBBLE_FONT = ('PingFang SC', 11)
+PIXEL = 3              # 像素风边框的像素大小
+SIZE_BUCKET = PIXEL * 2  # 宽高按档位取整，相近大小的气泡共用一张边框图
+LABEL_PAD = 4          # Label 默认边框 + 内边距
+TEXT_CACHE_SIZE = 256
+IMAGE_CACHE_SIZE = 32
+
+
+def _bucket(size: int) -> int:
+    return -(-size // SIZE_BUCKET) * SIZE_BUCKET
+
+
+class FontMetrics:
+    """字体度量缓存：同一段文字只测量一次"""
+
+    def __init__(self, root, font: tuple = BUBBLE_FONT):
+        self.font = tkfont.Font(root=root, family=font[0], size=font[1])
+        self.linespace = self.font.metrics('linespace')
+        self._sizes: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+    def measure(self, text: str, wraplength: int = 0) -> Tuple[int, int]:
+        """返回 Label 显示这段文字需要的 (宽, 高)，按 wraplength 估算折行"""
+        key = (text, wraplength)
+        size = self._sizes.get(key)
+        if size is None:
+            width = 0
+            lines = 0
+            for line in text.split('\n'):
+                line_w = self.font.measure(line)
+                if wraplength and line_w > wraplength:
+                    lines += -(-line_w // wraplength)
+                    line_w = wraplength
+                else:
+                    lines += 1
+                width = max(width, line_w)
+            size = (width + LABEL_PAD, self.linespace * lines + LABEL_PAD)
+            if len(self._sizes) >= TEXT_CACHE_SIZE:
+                self._sizes.pop(next(iter(self._sizes)))
+            self._sizes[key] = size
+        return size
+
+
+def build_border_image(root, text_w: int, text_h: int, border: str,
+                       fill: str) -> tk.PhotoImage:
+    """九宫格拼出像素气泡：四角留空、四边描边、中间填充，下方带小三角"""
+    ps = PIXEL
+    width = text_w + ps * 4
+    box_h = text_h + ps * 4
+    image = tk.PhotoImage(master=root, width=width, height=box_h + ps * 3)
+
+    # 四条边（角上不画，保持原来的缺角像素风）
+    image.put(border, to=(ps, 0, width - ps, ps))
+    image.put(border, to=(ps, box_h - ps, width - ps, box_h))
+    image.put(border, to=(0, ps, ps, box_h - ps))
+    image.put(border, to=(width - ps, ps, width, box_h - ps))
+    # 中间
+    image.put(fill, to=(ps, ps, width - ps, box_h - ps))
+
+    # 小三角（指向下方的小铁皮）
+    tail_x = width // 2
+    for i, w in enumerate([3, 2, 1]):
+        image.put(border, to=(tail_x - w * ps, box_h + i * ps,
+                              tail_x + w * ps, box_h + (i + 1) * ps))
+    return image
+
+
+class BubbleSurface:
+    """一个常驻的气泡窗口，show/hide 只做重新配置"""
+
+    def __init__(self, pool: 'BubbleSurfacePool'):
+        self.pool = pool
+        parent = pool.parent
+
+        self.window = tk.Toplevel(parent)
+        self.window.overrideredirect(True)
+        self.window.wm_attributes('-topmost', True)
+
+        try:
+            self.window.wm_attributes('-transparent', True)
+            self.window.config(bg='systemTransparent')
+            bg_color = 'systemTransparent'
+        except tk.TclError:
+            bg_color = '#2D2D2D'
+            self.window.config(bg=bg_color)
+
+        self.canvas = tk.Canvas(self.window, width=1, height=1,
+                                highlightthickness=0, bg=bg_color)
+        self.canvas.pack()
+        self._image_item = self.canvas.create_image(0, 0, anchor='nw')
+        self.label = tk.Label(self.canvas, font=BUBBLE_FONT, justify='left')
+        self._label_item = self.canvas.create_window(0, 0, window=self.label)
+
+        # 事件只绑定一次，按当前回调分派
+        self.on_click: Optional[Callable] = None
+        self.on_enter: Optional[Callable] = None
+        self.on_leave: Optional[Callable] = None
+        self.canvas.bind('<Button-1>', lambda e: self._dispatch(self.on_click, e))
+        self.label.bind('<Button-1>', lambda e: self._dispatch(self.on_click, e))
+        self.label.bind('<Enter>', lambda e: self._dispatch(self.on_enter, e))
+        self.label.bind('<Leave>', lambda e: self._dispatch(self.on_leave, e))
+
+        self._image: Optional[tk.PhotoImage] = None
+        self.width = 0
+        self.height = 0
+        self.visible = False
+        self._geometry = None
+        self.window.withdraw()
+
+    @staticmethod
+    def _dispatch(callback: Optional[Callable], event) -> None:
+        if callback:
+            callback(event)
+
+    def alive(self) -> bool:
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def configure(self, text: str, border: str, fill: str, fg: str,
+                  wraplength: int, min_w: int, max_w: int = 0,
+                  pad_w: int = 20, pad_h: int = 16, cursor: str = '') -> None:
+        """换上新的文字和配色"""
+        ps = PIXEL
+        text_w, text_h = self.pool.metrics.measure(text, wraplength)
+        text_w += pad_w
+        if max_w:
+            text_w = min(max_w, text_w)
+        text_w = _bucket(max(min_w, text_w))
+        text_h = _bucket(text_h + pad_h)
+
+        self.width = text_w + ps * 4
+        self.height = text_h + ps * 7
+        self.canvas.config(width=self.width, height=self.height, cursor=cursor)
+        # 自己持有一份引用，图片被挤出缓存时也不会被回收
+        self._image = self.pool.border_image(text_w, text_h, border, fill)
+        self.canvas.itemconfig(self._image_item, image=self._image)
+        self.label.config(text=text, bg=fill, fg=fg, wraplength=wraplength, cursor=cursor)
+        self.canvas.coords(self._label_item, self.width // 2, (text_h + ps * 4) // 2)
+
+    def move(self, x: int, y: int) -> None:
+        geometry = f'+{x}+{y}'
+        if geometry != self._geometry:
+            self._geometry = geometry
+            self.window.geometry(geometry)
+
+    def show(self) -> None:
+        if not self.visible:
+            self.window.deiconify()
+            self.visible = True
+        self.window.lift()
+
+    def hide(self) -> None:
+        self.on_click = self.on_enter = self.on_leave = None
+        if self.visible:
+            self.window.withdraw()
+            self.visible = False
+
+
+class BubbleSurfacePool:
+    """气泡窗口池：同一主窗口下的所有气泡共用窗口、字体度量和边框图"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self._free: List[BubbleSurface] = []
+        self._metrics: Optional[FontMetrics] = None
+        self._images: 'OrderedDict[tuple, tk.PhotoImage]' = OrderedDict()
+
+    @property
+    def metrics(self) -> FontMetrics:
+        if self._metrics is None:
+            self._metrics = FontMetrics(self.parent)
+        return self._metrics
+
+    def border_image(self, text_w: int, text_h: int, border: str, fill: str) -> tk.PhotoImage:
+        key = (text_w, text_h, border, fill)
+        image = self._images.get(key)
+        if image is None:
+            image = build_border_image(self.parent, text_w, text_h, border, fill)
+            self._images[key] = image
+            if len(self._images) > IMAGE_CACHE_SIZE:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(key)
+        return image
+
+    def acquire(self) -> BubbleSurface:
+        """取一个空闲的气泡窗口，没有就新建"""
+        while self._free:
+            surface = self._free.pop()
+            if surface.alive():
+                return surface
+        return BubbleSurface(self)
+
+    def release(self, surface: Optional[BubbleSurface]) -> None:
+        """隐藏并放回池中"""
+        if surface is None:
+            return
+        try:
+            surface.hide()
+        except tk.TclError:
+            return
+        if surface not in self._free:
+            self._free.append(surface)
+
+
+_pools: Dict[int, BubbleSurfacePool] = {}
+
+
+def get_surface_pool(parent) -> BubbleSurfacePool:
+    """获取主窗口对应的气泡窗口池"""
+    pool = _pools.get(id(parent))
+    if pool is None or pool.parent is not parent:
+        pool = BubbleSurfacePool(parent)
+        _pools[id(parent)] = pool
+    return pool
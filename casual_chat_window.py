@@ -5,11 +5,11 @@ casual_chat_window.py - 小铁皮·日常闲聊窗口
 
 import tkinter as tk
 from tkinter import ttk
-import threading
+import asyncio
 import json
 import time
 from datetime import datetime
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Optional, Tuple
 from pathlib import Path
 
 # 聊天历史文件
@@ -392,76 +392,68 @@ class CasualChatWindow:
         """获取回复"""
         self.input_entry.config(state='disabled')
 
-        def fetch():
-            try:
-                reply = self._call_api(user_message)
-                self.window.after(0, lambda: self._show_reply(reply))
-            except Exception as e:
-                print(f"Chat API error: {e}")
-                self.window.after(0, lambda: self._show_reply("唔...脑子有点卡"))
-
-        threading.Thread(target=fetch, daemon=True).start()
-
-    def _call_api(self, user_message: str) -> str:
-        """调用 API"""
-        # 调试日志
-        from pathlib import Path
-        log_file = Path.home() / '.xiaotiepi' / 'debug.log'
-        def log(msg):
-            try:
-                with open(log_file, 'a') as f:
-                    f.write(f"[chat] {msg}\n")
-            except:
-                pass
+        def on_error(e):
+            print(f"Chat API error: {e}")
+            self._show_reply("唔...脑子有点卡")
 
-        log(f"_call_api called with: {user_message[:30]}...")
+        # 存档和聊天记录只在 Tk 线程上读写：prompt 和上下文在这里拼好，事件循环里只发请求
+        system_prompt = self._build_pet_prompt()
+        messages = self.history.get_context()
+        if not messages or messages[-1]['role'] != 'user':
+            messages.append({'role': 'user', 'content': user_message})
+
+        from paper_agent.async_bridge import get_bridge
+        get_bridge(self.parent).submit(self._call_api(system_prompt, messages),
+                                       on_done=self._on_reply, on_error=on_error, owner=self)
+
+    async def _call_api(self, system_prompt: str, messages: List[Dict]) -> Tuple[str, bool]:
+        """调用 API（在 async_bridge 的事件循环里跑），返回 (回复, 是否模型的回复)"""
+        from paper_agent.debug_log import get_logger
+        from paper_agent.metering import acreate_message, BudgetExceeded, FEATURE_CASUAL
+        log = get_logger('chat')
+        log.debug('_call_api called with: %s...', messages[-1]['content'][:30])
 
         try:
             from paper_agent.api_key_manager import get_api_key
-            log("api_key_manager imported")
 
             import anthropic
-            log(f"anthropic imported: {anthropic.__version__}")
+            log.debug('anthropic imported: %s', anthropic.__version__)
 
-            api_key = get_api_key()
-            log(f"api_key found: {bool(api_key)}")
+            api_key = await asyncio.to_thread(get_api_key)
+            log.debug('api_key found: %s', bool(api_key))
 
             if not api_key:
-                return "我好像说不出话来...（没有 API Key）"
-
-            client = anthropic.Anthropic(api_key=api_key)
-            log("client created")
-
-            # 构建 prompt
-            system_prompt = self._build_pet_prompt()
+                return "我好像说不出话来...（没有 API Key）", False
 
-            # 获取历史上下文
-            messages = self.history.get_context()
-            if not messages or messages[-1]['role'] != 'user':
-                messages.append({'role': 'user', 'content': user_message})
+            client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
 
-            log("calling messages.create...")
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=150,
-                system=system_prompt,
-                messages=messages
-            )
-            log("response received")
+            try:
+                response = await acreate_message(
+                    client, FEATURE_CASUAL, self,
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=150,
+                    system=system_prompt,
+                    messages=messages
+                )
+            finally:
+                await client.close()
 
             reply = response.content[0].text.strip()
+            log.debug('reply: %s...', reply[:30])
+            return reply, True
 
-            # 保存回复
-            self.history.add('assistant', reply)
-            log(f"reply: {reply[:30]}...")
-
-            return reply
-
+        except BudgetExceeded:
+            return "今天说了好多话，嗓子哑了...明天再聊吧（额度用完了）", False
         except Exception as e:
-            import traceback
-            log(f"ERROR: {type(e).__name__}: {e}")
-            log(traceback.format_exc())
-            return "呜...说不出话来了"
+            log.error('%s: %s', type(e).__name__, e, exc_info=True)
+            return "呜...说不出话来了", False
+
+    def _on_reply(self, result: Tuple[str, bool]) -> None:
+        """Tk 线程：模型的回复记进聊天记录，再显示"""
+        reply, from_model = result
+        if from_model:
+            self.history.add('assistant', reply)
+        self._show_reply(reply)
 
     def _build_pet_prompt(self) -> str:
         """构建宠物人格 Prompt"""
@@ -526,6 +518,12 @@ class CasualChatWindow:
         if self.typing_job:
             self.window.after_cancel(self.typing_job)
 
+        # 取消还没回来的回复（包括还在 LLM 调度队列里排队的）
+        from paper_agent.async_bridge import get_bridge
+        from paper_agent.llm_scheduler import get_llm_scheduler
+        get_llm_scheduler().cancel_owner(self)
+        get_bridge(self.parent).cancel_owner(self)
+
         if self.on_close:
             self.on_close()
 
@@ -0,0 +1,105 @@
+"""
+drag_tracker.py - 拖拽轨迹记录与晃动检测
+固定容量的环形缓冲保存最近的 (时间, x, y) 采样，
+同时维护移动距离和方向反转次数的累计值，每个鼠标事件 O(1)
+"""
+
+from typing import Iterable, Tuple
+
+DRAG_WINDOW = 0.5       # 只看最近 0.5 秒
+DRAG_CAPACITY = 128     # 最多保留的采样数（高回报率鼠标时丢最旧的）
+
+
+class DragTracker:
+    """拖拽轨迹环形缓冲
+
+    total_distance:    窗口内相邻采样的曼哈顿距离之和
+    direction_changes: 窗口内 x 或 y 方向反转的次数（第一段不计）
+    与每次重新扫描窗口内全部采样的结果一致。
+    """
+
+    def __init__(self, window: float = DRAG_WINDOW, capacity: int = DRAG_CAPACITY):
+        self.window = window
+        self.capacity = capacity
+        self._t = [0.0] * capacity
+        self._x = [0] * capacity
+        self._y = [0] * capacity
+        self._dist = [0] * capacity     # 从上一个采样到本采样的距离
+        self._turn = [0] * capacity     # 本段相对上一段是否反转方向
+        self._start = 0
+        self.count = 0
+        self.total_distance = 0
+        self.direction_changes = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        self._start = 0
+        self.count = 0
+        self.total_distance = 0
+        self.direction_changes = 0
+
+    def _index(self, offset: int) -> int:
+        return (self._start + offset) % self.capacity
+
+    def add(self, t: float, x: int, y: int) -> None:
+        """记录一个采样，并淘汰窗口外的旧采样"""
+        if self.count == self.capacity:
+            self._pop_oldest()
+
+        dist = 0
+        turn = 0
+        if self.count:
+            last = self._index(self.count - 1)
+            dx = x - self._x[last]
+            dy = y - self._y[last]
+            dist = abs(dx) + abs(dy)
+            if self.count >= 2:
+                prev = self._index(self.count - 2)
+                prev_dx = self._x[last] - self._x[prev]
+                prev_dy = self._y[last] - self._y[prev]
+                turn = 1 if (prev_dx * dx < 0) or (prev_dy * dy < 0) else 0
+
+        i = self._index(self.count)
+        self._t[i] = t
+        self._x[i] = x
+        self._y[i] = y
+        self._dist[i] = dist
+        self._turn[i] = turn
+        self.count += 1
+        self.total_distance += dist
+        self.direction_changes += turn
+
+        while self.count and t - self._t[self._start] >= self.window:
+            self._pop_oldest()
+
+    def _pop_oldest(self) -> None:
+        # 第二个采样变成第一个：它的距离不再计入；第三个采样变成第二段的起点，反转不再计入
+        if self.count >= 2:
+            self.total_distance -= self._dist[self._index(1)]
+        if self.count >= 3:
+            self.direction_changes -= self._turn[self._index(2)]
+        self._start = self._index(1)
+        self.count -= 1
+
+    def is_shaking(self, threshold: float, min_changes: int = 4, min_samples: int = 6) -> bool:
+        """移动距离够大且方向变化够多（真正的晃动）"""
+        return (self.count >= min_samples and self.total_distance > threshold
+                and self.direction_changes >= min_changes)
+
+    def samples(self) -> Iterable[Tuple[float, int, int]]:
+        """窗口内的采样（旧 → 新）"""
+        for offset in range(self.count):
+            i = self._index(offset)
+            yield self._t[i], self._x[i], self._y[i]
+
+
+def replay(trace: Iterable[Tuple[float, int, int]], threshold: float = 400) -> int:
+    """回放录下的拖拽轨迹，返回第一次判定为晃动的采样序号（没有晃动返回 -1）"""
+    tracker = DragTracker()
+    for n, (t, x, y) in enumerate(trace):
+        tracker.add(t, x, y)
+        if tracker.is_shaking(threshold):
+            return n
+    return -1
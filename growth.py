@@ -0,0 +1,123 @@
+"""
+growth.py - 小铁皮的成长曲线
+经验 ↔ 等级换算：线性曲线用闭式反解，任意曲线用预计算累计表 + 二分查找，
+都是常数/对数时间，不随等级增长变慢
+"""
+
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+# 表驱动曲线预计算到的最高等级（对应 LEVEL_STAGES 的 (51, 999) 传说期）
+MAX_TABLE_LEVEL = 999
+
+# 经验事件：直接的经验值，或 (来源, 经验值)；经验值为 None 时按来源查奖励表
+ExpEvent = Union[int, float, Tuple[str, Union[int, float, None]]]
+
+
+class GrowthCurve:
+    """成长曲线基类
+
+    required(level) 是从 level 升到下一级需要的累计经验；
+    level_for(total_exp) 返回累计经验对应的等级，等于满足 required(k) <= total_exp
+    的 k 的个数（至少为 1），与原来 get_level_from_exp 的循环结果一致。
+    """
+
+    name = ''
+
+    def required(self, level: int) -> int:
+        raise NotImplementedError
+
+    def level_for(self, total_exp: float) -> int:
+        raise NotImplementedError
+
+
+class LinearCurve(GrowthCurve):
+    """线性曲线 required = base * level + step * (level - 1)，闭式反解 O(1)"""
+
+    name = 'linear'
+
+    def __init__(self, base: int = 100, step: int = 50):
+        self.base = base
+        self.step = step
+
+    def required(self, level: int) -> int:
+        return self.base * level + self.step * (level - 1)
+
+    def level_for(self, total_exp: float) -> int:
+        # base*k + step*(k-1) <= total  ⇔  k <= (total + step) / (base + step)
+        return max(1, int((total_exp + self.step) // (self.base + self.step)))
+
+
+class TableCurve(GrowthCurve):
+    """任意单调递增曲线：预计算累计经验表，二分查找等级"""
+
+    def __init__(self, required_fn: Callable[[int], int], name: str = 'table',
+                 max_level: int = MAX_TABLE_LEVEL):
+        self.name = name
+        self._required_fn = required_fn
+        self.max_level = max_level
+        self._table: List[int] = [required_fn(level) for level in range(1, max_level + 1)]
+
+    def required(self, level: int) -> int:
+        if 1 <= level <= self.max_level:
+            return self._table[level - 1]
+        return self._required_fn(level)
+
+    def level_for(self, total_exp: float) -> int:
+        if total_exp < self._table[-1]:
+            return max(1, bisect_right(self._table, total_exp))
+
+        # 超出预计算范围：倍增找上界再二分
+        lo = self.max_level
+        hi = lo * 2
+        while self._required_fn(hi) <= total_exp:
+            lo, hi = hi, hi * 2
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._required_fn(mid) <= total_exp:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+
+# ============ 曲线注册表 ============
+
+DEFAULT_CURVE = 'linear'
+
+CURVES: Dict[str, GrowthCurve] = {
+    'linear': LinearCurve(),
+    # 后期放缓：每级额外 +level² 经验
+    'steep': TableCurve(lambda level: level * 100 + (level - 1) * 50 + level * level,
+                        name='steep'),
+}
+
+
+def register_curve(curve: GrowthCurve) -> None:
+    """注册自定义成长曲线"""
+    CURVES[curve.name] = curve
+
+
+def get_curve(name: str = None) -> GrowthCurve:
+    """按名称获取曲线，未知名称回退到默认曲线"""
+    return CURVES.get(name or DEFAULT_CURVE, CURVES[DEFAULT_CURVE])
+
+
+# ============ 批量经验 ============
+
+def sum_exp_events(events: Iterable[ExpEvent], rewards: Dict[str, float] = None) -> float:
+    """汇总一批经验事件"""
+    rewards = rewards or {}
+    total = 0
+    for event in events:
+        if isinstance(event, (int, float)):
+            total += event
+        else:
+            source, amount = event
+            total += rewards.get(source, 0) if amount is None else amount
+    return total
+
+
+def exp_from_counts(counts: Dict[str, int], rewards: Dict[str, float]) -> float:
+    """按来源次数计算经验（离线结算、导入用）"""
+    return sum(rewards.get(source, 0) * count for source, count in counts.items())
@@ -3,6 +3,7 @@ items.py - 小铁皮道具系统
 包含道具定义、精灵图和解锁条件
 """
 
+from bisect import bisect_right
 from typing import Dict, List, Optional, Tuple, Any
 
 
@@ -411,23 +412,107 @@ def check_unlock_condition(unlock: Dict, save_manager) -> bool:
 
 
 def check_all_unlocks(save_manager) -> List[str]:
-    """检查所有未解锁道具，返回新解锁的道具ID列表"""
-    inventory = save_manager.get_inventory()
-    owned = set(inventory.get('owned_items', []))
+    """检查所有未解锁道具，返回新解锁的道具ID列表（全量补查，平时走增量索引）"""
+    index = get_unlock_index()
+    stats = save_manager.get_behavior_stats()
     new_unlocks = []
 
-    for item_id, item in ITEMS.items():
-        if item_id in owned:
-            continue
+    candidates = list(index.default_items)
+    for kind, stat in index.keys():
+        if kind == 'level':
+            value = save_manager.get_level()
+        elif kind == 'trust':
+            value = save_manager.get_trust()
+        else:
+            value = stats.get(stat, 0)
+        candidates.extend(index.reached(kind, stat, value))
 
-        unlock = item.get('unlock', {'type': 'default'})
-        if check_unlock_condition(unlock, save_manager):
-            if save_manager.unlock_item(item_id):
-                new_unlocks.append(item_id)
+    for item_id in candidates:
+        if save_manager.unlock_item(item_id):
+            new_unlocks.append(item_id)
 
     return new_unlocks
 
 
+# ═══════════════════════════════════════════════════════════════
+#  解锁索引
+# ═══════════════════════════════════════════════════════════════
+
+def get_unlock_key(unlock: Dict) -> Tuple[Optional[Tuple[str, str]], float]:
+    """解锁条件 → ((类型, 统计项), 阈值)，默认拥有的道具返回 (None, 0)"""
+    unlock_type = unlock.get('type', 'default')
+    if unlock_type == 'level':
+        return ('level', ''), unlock.get('level', 1)
+    if unlock_type == 'stat':
+        return ('stat', unlock.get('stat', '')), unlock.get('value', 0)
+    if unlock_type == 'trust':
+        return ('trust', ''), unlock.get('value', 0)
+    return None, 0
+
+
+class UnlockIndex:
+    """按依赖数值分组的道具解锁索引
+
+    每个 (类型, 统计项) 对应一列按阈值升序排列的道具。数值从 old 变到 new 时，
+    用二分查找取出 (old, new] 区间内的阈值，只处理刚被跨过的道具。
+    """
+
+    def __init__(self, items: Dict[str, Dict] = None):
+        items = ITEMS if items is None else items
+        self.default_items: List[str] = []
+        self._thresholds: Dict[Tuple[str, str], List[float]] = {}
+        self._item_ids: Dict[Tuple[str, str], List[str]] = {}
+
+        groups: Dict[Tuple[str, str], List[Tuple[float, str]]] = {}
+        for item_id, item in items.items():
+            key, threshold = get_unlock_key(item.get('unlock', {'type': 'default'}))
+            if key is None:
+                self.default_items.append(item_id)
+            else:
+                groups.setdefault(key, []).append((threshold, item_id))
+
+        for key, entries in groups.items():
+            entries.sort()
+            self._thresholds[key] = [t for t, _ in entries]
+            self._item_ids[key] = [item_id for _, item_id in entries]
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """所有被道具依赖的 (类型, 统计项)"""
+        return list(self._thresholds)
+
+    def depends_on(self, kind: str, stat: str = '') -> bool:
+        return (kind, stat) in self._thresholds
+
+    def crossed(self, kind: str, stat: str, old_value: float, new_value: float) -> List[str]:
+        """数值从 old_value 增加到 new_value 时刚达到阈值的道具"""
+        if new_value <= old_value:
+            return []
+        thresholds = self._thresholds.get((kind, stat))
+        if not thresholds:
+            return []
+        lo = bisect_right(thresholds, old_value)
+        hi = bisect_right(thresholds, new_value)
+        return self._item_ids[(kind, stat)][lo:hi]
+
+    def reached(self, kind: str, stat: str, value: float) -> List[str]:
+        """当前数值已达到阈值的所有道具"""
+        thresholds = self._thresholds.get((kind, stat))
+        if not thresholds:
+            return []
+        return self._item_ids[(kind, stat)][:bisect_right(thresholds, value)]
+
+
+_unlock_index: Optional[UnlockIndex] = None
+
+
+def get_unlock_index() -> UnlockIndex:
+    """获取（懒加载）全局解锁索引"""
+    global _unlock_index
+    if _unlock_index is None:
+        _unlock_index = UnlockIndex()
+    return _unlock_index
+
+
 def get_unlock_description(item_id: str) -> str:
     """获取道具解锁条件描述"""
     item = ITEMS.get(item_id)
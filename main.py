@@ -3,24 +3,12 @@ main.py - 小铁皮入口
 """
 
 import os
+import re
 import sys
-from pathlib import Path
 
-# 日志文件用于调试
-LOG_FILE = Path.home() / '.xiaotiepi' / 'debug.log'
-
-def log(msg):
-    try:
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(LOG_FILE, 'a') as f:
-            f.write(f"{msg}\n")
-    except:
-        pass
-
-log("=== App starting ===")
 
 # 修复 py2app 打包后的 SSL 证书路径问题
-def setup_ssl_certificates():
+def setup_ssl_certificates(log):
     try:
         import certifi
         cert_path = certifi.where()
@@ -30,36 +18,69 @@ def setup_ssl_certificates():
     except Exception as e:
         log(f"certifi error: {e}")
 
-setup_ssl_certificates()
-
-# 预先导入并初始化 anthropic SDK
-log("Pre-importing anthropic SDK...")
-_anthropic_client = None
-try:
-    import httpcore
-    log("httpcore OK")
-    import httpx
-    log("httpx OK")
-    import anthropic
-    log(f"anthropic OK: {anthropic.__version__}")
-
-    # 尝试获取 API key 并创建 client
-    from paper_agent.api_key_manager import get_api_key
-    _api_key = get_api_key()
-    if _api_key:
-        log("Creating test client...")
-        _anthropic_client = anthropic.Anthropic(api_key=_api_key)
-        log("Client created OK!")
-    else:
-        log("No API key found")
-except BaseException as e:
-    import traceback
-    log(f"Pre-import FAILED: {type(e).__name__}: {e}")
-    log(traceback.format_exc())
-
-log("Starting Pet...")
-from pet import Pet
 
-if __name__ == '__main__':
+def preimport_anthropic(logger):
+    """预先导入并初始化 anthropic SDK（打包后导入失败时日志里能看到卡在哪一步）"""
+    log = logger.info
+    log("Pre-importing anthropic SDK...")
+    try:
+        import httpcore
+        log("httpcore OK")
+        import httpx
+        log("httpx OK")
+        import anthropic
+        log(f"anthropic OK: {anthropic.__version__}")
+
+        # 尝试获取 API key 并创建 client
+        from paper_agent.api_key_manager import get_api_key
+        api_key = get_api_key()
+        if api_key:
+            log("Creating test client...")
+            anthropic.Anthropic(api_key=api_key)
+            log("Client created OK!")
+        else:
+            log("No API key found")
+    except BaseException as e:
+        logger.error(f"Pre-import FAILED: {type(e).__name__}: {e}", exc_info=True)
+
+
+def main():
+    # 调试日志（~/.xiaotiepi/debug.log，后台线程写入）
+    from paper_agent.debug_log import get_logger
+    logger = get_logger('main')
+    logger.info("=== App starting ===")
+
+    setup_ssl_certificates(logger.info)
+    preimport_anthropic(logger)
+
+    logger.info("Starting Pet...")
+    from pet import Pet
     pet = Pet()
     pet.run()
+
+
+# multiprocessing.resource_tracker 启动自己时用的 -c 代码（参数是管道的文件描述符）
+RESOURCE_TRACKER_CODE = re.compile(r'from multiprocessing\.resource_tracker import main;main\((\d+)\)')
+
+
+def run_frozen_helper():
+    """打包后的 App 里，multiprocessing 的辅助进程也是用 App 的可执行文件启动的：
+    流水线子进程是 "--multiprocessing-fork ..."，resource_tracker 是 "<解释器参数> -c <代码>"。
+    是这两种就在这里跑完退出，不启动界面；-c 后面不是 resource_tracker 的启动代码就不理它"""
+    # multiprocessing.freeze_support() 只在 Windows 上生效，直接调 spawn 里的那个（跑完子进程会 sys.exit）
+    from multiprocessing import spawn
+    spawn.freeze_support()
+    args = sys.argv[1:]
+    if '-c' in args[:-1]:
+        match = RESOURCE_TRACKER_CODE.fullmatch(args[args.index('-c') + 1])
+        if match:
+            from multiprocessing import resource_tracker
+            resource_tracker.main(int(match.group(1)))
+            sys.exit()
+
+
+if __name__ == '__main__':
+    # 论文流水线子进程（spawn）会把本文件当 __mp_main__ 重新导入，所以上面只放定义
+    if getattr(sys, 'frozen', False):
+        run_frozen_helper()
+    main()
@@ -0,0 +1,256 @@
+"""
+python -m paper_agent - 不依赖桌宠界面的论文流水线命令行
+给 cron / systemd timer 预取、批量回填归档、单独测流水线各阶段的耗时用，不导入 tkinter
+
+    python -m paper_agent fetch [--date YYYY-MM-DD] [--force]
+    python -m paper_agent summarize [--date YYYY-MM-DD]
+    python -m paper_agent backfill --days N [--jobs K]
+    python -m paper_agent rescore [--date YYYY-MM-DD] [--top N]
+    python -m paper_agent stats
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from .archive import get_archive
+from .config import SAVE_DIR
+from .pipeline import run_daily_pipeline, today_str
+
+STAGES = ('fetch', 'filter', 'triage', 'summarize', 'deep_read', 'rescore', 'taste', 'archive')
+
+
+class StageStats:
+    """按阶段累计耗时和论文数（回填时多个线程一起往里记）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, count: int) -> None:
+        with self._lock:
+            self.seconds[name] += seconds
+            self.counts[name] += count
+
+    def print_summary(self, wall: float) -> None:
+        print('—' * 44)
+        for name in sorted(self.seconds, key=lambda n: STAGES.index(n) if n in STAGES else len(STAGES)):
+            print(_stage_line(name, self.seconds[name], self.counts[name]))
+        print(f"  {'合计':<8}{wall:8.2f}s")
+
+
+def _stage_line(name: str, seconds: float, count: int) -> str:
+    rate = count / seconds if seconds > 0 else 0.0
+    return f"  {name:<10}{seconds:8.2f}s{count:6d} 篇{rate:10.1f} 篇/s"
+
+
+def _check_date(value: str) -> str:
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'日期格式应为 YYYY-MM-DD：{value}')
+    return value
+
+
+# ===== 子命令 =====
+
+def cmd_fetch(args) -> int:
+    date = args.date or today_str()
+    if get_archive().has_day(date) and not args.force:
+        print(f"{date} 已归档，跳过（--force 重新抓取）")
+        return 0
+
+    stats = StageStats()
+    start = time.perf_counter()
+    # 今天取最新论文；指定的其他日期只取当天提交的
+    papers = run_daily_pipeline(None if date == today_str() else date,
+                                on_stage=stats.record, learn=not args.no_learn)
+    stats.print_summary(time.perf_counter() - start)
+
+    if not papers:
+        print(f"{date} 没有抓到论文")
+        return 1
+    print(f"{date}: {len(papers)} 篇已归档")
+    return 0
+
+
+def cmd_summarize(args) -> int:
+    """重新总结已归档的一天（比如当时没有 API Key，用的是兜底摘要）"""
+    from .summarizer import PaperSummarizer
+
+    archive = get_archive()
+    date = args.date or today_str()
+    papers = [dict(p) for p in archive.load_day(date)]
+    if not papers:
+        print(f"{date} 没有归档的论文")
+        return 1
+
+    stats = StageStats()
+    start = time.perf_counter()
+
+    summarizer = PaperSummarizer()
+    t = time.perf_counter()
+    papers = summarizer.summarize_papers(papers)
+    stats.record('summarize', time.perf_counter() - t, len(papers))
+
+    t = time.perf_counter()
+    papers = summarizer.deep_read_papers(papers)
+    stats.record('deep_read', time.perf_counter() - t, sum(1 for p in papers if p.get('deep_summary')))
+
+    t = time.perf_counter()
+    summarizer.save_summarized_papers(papers, date)
+    stats.record('archive', time.perf_counter() - t, len(papers))
+
+    stats.print_summary(time.perf_counter() - start)
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    """补齐最近 N 天（不含今天）缺的归档；抓取按来源限速，总结并发跑"""
+    archive = get_archive()
+    today = datetime.now()
+    dates = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, args.days + 1)]
+    if not args.force:
+        dates = [d for d in dates if not archive.has_day(d)]
+    if not dates:
+        print('没有需要回填的日期')
+        return 0
+
+    print(f"回填 {len(dates)} 天，并发 {args.jobs}")
+    stats = StageStats()
+    failed: List[str] = []
+    start = time.perf_counter()
+
+    # 回填的是历史论文，不拿来更新口味
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(run_daily_pipeline, d, stats.record, False): d for d in dates}
+        for future in as_completed(futures):
+            date = futures[future]
+            try:
+                papers = future.result()
+            except Exception as e:
+                print(f"  {date}: 出错 {e}")
+                failed.append(date)
+                continue
+            if papers:
+                print(f"  {date}: {len(papers)} 篇")
+            else:
+                print(f"  {date}: 没有论文")
+                failed.append(date)
+
+    wall = time.perf_counter() - start
+    stats.print_summary(wall)
+    done = len(dates) - len(failed)
+    print(f"完成 {done}/{len(dates)} 天，{done / wall * 60:.1f} 天/分钟")
+    return 1 if failed else 0
+
+
+def cmd_rescore(args) -> int:
+    """用当前口味重新算归档论文的相关度（写回 relevance 字段）"""
+    from .taste import TasteProfile
+
+    archive = get_archive()
+    dates = [args.date] if args.date else [d for d, _ in archive.dates()]
+    days = [(d, [dict(p) for p in archive.load_day(d)]) for d in dates]
+    days = [(d, papers) for d, papers in days if papers]
+    if not days:
+        print('没有归档的论文')
+        return 1
+
+    stats = StageStats()
+    start = time.perf_counter()
+
+    # 所有论文一起打分（一次矩阵乘法）
+    t = time.perf_counter()
+    flat = [p for _, papers in days for p in papers]
+    for paper, score in zip(flat, TasteProfile().rank(flat)):
+        paper['relevance'] = round(score, 4)
+    stats.record('rescore', time.perf_counter() - t, len(flat))
+
+    t = time.perf_counter()
+    for date, papers in days:
+        archive.save_day(date, papers)
+    stats.record('archive', time.perf_counter() - t, len(flat))
+
+    stats.print_summary(time.perf_counter() - start)
+
+    print(f"\n和当前口味最接近的 {args.top} 篇：")
+    dated = [(p['relevance'], d, p) for d, papers in days for p in papers]
+    dated.sort(key=lambda x: x[0], reverse=True)
+    for score, date, paper in dated[:args.top]:
+        print(f"  {score:+.3f}  {date}  {paper.get('title_cn') or paper.get('title', '')}")
+    return 0
+
+
+def cmd_stats(args) -> int:
+    from .taste import TasteProfile
+
+    s = get_archive().stats()
+    print('📚 论文归档')
+    if s['days']:
+        print(f"  {s['days']} 天（{s['first_date']} ~ {s['last_date']}），"
+              f"{s['papers']} 篇，平均 {s['papers'] / s['days']:.1f} 篇/天，精读 {s['deep_read']} 篇")
+        print('  评分分布：' + '  '.join(f"{score if score is not None else '-'}分×{n}"
+                                    for score, n in s['scores']))
+        if s['tags']:
+            print('  常见标签：' + '、'.join(f'{tag}({n})' for tag, n in s['tags']))
+    else:
+        print('  （空）')
+
+    print()
+    print(TasteProfile().get_stats_text())
+
+    print('💾 数据文件')
+    if SAVE_DIR.exists():
+        for path in sorted(SAVE_DIR.iterdir()):
+            if path.is_file():
+                print(f"  {path.name:<24}{path.stat().st_size / 1024:10.1f} KB")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m paper_agent', description='小铁皮论文流水线（命令行）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('fetch', help='抓取 → 筛选 → 总结 → 更新口味 → 归档')
+    p.add_argument('--date', type=_check_date, help='归档日期（默认今天）')
+    p.add_argument('--force', action='store_true', help='已归档也重新抓取')
+    p.add_argument('--no-learn', action='store_true', help='不更新口味')
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser('summarize', help='重新总结已归档的一天')
+    p.add_argument('--date', type=_check_date, help='日期（默认今天）')
+    p.set_defaults(func=cmd_summarize)
+
+    p = sub.add_parser('backfill', help='补齐最近 N 天的归档')
+    p.add_argument('--days', type=int, required=True, help='往前回填的天数（不含今天）')
+    p.add_argument('--jobs', type=int, default=2, help='同时处理的天数（默认 2）')
+    p.add_argument('--force', action='store_true', help='已归档的日期也重新抓取')
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser('rescore', help='用当前口味重新计算归档论文的相关度')
+    p.add_argument('--date', type=_check_date, help='只处理这一天（默认全部）')
+    p.add_argument('--top', type=int, default=10, help='列出最相关的 N 篇（默认 10）')
+    p.set_defaults(func=cmd_rescore)
+
+    p = sub.add_parser('stats', help='归档、口味和数据文件统计')
+    p.set_defaults(func=cmd_stats)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'days', 1) < 1 or getattr(args, 'jobs', 1) < 1:
+        print('--days / --jobs 必须是正整数')
+        return 2
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+archive.py - 按日期归档的论文库
+每天抓取并总结好的论文整份存进 SQLite（按日期、ID、标签、评分建索引），
+不再每天覆盖 paper_data.json；最近看过的几天缓存在内存里，
+每天有个版本号（每次保存加一），读缓存前先核对，别的进程（流水线子进程、命令行）改过就重新读
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .config import SAVE_DIR, PAPER_DATA_FILE
+
+PAPER_ARCHIVE_FILE = SAVE_DIR / 'paper_archive.db'
+
+# 内存里缓存最近访问的天数
+CACHE_DAYS = 7
+
+
+class PaperArchive:
+    """论文归档
+
+    days 表记录每天的抓取状态（是否已推送简报、版本号），papers 表存完整的论文数据，
+    paper_tags 表用于按标签查找。可以在后台线程里调用。
+    """
+
+    def __init__(self, path=PAPER_ARCHIVE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, Tuple[int, List[Dict]]]' = OrderedDict()   # 日期 → (版本号, 论文)
+        SAVE_DIR.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._create_tables()
+        self._import_legacy()
+
+    def _create_tables(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS days (
+                date TEXT PRIMARY KEY,
+                paper_count INTEGER NOT NULL,
+                briefing_delivered INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS papers (
+                date TEXT NOT NULL,
+                pos INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                score INTEGER,
+                deep_read INTEGER,
+                data TEXT NOT NULL,
+                PRIMARY KEY (date, id))''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS papers_id ON papers (id)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS papers_score ON papers (score, date)')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS paper_tags (
+                tag TEXT NOT NULL,
+                date TEXT NOT NULL,
+                id TEXT NOT NULL)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS paper_tags_tag ON paper_tags (tag, date)')
+
+            # 旧库：补上版本号，去掉没用过的 briefing_text
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(days)')}
+            if 'version' not in columns:
+                self.conn.execute('ALTER TABLE days ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+            if 'briefing_text' in columns:
+                try:
+                    self.conn.execute('ALTER TABLE days DROP COLUMN briefing_text')
+                except sqlite3.OperationalError:
+                    pass    # SQLite < 3.35 不支持删列，留着不用
+
+    def _import_legacy(self) -> None:
+        """旧版只保留最后一天的 paper_data.json，导入一次"""
+        if not PAPER_DATA_FILE.exists():
+            return
+        try:
+            with open(PAPER_DATA_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            date = data.get('last_fetch_date')
+            if date and not self.has_day(date):
+                self.save_day(date, data.get('today_papers', []),
+                              briefing_delivered=data.get('briefing_delivered', False))
+        except Exception as e:
+            print(f"Import paper_data.json error: {e}")
+
+    # ===== 写入 =====
+
+    def save_day(self, date: str, papers: List[Dict], briefing_delivered: bool = False) -> None:
+        """保存（替换）某一天的论文；briefing_delivered 只在第一次保存这一天时生效，之后不动它"""
+        rows = []
+        tags = []
+        for pos, paper in enumerate(papers):
+            paper_id = paper.get('id', paper.get('title', ''))
+            rows.append((date, pos, paper_id, paper.get('interest_score'),
+                         1 if paper.get('deep_read') else 0,
+                         json.dumps(paper, ensure_ascii=False)))
+            tags.extend((tag, date, paper_id) for tag in paper.get('tags', []))
+
+        try:
+            with self._lock, self.conn:
+                self.conn.execute('DELETE FROM papers WHERE date = ?', (date,))
+                self.conn.execute('DELETE FROM paper_tags WHERE date = ?', (date,))
+                self.conn.executemany('INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self.conn.executemany('INSERT INTO paper_tags VALUES (?, ?, ?)', tags)
+                self.conn.execute(
+                    'INSERT INTO days (date, paper_count, briefing_delivered) VALUES (?, ?, ?) '
+                    'ON CONFLICT(date) DO UPDATE SET paper_count = excluded.paper_count, '
+                    'version = version + 1',
+                    (date, len(papers), 1 if briefing_delivered else 0))
+                version = self._version(date)
+                self._remember(date, version, list(papers))
+        except sqlite3.Error as e:
+            print(f"Save paper archive error: {e}")
+
+    def mark_briefing_delivered(self, date: str) -> None:
+        try:
+            with self._lock, self.conn:
+                self.conn.execute('UPDATE days SET briefing_delivered = 1 WHERE date = ?', (date,))
+        except sqlite3.Error as e:
+            print(f"Paper archive update error: {e}")
+
+    # ===== 按日期 =====
+
+    def _version(self, date: str) -> Optional[int]:
+        row = self.conn.execute('SELECT version FROM days WHERE date = ?', (date,)).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, date: str, version: int, papers: List[Dict]) -> None:
+        self._cache[date] = (version, papers)
+        self._cache.move_to_end(date)
+        while len(self._cache) > CACHE_DAYS:
+            self._cache.popitem(last=False)
+
+    def has_day(self, date: str) -> bool:
+        if date in self._cache:
+            return True
+        with self._lock:
+            row = self.conn.execute('SELECT 1 FROM days WHERE date = ?', (date,)).fetchone()
+        return row is not None
+
+    def load_day(self, date: str) -> List[Dict]:
+        """某一天的论文（按当天的顺序）"""
+        with self._lock:
+            try:
+                version = self._version(date)
+                cached = self._cache.get(date)
+                if cached is not None and cached[0] == version:
+                    self._cache.move_to_end(date)
+                    return cached[1]
+                rows = self.conn.execute('SELECT data FROM papers WHERE date = ? ORDER BY pos',
+                                         (date,)).fetchall()
+            except sqlite3.Error as e:
+                print(f"Load paper archive error: {e}")
+                return []
+            papers = [json.loads(data) for data, in rows]
+            # 空结果不缓存：这一天可能稍后由别的进程（流水线子进程、命令行）写入
+            if papers:
+                self._remember(date, version, papers)
+            else:
+                self._cache.pop(date, None)
+            return papers
+
+    def is_briefing_delivered(self, date: str) -> bool:
+        with self._lock:
+            row = self.conn.execute('SELECT briefing_delivered FROM days WHERE date = ?',
+                                    (date,)).fetchone()
+        return bool(row and row[0])
+
+    def dates(self) -> List[Tuple[str, int]]:
+        """所有归档日期及论文数（新的在前）"""
+        with self._lock:
+            return self.conn.execute(
+                'SELECT date, paper_count FROM days ORDER BY date DESC').fetchall()
+
+    def previous_date(self, date: str) -> Optional[str]:
+        """早于 date 的最近一天"""
+        with self._lock:
+            row = self.conn.execute('SELECT MAX(date) FROM days WHERE date < ? AND paper_count > 0',
+                                    (date,)).fetchone()
+        return row[0] if row else None
+
+    def next_date(self, date: str) -> Optional[str]:
+        """晚于 date 的最近一天"""
+        with self._lock:
+            row = self.conn.execute('SELECT MIN(date) FROM days WHERE date > ? AND paper_count > 0',
+                                    (date,)).fetchone()
+        return row[0] if row else None
+
+    # ===== 跨日期查找 =====
+
+    def _query(self, sql: str, params: tuple) -> List[Tuple[str, Dict]]:
+        with self._lock:
+            try:
+                rows = self.conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                print(f"Paper archive query error: {e}")
+                return []
+        return [(date, json.loads(data)) for date, data in rows]
+
+    def find(self, paper_id: str) -> List[Tuple[str, Dict]]:
+        """某篇论文出现过的日期和当时的数据"""
+        return self._query('SELECT date, data FROM papers WHERE id = ? ORDER BY date DESC',
+                           (paper_id,))
+
+    def by_tag(self, tag: str, limit: int = 50) -> List[Tuple[str, Dict]]:
+        return self._query(
+            'SELECT p.date, p.data FROM paper_tags t '
+            'JOIN papers p ON p.date = t.date AND p.id = t.id '
+            'WHERE t.tag = ? ORDER BY t.date DESC LIMIT ?', (tag, limit))
+
+    def by_score(self, min_score: int, limit: int = 50) -> List[Tuple[str, Dict]]:
+        return self._query(
+            'SELECT date, data FROM papers WHERE score >= ? '
+            'ORDER BY date DESC, score DESC LIMIT ?', (min_score, limit))
+
+    def iter_all(self):
+        """全部归档论文 (date, paper)，按日期顺序"""
+        return self._query('SELECT date, data FROM papers ORDER BY date, pos', ())
+
+    # ===== 统计 =====
+
+    def stats(self, top_tags: int = 10) -> Dict:
+        """天数、论文数、日期范围、评分分布、常见标签"""
+        with self._lock:
+            days, first, last = self.conn.execute(
+                'SELECT COUNT(*), MIN(date), MAX(date) FROM days').fetchone()
+            papers, deep_read = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(deep_read), 0) FROM papers').fetchone()
+            scores = self.conn.execute(
+                'SELECT score, COUNT(*) FROM papers GROUP BY score ORDER BY score').fetchall()
+            tags = self.conn.execute(
+                'SELECT tag, COUNT(*) AS n FROM paper_tags GROUP BY tag '
+                'ORDER BY n DESC LIMIT ?', (top_tags,)).fetchall()
+        return {
+            'days': days,
+            'papers': papers,
+            'deep_read': deep_read,
+            'first_date': first,
+            'last_date': last,
+            'scores': scores,
+            'tags': tags,
+        }
+
+
+_archive: Optional[PaperArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> PaperArchive:
+    """进程内共享的论文归档"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = PaperArchive()
+        return _archive
@@ -0,0 +1,155 @@
+"""
+async_bridge.py - asyncio 事件循环和 Tk 主循环之间的桥
+网络和磁盘 I/O 都作为协程跑在同一个后台线程的事件循环里（阻塞调用用 to_thread 包一层），
+信号量限制同时进行的任务数；结果放进线程安全的队列，由 Tk 主线程上唯一的分发器
+取出来调回调。任务按 owner（一般是窗口）分组，窗口关掉时一起取消
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+MAX_CONCURRENCY = 4     # 同时进行的任务数
+DISPATCH_MS = 30        # 有任务未完成时，分发器检查结果的间隔
+
+Callback = Optional[Callable[[Any], None]]
+
+
+class AsyncBridge:
+    """后台线程里的 asyncio 循环 + Tk 主线程上的结果分发器
+
+    submit / run_io / cancel_owner 只能在 Tk 主线程调用；回调也都在 Tk 主线程执行
+    """
+
+    def __init__(self, root, max_concurrency: int = MAX_CONCURRENCY):
+        self.root = root
+        self.max_concurrency = max_concurrency
+        self.loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._results: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._owners: Dict[int, Set[Future]] = {}
+        self._pending = 0
+        self._dispatch_job = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='async-bridge', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _guarded(self, coro: Awaitable) -> Any:
+        # 信号量在循环线程里创建和使用
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await coro
+
+    # ===== 提交任务 =====
+
+    def submit(self, coro: Awaitable, on_done: Callback = None, on_error: Callback = None,
+               owner: Any = None) -> Optional[Future]:
+        """在事件循环里跑一个协程；完成后在主线程调 on_done(结果) 或 on_error(异常)"""
+        if self._closed:
+            coro.close()
+            return None
+        future = asyncio.run_coroutine_threadsafe(self._guarded(coro), self.loop)
+        key = id(owner) if owner is not None else None
+        if key is not None:
+            self._owners.setdefault(key, set()).add(future)
+        self._pending += 1
+        # 回调在循环线程触发，只往队列里放，交给主线程的分发器
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error, key)))
+        self._schedule_dispatch()
+        return future
+
+    def run_io(self, fn: Callable, *args, on_done: Callback = None, on_error: Callback = None,
+               owner: Any = None) -> Optional[Future]:
+        """阻塞的 I/O 函数（文件读写、同步 SDK）放到线程池里，同样受并发上限约束"""
+        return self.submit(asyncio.to_thread(fn, *args), on_done, on_error, owner)
+
+    def cancel_owner(self, owner: Any) -> None:
+        """取消某个 owner 的所有未完成任务（窗口关闭时调用），它们的回调不会再执行"""
+        for future in self._owners.pop(id(owner), ()):
+            future.cancel()
+
+    # ===== 分发 =====
+
+    def _schedule_dispatch(self) -> None:
+        if self._dispatch_job is None:
+            self._dispatch_job = self.root.after(DISPATCH_MS, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._dispatch_job = None
+        while True:
+            try:
+                future, on_done, on_error, key = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if key is not None:
+                futures = self._owners.get(key)
+                if futures is not None:
+                    futures.discard(future)
+                    if not futures:
+                        del self._owners[key]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        print(f"Async task error: {error}")
+                elif on_done:
+                    on_done(future.result())
+            except Exception as e:
+                print(f"Async callback error: {e}")
+
+        if self._pending > 0 and not self._closed:
+            self._schedule_dispatch()
+
+    def shutdown(self) -> None:
+        """取消所有任务并停止事件循环"""
+        if self._closed:
+            return
+        self._closed = True
+        for futures in self._owners.values():
+            for future in futures:
+                future.cancel()
+        self._owners.clear()
+        if self._dispatch_job is not None:
+            try:
+                self.root.after_cancel(self._dispatch_job)
+            except Exception:
+                pass
+            self._dispatch_job = None
+
+        def stop():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(stop)
+
+
+_bridge: Optional[AsyncBridge] = None
+
+
+def get_bridge(root=None) -> AsyncBridge:
+    """进程内共享的桥（第一次调用时传入 Tk 根窗口）"""
+    global _bridge
+    if _bridge is None or _bridge._closed:
+        if root is None:
+            raise RuntimeError('AsyncBridge 还没有用 Tk 根窗口初始化')
+        _bridge = AsyncBridge(root)
+    return _bridge
+
+
+def shutdown_bridge() -> None:
+    """程序退出时调用（没创建过就什么都不做）"""
+    if _bridge is not None:
+        _bridge.shutdown()
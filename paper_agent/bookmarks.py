@@ -0,0 +1,185 @@
+"""
+bookmarks.py - 论文收藏存储
+内存里按 ID 建哈希索引、按收藏时间建有序索引；
+磁盘上是快照 bookmarks.json + 追加日志 bookmarks.log，每次增删只追加一行
+"""
+
+import json
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .config import SAVE_DIR
+from .search_index import get_search_index
+
+BOOKMARKS_FILE = SAVE_DIR / 'bookmarks.json'
+BOOKMARKS_LOG = SAVE_DIR / 'bookmarks.log'
+
+# 日志条数超过 max(COMPACT_MIN, 收藏数) 时合并回快照
+COMPACT_MIN = 100
+
+
+class BookmarkManager:
+    """收藏管理器"""
+
+    def __init__(self):
+        SAVE_DIR.mkdir(parents=True, exist_ok=True)
+        self._by_id: Dict[str, Dict] = {}
+        self._by_time: List[Tuple[str, str]] = []   # (bookmarked_at, id) 升序
+        self._undated: List[str] = []                # 时间无法解析的收藏
+        self._all_cache: Optional[List[Dict]] = None
+        self._log_count = 0
+        self._load()
+
+    # ===== 索引 =====
+
+    @staticmethod
+    def _time_key(record: Dict) -> Optional[str]:
+        """统一成可按字符串比较的时间，无法解析时返回 None"""
+        try:
+            return datetime.fromisoformat(record['bookmarked_at']).isoformat()
+        except Exception:
+            return None
+
+    def _index(self, record: Dict) -> None:
+        paper_id = record['id']
+        self._by_id[paper_id] = record
+        key = self._time_key(record)
+        if key is None:
+            self._undated.append(paper_id)
+        else:
+            insort(self._by_time, (key, paper_id))
+        self._all_cache = None
+
+    def _unindex(self, paper_id: str) -> None:
+        record = self._by_id.pop(paper_id, None)
+        if record is None:
+            return
+        key = self._time_key(record)
+        if key is None:
+            self._undated.remove(paper_id)
+        else:
+            i = bisect_left(self._by_time, (key, paper_id))
+            if i < len(self._by_time) and self._by_time[i] == (key, paper_id):
+                del self._by_time[i]
+        self._all_cache = None
+
+    # ===== 持久化 =====
+
+    def _load(self) -> None:
+        """加载快照，再重放日志"""
+        if BOOKMARKS_FILE.exists():
+            try:
+                with open(BOOKMARKS_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for record in data.get('bookmarks', []):
+                    if 'id' in record and record['id'] not in self._by_id:
+                        self._index(record)
+            except:
+                pass
+
+        if BOOKMARKS_LOG.exists():
+            try:
+                with open(BOOKMARKS_LOG, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # 写到一半的最后一行
+                        self._apply(entry)
+                        self._log_count += 1
+            except:
+                pass
+
+    def _apply(self, entry: Dict) -> None:
+        if entry.get('op') == 'add':
+            record = entry.get('record') or {}
+            if record.get('id') is not None:
+                self._unindex(record['id'])
+                self._index(record)
+        elif entry.get('op') == 'remove':
+            self._unindex(entry.get('id'))
+
+    def _append_log(self, entry: Dict) -> None:
+        """只追加这一次的变化"""
+        try:
+            with open(BOOKMARKS_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._log_count += 1
+        except Exception as e:
+            print(f"Bookmark log error: {e}")
+            return
+        if self._log_count > max(COMPACT_MIN, len(self._by_id)):
+            self.save()
+
+    def save(self) -> None:
+        """合并：写出完整快照并清空日志"""
+        try:
+            tmp_file = BOOKMARKS_FILE.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'bookmarks': self.get_all()}, f, ensure_ascii=False)
+            tmp_file.replace(BOOKMARKS_FILE)
+            BOOKMARKS_LOG.unlink(missing_ok=True)
+            self._log_count = 0
+        except Exception as e:
+            print(f"Save bookmarks error: {e}")
+
+    # ===== 接口 =====
+
+    def add(self, paper: Dict) -> None:
+        """添加收藏"""
+        paper_id = paper.get('id', paper.get('title', ''))
+        if self.is_bookmarked(paper_id):
+            return
+        record = {
+            'id': paper_id,
+            'title': paper.get('title', 'Untitled'),
+            'title_cn': paper.get('title_cn', ''),
+            'url': paper.get('url', ''),
+            'tags': paper.get('tags', []),
+            'comment': paper.get('comment', ''),
+            'interest_score': paper.get('interest_score', 3),
+            'bookmarked_at': datetime.now().isoformat()
+        }
+        self._index(record)
+        self._append_log({'op': 'add', 'record': record})
+        index = get_search_index()
+        if index:
+            index.index_bookmark(record)
+
+    def remove(self, paper_id: str) -> None:
+        """移除收藏"""
+        if paper_id not in self._by_id:
+            return
+        self._unindex(paper_id)
+        self._append_log({'op': 'remove', 'id': paper_id})
+        index = get_search_index()
+        if index:
+            index.remove_bookmark(paper_id)
+
+    def is_bookmarked(self, paper_id: str) -> bool:
+        """是否已收藏"""
+        return paper_id in self._by_id
+
+    def get(self, paper_id: str) -> Optional[Dict]:
+        return self._by_id.get(paper_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get_all(self) -> List[Dict]:
+        """获取所有收藏（新的在前）"""
+        if self._all_cache is None:
+            self._all_cache = [self._by_id[pid] for _, pid in reversed(self._by_time)]
+            self._all_cache += [self._by_id[pid] for pid in self._undated]
+        return self._all_cache
+
+    @property
+    def bookmarks(self) -> List[Dict]:
+        return self.get_all()
+
+    def get_old_bookmarks(self, days: int = 3) -> List[Dict]:
+        """获取超过指定天数未查看的收藏"""
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        end = bisect_left(self._by_time, (cutoff, ''))
+        return [self._by_id[pid] for _, pid in reversed(self._by_time[:end])]
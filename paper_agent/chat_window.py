@@ -5,7 +5,7 @@ chat_window.py - 小铁皮·学术日报窗口
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
+import asyncio
 import webbrowser
 import json
 import os
@@ -15,82 +15,17 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Callable, Optional
 from pathlib import Path
 
-from .config import CHAT_HISTORY_FILE, SAVE_DIR
+from .config import CHAT_HISTORY_FILE
 from .summarizer import PaperSummarizer
 from .taste import TasteProfile
-
-# ===== 路径常量 =====
-NOTES_DIR = SAVE_DIR / 'notes'
-BOOKMARKS_FILE = SAVE_DIR / 'bookmarks.json'
-
-
-class BookmarkManager:
-    """收藏管理器"""
-
-    def __init__(self):
-        SAVE_DIR.mkdir(parents=True, exist_ok=True)
-        self.bookmarks = self._load()
-
-    def _load(self) -> List[Dict]:
-        """加载收藏"""
-        if BOOKMARKS_FILE.exists():
-            try:
-                with open(BOOKMARKS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('bookmarks', [])
-            except:
-                pass
-        return []
-
-    def save(self) -> None:
-        """保存收藏"""
-        try:
-            with open(BOOKMARKS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({'bookmarks': self.bookmarks}, f, ensure_ascii=False, indent=2)
-        except:
-            pass
-
-    def add(self, paper: Dict) -> None:
-        """添加收藏"""
-        paper_id = paper.get('id', paper.get('title', ''))
-        if not self.is_bookmarked(paper_id):
-            self.bookmarks.insert(0, {
-                'id': paper_id,
-                'title': paper.get('title', 'Untitled'),
-                'title_cn': paper.get('title_cn', ''),
-                'url': paper.get('url', ''),
-                'tags': paper.get('tags', []),
-                'comment': paper.get('comment', ''),
-                'interest_score': paper.get('interest_score', 3),
-                'bookmarked_at': datetime.now().isoformat()
-            })
-            self.save()
-
-    def remove(self, paper_id: str) -> None:
-        """移除收藏"""
-        self.bookmarks = [b for b in self.bookmarks if b['id'] != paper_id]
-        self.save()
-
-    def is_bookmarked(self, paper_id: str) -> bool:
-        """是否已收藏"""
-        return any(b['id'] == paper_id for b in self.bookmarks)
-
-    def get_all(self) -> List[Dict]:
-        """获取所有收藏"""
-        return self.bookmarks
-
-    def get_old_bookmarks(self, days: int = 3) -> List[Dict]:
-        """获取超过指定天数未查看的收藏"""
-        cutoff = datetime.now() - timedelta(days=days)
-        old = []
-        for b in self.bookmarks:
-            try:
-                bookmarked = datetime.fromisoformat(b['bookmarked_at'])
-                if bookmarked < cutoff:
-                    old.append(b)
-            except:
-                pass
-        return old
+from .virtual_list import VirtualList, Row, Card
+from .bookmarks import BookmarkManager
+from .search_index import get_search_index, KIND_LABELS
+from .notes import NOTES_DIR, NoteCatalog, read_note
+from .archive import get_archive
+from .async_bridge import get_bridge
+from .metering import get_meter, FEATURE_NOTE
+from .llm_scheduler import get_llm_scheduler
 
 # ===== 样式常量 =====
 COLORS = {
@@ -210,6 +145,485 @@ WINDOW_HEIGHT = 580
 CARD_WIDTH = 380
 
 
+# ===== 卡片（虚拟列表中回收复用） =====
+
+# 还没测量过的卡片按这些高度估算
+CARD_ESTIMATES = {
+    'paper': 170,
+    'bookmark': 140,
+    'note': 75,
+    'user_message': 50,
+    'pet_message': 50,
+    'search_result': 90,
+}
+
+# 搜索框停止输入多久后再查询（毫秒）
+SEARCH_DELAY = 150
+
+
+class PaperCard(Card):
+    """论文卡片，data 为 (paper, is_recommended)"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.win = win
+        self.paper: Dict = {}
+        self.frame.config(bg=COLORS['bg_main'])
+
+        self.accent_bar = tk.Frame(self.frame, bg=COLORS['border_recommended'], width=4)
+        self.card = tk.Frame(self.frame, highlightbackground=COLORS['border_card'],
+                             highlightthickness=1)
+        self.card_inner = tk.Frame(self.card)
+        self.card_inner.pack(fill='x', padx=12, pady=10)
+
+        # 精读推荐标语
+        self.rec_frame = tk.Frame(self.card_inner)
+        self.rec_avatar = tk.Canvas(self.rec_frame, width=16, height=12, highlightthickness=0)
+        self.rec_avatar.pack(side='left', padx=(0, 5))
+        win._draw_pet_emoji(self.rec_avatar, 'happy', pixel_size=2)
+        self.rec_label = tk.Label(self.rec_frame, text='这篇推荐精读！', font=FONTS['body'],
+                                  fg=COLORS['text_link'])
+        self.rec_label.pack(side='left')
+
+        # 星级 + 标签
+        self.top_row = tk.Frame(self.card_inner)
+        self.stars_label = tk.Label(self.top_row, font=FONTS['body'], fg=COLORS['star'])
+        self.stars_label.pack(side='left')
+        self.tag_labels = [tk.Label(self.top_row, font=FONTS['tag'], fg=COLORS['tag_text'],
+                                    bg=COLORS['tag_bg'], padx=6, pady=1) for _ in range(3)]
+
+        # 标题（可点击）
+        self.title_label = tk.Label(self.card_inner, font=FONTS['paper_title'],
+                                    fg=COLORS['text_link'], wraplength=CARD_WIDTH - 40,
+                                    justify='left', anchor='w')
+        self.title_label.bind('<Button-1>', self._on_title_click)
+        self.title_label.bind('<Enter>', lambda e: self._underline_title(True))
+        self.title_label.bind('<Leave>', lambda e: self._underline_title(False))
+
+        # 点评
+        self.comment_frame = tk.Frame(self.card_inner)
+        self.emoji_canvas = tk.Canvas(self.comment_frame, width=20, height=14,
+                                      highlightthickness=0)
+        self.emoji_canvas.pack(side='left', anchor='n', padx=(0, 6), pady=2)
+        self.comment_label = tk.Label(self.comment_frame, font=FONTS['comment'],
+                                      fg=COLORS['text_secondary'], wraplength=CARD_WIDTH - 70,
+                                      justify='left', anchor='w')
+        self.comment_label.pack(side='left', fill='x', expand=True)
+
+        # 按钮区（从右往左：收藏、笔记、复制、👎、👍）
+        self.btn_row = tk.Frame(self.card_inner)
+        self.bookmark_btn = tk.Label(self.btn_row, font=FONTS['body'], cursor='hand2')
+        self.bookmark_btn.pack(side='right', padx=2)
+        self.bookmark_btn.bind('<Button-1>',
+                               lambda e: win._toggle_bookmark(self.paper, self.bookmark_btn))
+        self.note_btn = tk.Label(self.btn_row, text='📝', font=FONTS['small'])
+        self.note_btn.pack(side='right', padx=2)
+        self.note_btn.bind('<Button-1>', self._on_note)
+        self.copy_btn = tk.Label(self.btn_row, text='📋', font=FONTS['small'],
+                                 fg=COLORS['copy_btn'], cursor='hand2')
+        self.copy_btn.pack(side='right', padx=2)
+        self.copy_btn.bind('<Button-1>', lambda e: win._copy_paper(self.paper, self.copy_btn))
+        self.down_btn = tk.Label(self.btn_row, text='👎', font=FONTS['small'])
+        self.down_btn.pack(side='right', padx=2)
+        self.down_btn.bind('<Button-1>', self._on_down)
+        self.up_btn = tk.Label(self.btn_row, text='👍', font=FONTS['small'])
+        self.up_btn.pack(side='right', padx=2)
+        self.up_btn.bind('<Button-1>', self._on_up)
+
+        self.bg_widgets = [self.card, self.card_inner, self.rec_frame, self.rec_avatar,
+                           self.rec_label, self.top_row, self.stars_label, self.title_label,
+                           self.comment_frame, self.emoji_canvas, self.comment_label,
+                           self.btn_row, self.bookmark_btn, self.note_btn, self.copy_btn,
+                           self.down_btn, self.up_btn]
+        win._bind_wheel(self.frame)
+
+    @property
+    def paper_id(self) -> str:
+        return self.paper.get('id', self.paper.get('title', ''))
+
+    def bind(self, data) -> None:
+        self.paper, is_recommended = data
+
+        bg_color = COLORS['bg_card_recommended'] if is_recommended else COLORS['bg_card']
+        for widget in self.bg_widgets:
+            widget.config(bg=bg_color)
+
+        self.accent_bar.pack_forget()
+        self.card.pack_forget()
+        if is_recommended:
+            self.accent_bar.pack(side='left', fill='y')
+        self.card.pack(side='left', fill='x', expand=True)
+
+        for widget in (self.rec_frame, self.top_row, self.title_label,
+                       self.comment_frame, self.btn_row):
+            widget.pack_forget()
+
+        if is_recommended:
+            self.rec_frame.pack(fill='x', pady=(0, 6))
+
+        score = self.paper.get('interest_score', 3)
+        self.stars_label.config(text='★' * score + '☆' * (5 - score))
+        tags = self.paper.get('tags', [])[:3]
+        for i, label in enumerate(self.tag_labels):
+            label.pack_forget()
+            if i < len(tags):
+                label.config(text=tags[i])
+                label.pack(side='left', padx=(6, 0))
+        self.top_row.pack(fill='x', pady=(0, 6))
+
+        url = self.paper.get('url', '')
+        self.title_label.config(text=self.paper.get('title', 'Untitled'),
+                                font=FONTS['paper_title'],
+                                cursor='hand2' if url else 'arrow')
+        self.title_label.pack(fill='x', pady=(0, 8))
+
+        comment = self.paper.get('comment', '')
+        if comment:
+            self.emoji_canvas.delete('all')
+            self.win._draw_pet_emoji(self.emoji_canvas, self.win._get_emotion_for_score(score),
+                                     pixel_size=2)
+            self.comment_label.config(text=comment)
+            self.comment_frame.pack(fill='x', pady=(0, 6))
+
+        self.btn_row.pack(fill='x')
+        self.refresh_state()
+
+    def refresh_state(self) -> None:
+        """收藏、讨论、反馈状态"""
+        paper_id = self.paper_id
+
+        is_bookmarked = self.win.bookmark_manager.is_bookmarked(paper_id)
+        self.bookmark_btn.config(text='★' if is_bookmarked else '☆',
+                                 fg=COLORS['star'] if is_bookmarked else COLORS['star_empty'])
+
+        discussed = paper_id in self.win.papers_discussed
+        self.note_btn.config(fg=COLORS['note_btn'] if discussed else COLORS['btn_disabled'],
+                             cursor='hand2' if discussed else 'arrow')
+
+        feedback = self.win.today_feedback.get(paper_id)
+        self.down_btn.config(
+            fg=COLORS['thumbs_down'] if feedback == 'down' else COLORS['btn_disabled'],
+            cursor='hand2' if feedback is None else 'arrow')
+        self.up_btn.config(
+            fg=COLORS['thumbs_up'] if feedback == 'up' else COLORS['btn_disabled'],
+            cursor='hand2' if feedback is None else 'arrow')
+
+    def _on_title_click(self, event) -> None:
+        url = self.paper.get('url', '')
+        if url:
+            self.win._open_link(url)
+
+    def _underline_title(self, on: bool) -> None:
+        if self.paper.get('url'):
+            font = FONTS['paper_title'] + ('underline',) if on else FONTS['paper_title']
+            self.title_label.config(font=font)
+
+    def _on_note(self, event) -> None:
+        if self.paper_id in self.win.papers_discussed:
+            self.win._save_note(self.paper)
+
+    def _on_up(self, event) -> None:
+        if self.win.today_feedback.get(self.paper_id) is None:
+            self.win._on_thumbs_up(self.paper, self.up_btn, self.down_btn)
+
+    def _on_down(self, event) -> None:
+        if self.win.today_feedback.get(self.paper_id) is None:
+            self.win._on_thumbs_down(self.paper, self.up_btn, self.down_btn)
+
+
+class BookmarkCard(Card):
+    """收藏卡片，data 为收藏记录"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.win = win
+        self.bookmark: Dict = {}
+        bg = COLORS['bg_card']
+        self.frame.config(bg=bg, highlightbackground=COLORS['border_card'], highlightthickness=1)
+
+        card_inner = tk.Frame(self.frame, bg=bg)
+        card_inner.pack(fill='x', padx=12, pady=10)
+
+        # 星级 + 标签
+        top_row = tk.Frame(card_inner, bg=bg)
+        top_row.pack(fill='x')
+        self.stars_label = tk.Label(top_row, font=FONTS['body'], fg=COLORS['star'], bg=bg)
+        self.stars_label.pack(side='left')
+        self.tag_labels = [tk.Label(top_row, font=FONTS['tag'], fg=COLORS['tag_text'],
+                                    bg=COLORS['tag_bg'], padx=4, pady=1) for _ in range(2)]
+
+        # 标题（使用中文标题如果有的话）
+        self.title_label = tk.Label(card_inner, font=FONTS['paper_title'],
+                                    fg=COLORS['text_link'], bg=bg, anchor='w',
+                                    wraplength=CARD_WIDTH - 50, justify='left')
+        self.title_label.pack(fill='x', pady=(5, 0))
+        self.title_label.bind('<Button-1>', self._on_open)
+
+        # 收藏日期、点评
+        self.date_label = tk.Label(card_inner, font=FONTS['small'],
+                                   fg=COLORS['text_secondary'], bg=bg, anchor='w')
+        self.comment_label = tk.Label(card_inner, font=FONTS['small'],
+                                      fg=COLORS['text_secondary'], bg=bg, anchor='w',
+                                      wraplength=CARD_WIDTH - 60, justify='left')
+
+        # 按钮区
+        self.btn_frame = tk.Frame(card_inner, bg=bg)
+        self.btn_frame.pack(fill='x', pady=(8, 0))
+        self.open_btn = tk.Label(self.btn_frame, text='打开原文', font=FONTS['small'],
+                                 fg=COLORS['btn_send_text'], bg=COLORS['btn_send'],
+                                 padx=8, pady=3, cursor='hand2')
+        self.open_btn.bind('<Button-1>', self._on_open)
+        self.delete_btn = tk.Label(self.btn_frame, text='取消收藏', font=FONTS['small'],
+                                   fg=COLORS['btn_send_text'], bg=COLORS['thumbs_down'],
+                                   padx=8, pady=3, cursor='hand2')
+        self.delete_btn.bind('<Button-1>', lambda e: win._remove_bookmark(self.bookmark))
+
+        win._bind_wheel(self.frame)
+
+    def bind(self, bookmark: Dict) -> None:
+        self.bookmark = bookmark
+
+        score = bookmark.get('interest_score', 3)
+        self.stars_label.config(text='★' * score + '☆' * (5 - score))
+        tags = bookmark.get('tags', [])[:2]
+        for i, label in enumerate(self.tag_labels):
+            label.pack_forget()
+            if i < len(tags):
+                label.config(text=tags[i])
+                label.pack(side='left', padx=(6, 0))
+
+        title = bookmark.get('title_cn') or bookmark.get('title', 'Untitled')
+        url = bookmark.get('url', '')
+        self.title_label.config(text=title[:45] + '...' if len(title) > 45 else title,
+                                cursor='hand2' if url else 'arrow')
+
+        self.date_label.pack_forget()
+        self.comment_label.pack_forget()
+        date_str = ''
+        bookmarked_at = bookmark.get('bookmarked_at', '')
+        if bookmarked_at:
+            try:
+                date_str = datetime.fromisoformat(bookmarked_at).strftime('%Y-%m-%d')
+            except:
+                date_str = ''
+        if date_str:
+            self.date_label.config(text=f'收藏于 {date_str}')
+            self.date_label.pack(fill='x', pady=(2, 0), before=self.btn_frame)
+
+        comment = bookmark.get('comment', '')
+        if comment:
+            comment_display = comment[:60] + '...' if len(comment) > 60 else comment
+            self.comment_label.config(text=f'💬 {comment_display}')
+            self.comment_label.pack(fill='x', pady=(4, 0), before=self.btn_frame)
+
+        self.open_btn.pack_forget()
+        self.delete_btn.pack_forget()
+        if url:
+            self.open_btn.pack(side='left', padx=(0, 5))
+        self.delete_btn.pack(side='left')
+
+    def _on_open(self, event) -> None:
+        url = self.bookmark.get('url', '')
+        if url:
+            self.win._open_link(url)
+
+
+class NoteCard(Card):
+    """笔记卡片，data 为笔记信息"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.win = win
+        self.note: Dict = {}
+        bg = COLORS['bg_card']
+        self.frame.config(bg=bg, highlightbackground=COLORS['border_card'], highlightthickness=1)
+
+        card_inner = tk.Frame(self.frame, bg=bg)
+        card_inner.pack(fill='x', padx=12, pady=10)
+
+        self.title_label = tk.Label(card_inner, font=FONTS['paper_title'],
+                                    fg=COLORS['text_link'], bg=bg, anchor='w', cursor='hand2')
+        self.title_label.pack(fill='x')
+        self.title_label.bind('<Button-1>', lambda e: win._show_note_detail(self.note))
+
+        self.date_label = tk.Label(card_inner, font=FONTS['small'],
+                                   fg=COLORS['text_secondary'], bg=bg, anchor='w')
+        self.date_label.pack(fill='x')
+
+        self.preview_label = tk.Label(card_inner, font=FONTS['small'],
+                                      fg=COLORS['text_secondary'], bg=bg, anchor='w')
+
+        win._bind_wheel(self.frame)
+
+    def bind(self, note: Dict) -> None:
+        self.note = note
+        title_text = note['title'][:40] + '...' if len(note['title']) > 40 else note['title']
+        self.title_label.config(text=f"📄 {title_text}")
+        self.date_label.config(text=note['date'])
+        self.preview_label.pack_forget()
+        if note.get('preview'):
+            self.preview_label.config(text=note['preview'])
+            self.preview_label.pack(fill='x', pady=(2, 0))
+
+
+class MessageCard(Card):
+    """聊天消息，data 为 {'text': ...}"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget, is_user: bool):
+        super().__init__(parent)
+        self.frame.config(bg=COLORS['bg_main'])
+
+        if is_user:
+            self.bubble = tk.Label(self.frame, font=FONTS['body'],
+                                   fg=COLORS['text_primary'], bg=COLORS['user_bubble'],
+                                   wraplength=CARD_WIDTH - 60, justify='left', padx=12, pady=8)
+            self.bubble.pack(side='right')
+        else:
+            avatar_canvas = tk.Canvas(self.frame, width=20, height=14,
+                                      bg=COLORS['bg_main'], highlightthickness=0)
+            avatar_canvas.pack(side='left', anchor='n', padx=(0, 8), pady=4)
+            win._draw_pet_emoji(avatar_canvas, 'idle', pixel_size=2)
+
+            self.bubble = tk.Label(self.frame, font=FONTS['body'],
+                                   fg=COLORS['text_primary'], bg=COLORS['bg_card'],
+                                   wraplength=CARD_WIDTH - 60, justify='left', padx=12, pady=8,
+                                   highlightbackground=COLORS['border_card'],
+                                   highlightthickness=1)
+            self.bubble.pack(side='left')
+
+        win._bind_wheel(self.frame)
+
+    def bind(self, message: Dict) -> None:
+        self.bubble.config(text=message['text'])
+
+
+class SearchResultCard(Card):
+    """搜索结果，data 为 SearchIndex.search 返回的一条"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.win = win
+        self.result: Dict = {}
+        bg = COLORS['bg_card']
+        self.frame.config(bg=bg, highlightbackground=COLORS['border_card'], highlightthickness=1)
+
+        card_inner = tk.Frame(self.frame, bg=bg)
+        card_inner.pack(fill='x', padx=12, pady=8)
+
+        # 类型 + 日期
+        top_row = tk.Frame(card_inner, bg=bg)
+        top_row.pack(fill='x')
+        self.kind_label = tk.Label(top_row, font=FONTS['tag'], fg=COLORS['tag_text'],
+                                   bg=COLORS['tag_bg'], padx=4, pady=1)
+        self.kind_label.pack(side='left')
+        self.date_label = tk.Label(top_row, font=FONTS['small'],
+                                   fg=COLORS['text_secondary'], bg=bg)
+        self.date_label.pack(side='left', padx=(6, 0))
+
+        self.title_label = tk.Label(card_inner, font=FONTS['paper_title'],
+                                    fg=COLORS['text_link'], bg=bg, anchor='w',
+                                    wraplength=CARD_WIDTH - 50, justify='left')
+        self.title_label.pack(fill='x', pady=(4, 0))
+        self.title_label.bind('<Button-1>', lambda e: win._open_search_result(self.result))
+
+        self.snippet_label = tk.Label(card_inner, font=FONTS['small'],
+                                      fg=COLORS['text_secondary'], bg=bg, anchor='w',
+                                      wraplength=CARD_WIDTH - 50, justify='left')
+        self.snippet_label.pack(fill='x', pady=(2, 0))
+
+        win._bind_wheel(self.frame)
+
+    def bind(self, result: Dict) -> None:
+        self.result = result
+        self.kind_label.config(text=KIND_LABELS.get(result['kind'], result['kind']))
+        self.date_label.config(text=result.get('date', ''))
+        title = result.get('title') or 'Untitled'
+        clickable = result['kind'] == 'note' or result.get('url')
+        self.title_label.config(text=title[:45] + '...' if len(title) > 45 else title,
+                                cursor='hand2' if clickable else 'arrow')
+        self.snippet_label.config(text=result.get('snippet', ''))
+
+
+class EmptyCard(Card):
+    """空状态，data 为 (图标, 标题, 提示)"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.frame.config(bg=COLORS['bg_main'])
+        self.icon_label = tk.Label(self.frame, font=('Helvetica', 40), bg=COLORS['bg_main'])
+        self.icon_label.pack(pady=(50, 0))
+        self.title_label = tk.Label(self.frame, font=FONTS['title'],
+                                    fg=COLORS['text_secondary'], bg=COLORS['bg_main'])
+        self.title_label.pack(pady=10)
+        self.hint_label = tk.Label(self.frame, font=FONTS['body'],
+                                   fg=COLORS['text_secondary'], bg=COLORS['bg_main'])
+        self.hint_label.pack(pady=(0, 50))
+
+    def bind(self, data) -> None:
+        icon, title, hint = data
+        self.icon_label.config(text=icon)
+        self.title_label.config(text=title)
+        self.hint_label.config(text=hint)
+
+
+class NoteDetailCard(Card):
+    """笔记详情，data 为笔记信息"""
+
+    def __init__(self, win: 'PaperChatWindow', parent: tk.Widget):
+        super().__init__(parent)
+        self.win = win
+        self.note: Dict = {}
+        self.frame.config(bg=COLORS['bg_main'])
+
+        # 返回按钮
+        back_frame = tk.Frame(self.frame, bg=COLORS['bg_main'])
+        back_frame.pack(fill='x', pady=(0, 5))
+        back_btn = tk.Label(back_frame, text='← 返回列表', font=FONTS['body'],
+                            fg=COLORS['text_link'], bg=COLORS['bg_main'], cursor='hand2')
+        back_btn.pack(side='left')
+        back_btn.bind('<Button-1>', lambda e: win._show_notebook_view())
+
+        # 笔记内容卡片
+        content_card = tk.Frame(self.frame, bg=COLORS['bg_card'],
+                                highlightbackground=COLORS['border_card'], highlightthickness=1)
+        content_card.pack(fill='both', expand=True)
+        content_inner = tk.Frame(content_card, bg=COLORS['bg_card'])
+        content_inner.pack(fill='both', expand=True, padx=12, pady=10)
+
+        self.content_label = tk.Label(content_inner, font=FONTS['body'],
+                                      fg=COLORS['text_primary'], bg=COLORS['bg_card'],
+                                      wraplength=CARD_WIDTH - 40, justify='left', anchor='nw')
+        self.content_label.pack(fill='both', expand=True)
+
+        # 按钮区
+        btn_frame = tk.Frame(content_inner, bg=COLORS['bg_card'])
+        btn_frame.pack(fill='x', pady=(10, 0))
+        self.open_btn = tk.Label(btn_frame, text='打开原文', font=FONTS['small'],
+                                 fg=COLORS['btn_send_text'], bg=COLORS['btn_send'],
+                                 padx=8, pady=4, cursor='hand2')
+        self.open_btn.bind('<Button-1>', lambda e: win._open_link(self.note.get('url', '')))
+        self.finder_btn = tk.Label(btn_frame, text='在Finder中显示', font=FONTS['small'],
+                                   fg=COLORS['btn_send_text'], bg=COLORS['note_btn'],
+                                   padx=8, pady=4, cursor='hand2')
+        self.finder_btn.bind('<Button-1>', lambda e: win._open_in_finder(self.note['filepath']))
+        self.delete_btn = tk.Label(btn_frame, text='删除', font=FONTS['small'],
+                                   fg=COLORS['btn_send_text'], bg=COLORS['thumbs_down'],
+                                   padx=8, pady=4, cursor='hand2')
+        self.delete_btn.bind('<Button-1>', lambda e: win._delete_note(self.note))
+
+        win._bind_wheel(self.frame)
+
+    def bind(self, note: Dict) -> None:
+        self.note = note
+        self.content_label.config(text=note['content'])
+        for btn in (self.open_btn, self.finder_btn, self.delete_btn):
+            btn.pack_forget()
+        if note.get('url'):
+            self.open_btn.pack(side='left', padx=(0, 5))
+        self.finder_btn.pack(side='left', padx=(0, 5))
+        self.delete_btn.pack(side='left')
+
+
 class PaperChatWindow:
     """学术日报聊天窗口"""
 
@@ -222,12 +636,15 @@ class PaperChatWindow:
         self.summarizer = PaperSummarizer()
         self.taste_profile = TasteProfile()
         self.bookmark_manager = BookmarkManager()
+        self.note_catalog = NoteCatalog()
+        self.archive = get_archive()
         self.window = None
         self.placeholder_text = '想聊聊哪篇？'
         self._drag_data = {'x': 0, 'y': 0}
 
         # 聊天记录
         self.today = datetime.now().strftime('%Y-%m-%d')
+        self.view_date = self.today   # 正在查看哪天的论文
         self.history_data = self._load_history()
         self.today_conversations = self.history_data.get(self.today, {}).get('conversations', [])
         self.today_feedback = self.history_data.get(self.today, {}).get('feedback', {})
@@ -241,7 +658,10 @@ class PaperChatWindow:
         # 笔记本视图状态
         self.showing_notebook = False
         self.showing_bookmarks = False
+        self.showing_search = False
         self.notebook_content_frame = None
+        self._thinking_message = None
+        self._search_job = None
 
     def show(self):
         """显示窗口"""
@@ -271,6 +691,7 @@ class PaperChatWindow:
         self._load_today_conversations()
         self._position_window()
         self.window.after(100, self._fix_focus)
+        self._ensure_search_index()
 
     # ===== 历史记录管理 =====
 
@@ -323,13 +744,18 @@ class PaperChatWindow:
     def _save_conversation(self, user_msg: str, ai_response: str):
         """保存单条对话（每次对话后立即保存）"""
         now = datetime.now().strftime('%H:%M:%S')
-        self.today_conversations.append({
+        conv = {
             'time': now,
             'user': user_msg,
             'assistant': ai_response
-        })
+        }
+        self.today_conversations.append(conv)
         self._save_history()
 
+        index = get_search_index()
+        if index:
+            index.index_conversation(self.today, len(self.today_conversations) - 1, conv)
+
     def _load_today_conversations(self):
         """加载并显示今天的历史对话"""
         if self.today_conversations:
@@ -420,11 +846,21 @@ class PaperChatWindow:
         self.title_label.bind('<ButtonPress-1>', self._start_drag)
         self.title_label.bind('<B1-Motion>', self._on_drag)
 
-        # 日期
-        date_label = tk.Label(top_row, text=f'  {self.today}',
-                             font=FONTS['small'], fg=COLORS['text_secondary'],
-                             bg=COLORS['bg_main'])
-        date_label.pack(side='left')
+        # 日期（◀ ▶ 翻看往日论文）
+        prev_day_btn = tk.Label(top_row, text='◀', font=FONTS['small'],
+                                fg=COLORS['text_secondary'], bg=COLORS['bg_main'], cursor='hand2')
+        prev_day_btn.pack(side='left', padx=(8, 0))
+        prev_day_btn.bind('<Button-1>', lambda e: self._page_day(-1))
+
+        self.date_label = tk.Label(top_row, text=self.today,
+                                   font=FONTS['small'], fg=COLORS['text_secondary'],
+                                   bg=COLORS['bg_main'])
+        self.date_label.pack(side='left', padx=2)
+
+        next_day_btn = tk.Label(top_row, text='▶', font=FONTS['small'],
+                                fg=COLORS['text_secondary'], bg=COLORS['bg_main'], cursor='hand2')
+        next_day_btn.pack(side='left')
+        next_day_btn.bind('<Button-1>', lambda e: self._page_day(1))
 
         # 关闭按钮
         close_btn = tk.Label(top_row, text='✕', font=('Helvetica', 14, 'bold'),
@@ -442,6 +878,14 @@ class PaperChatWindow:
         notebook_btn.bind('<Enter>', lambda e: e.widget.config(fg=COLORS['border_outer']))
         notebook_btn.bind('<Leave>', lambda e: e.widget.config(fg=COLORS['note_btn']))
 
+        # 搜索按钮
+        search_btn = tk.Label(top_row, text='🔍', font=FONTS['title'],
+                             fg=COLORS['note_btn'], bg=COLORS['bg_main'], cursor='hand2')
+        search_btn.pack(side='right', padx=5)
+        search_btn.bind('<Button-1>', lambda e: self._toggle_search())
+        search_btn.bind('<Enter>', lambda e: e.widget.config(fg=COLORS['border_outer']))
+        search_btn.bind('<Leave>', lambda e: e.widget.config(fg=COLORS['note_btn']))
+
         # 收藏列表按钮
         bookmark_btn = tk.Label(top_row, text='📚', font=FONTS['title'],
                                fg=COLORS['note_btn'], bg=COLORS['bg_main'], cursor='hand2')
@@ -463,8 +907,21 @@ class PaperChatWindow:
 
     def _build_content_area(self, parent):
         """构建可滚动内容区"""
+        # 搜索框（只在搜索视图显示）
+        self.search_frame = tk.Frame(parent, bg=COLORS['bg_main'])
+        self.search_entry = tk.Entry(self.search_frame, font=FONTS['input'],
+                                     bg=COLORS['bg_input'], fg=COLORS['text_primary'],
+                                     insertbackground=COLORS['text_primary'], relief='flat',
+                                     highlightthickness=2, highlightbackground=COLORS['border_card'],
+                                     highlightcolor=COLORS['border_inner'])
+        self.search_entry.pack(fill='x', ipady=4)
+        self.search_entry.bind('<KeyRelease>', self._on_search_key)
+        self.search_entry.bind('<Return>', lambda e: self._run_search())
+        self.search_entry.bind('<Escape>', lambda e: self._show_papers_view())
+
         content_container = tk.Frame(parent, bg=COLORS['bg_main'])
         content_container.pack(fill='both', expand=True, padx=5)
+        self.content_container = content_container
 
         self.canvas = tk.Canvas(content_container, bg=COLORS['bg_main'], highlightthickness=0)
 
@@ -480,18 +937,22 @@ class PaperChatWindow:
                                   command=self.canvas.yview,
                                   style='Custom.Vertical.TScrollbar')
 
-        self.content_frame = tk.Frame(self.canvas, bg=COLORS['bg_main'])
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
         scrollbar.pack(side='right', fill='y')
         self.canvas.pack(side='left', fill='both', expand=True)
 
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.content_frame, anchor='nw')
+        # 虚拟列表：只为可见区域创建卡片，滚动时回收复用
+        self.card_list = VirtualList(self.canvas, {
+            'paper': lambda parent: PaperCard(self, parent),
+            'bookmark': lambda parent: BookmarkCard(self, parent),
+            'note': lambda parent: NoteCard(self, parent),
+            'user_message': lambda parent: MessageCard(self, parent, is_user=True),
+            'pet_message': lambda parent: MessageCard(self, parent, is_user=False),
+            'empty': lambda parent: EmptyCard(self, parent),
+            'note_detail': lambda parent: NoteDetailCard(self, parent),
+            'search_result': lambda parent: SearchResultCard(self, parent),
+        }, on_yscroll=scrollbar.set, estimates=CARD_ESTIMATES)
 
-        self.content_frame.bind('<Configure>', self._on_frame_configure)
-        self.canvas.bind('<Configure>', self._on_canvas_configure)
         self.canvas.bind('<MouseWheel>', self._on_mousewheel)
-        self.content_frame.bind('<MouseWheel>', self._on_mousewheel)
 
     def _build_input_area(self, parent):
         """构建输入区"""
@@ -574,150 +1035,30 @@ class PaperChatWindow:
     def _populate_papers(self):
         """填充论文卡片"""
         if not self.papers:
+            self.card_list.clear()
             self._add_message("今天还没有抓到论文呢...可能是网络问题", save=False)
             return
 
-        deep_read = [p for p in self.papers if p.get('deep_read')]
-        others = [p for p in self.papers if not p.get('deep_read')]
+        self.card_list.set_rows(self._paper_rows(self.papers))
 
-        for paper in deep_read:
-            self._create_paper_card(paper, is_recommended=True)
-        for paper in others:
-            self._create_paper_card(paper, is_recommended=False)
+    def _paper_rows(self, papers: List[Dict]) -> List[Row]:
+        """精读推荐在前"""
+        deep_read = [p for p in papers if p.get('deep_read')]
+        others = [p for p in papers if not p.get('deep_read')]
 
-        self.window.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+        rows = [self._paper_row(p, True) for p in deep_read]
+        rows += [self._paper_row(p, False) for p in others]
+        return rows
 
-    def _create_paper_card(self, paper: Dict, is_recommended: bool = False):
-        """创建论文卡片"""
+    def _paper_row(self, paper: Dict, is_recommended: bool) -> Row:
         paper_id = paper.get('id', paper.get('title', ''))
+        return Row('paper', (paper, is_recommended), key=f'paper:{paper_id}:{is_recommended}')
 
-        card_outer = tk.Frame(self.content_frame, bg=COLORS['bg_main'])
-        card_outer.pack(fill='x', padx=10, pady=5)
-
-        if is_recommended:
-            accent_bar = tk.Frame(card_outer, bg=COLORS['border_recommended'], width=4)
-            accent_bar.pack(side='left', fill='y')
-
-        bg_color = COLORS['bg_card_recommended'] if is_recommended else COLORS['bg_card']
-        card = tk.Frame(card_outer, bg=bg_color,
-                       highlightbackground=COLORS['border_card'], highlightthickness=1)
-        card.pack(side='left', fill='x', expand=True)
-
-        card_inner = tk.Frame(card, bg=bg_color)
-        card_inner.pack(fill='x', padx=12, pady=10)
-
-        # 精读推荐标语
-        if is_recommended:
-            rec_frame = tk.Frame(card_inner, bg=bg_color)
-            rec_frame.pack(fill='x', pady=(0, 6))
-            rec_avatar = tk.Canvas(rec_frame, width=16, height=12, bg=bg_color, highlightthickness=0)
-            rec_avatar.pack(side='left', padx=(0, 5))
-            self._draw_pet_emoji(rec_avatar, 'happy', pixel_size=2)
-            tk.Label(rec_frame, text='这篇推荐精读！', font=FONTS['body'],
-                    fg=COLORS['text_link'], bg=bg_color).pack(side='left')
-
-        # 星级 + 标签
-        top_row = tk.Frame(card_inner, bg=bg_color)
-        top_row.pack(fill='x', pady=(0, 6))
-
-        score = paper.get('interest_score', 3)
-        stars_text = '★' * score + '☆' * (5 - score)
-        tk.Label(top_row, text=stars_text, font=FONTS['body'],
-                fg=COLORS['star'], bg=bg_color).pack(side='left')
-
-        for tag in paper.get('tags', [])[:3]:
-            tk.Label(top_row, text=tag, font=FONTS['tag'],
-                    fg=COLORS['tag_text'], bg=COLORS['tag_bg'],
-                    padx=6, pady=1).pack(side='left', padx=(6, 0))
-
-        # 标题（可点击）
-        title = paper.get('title', 'Untitled')
-        url = paper.get('url', '')
-        title_label = tk.Label(card_inner, text=title, font=FONTS['paper_title'],
-                              fg=COLORS['text_link'], bg=bg_color,
-                              wraplength=CARD_WIDTH - 40, justify='left', anchor='w',
-                              cursor='hand2' if url else 'arrow')
-        title_label.pack(fill='x', pady=(0, 8))
-
-        if url:
-            title_label.bind('<Button-1>', lambda e, u=url: self._open_link(u))
-            title_label.bind('<Enter>', lambda e: e.widget.config(font=FONTS['paper_title'] + ('underline',)))
-            title_label.bind('<Leave>', lambda e: e.widget.config(font=FONTS['paper_title']))
-
-        # 点评
-        comment = paper.get('comment', '')
-        if comment:
-            comment_frame = tk.Frame(card_inner, bg=bg_color)
-            comment_frame.pack(fill='x', pady=(0, 6))
-
-            emotion = self._get_emotion_for_score(score)
-            emoji_canvas = tk.Canvas(comment_frame, width=20, height=14,
-                                    bg=bg_color, highlightthickness=0)
-            emoji_canvas.pack(side='left', anchor='n', padx=(0, 6), pady=2)
-            self._draw_pet_emoji(emoji_canvas, emotion, pixel_size=2)
-
-            tk.Label(comment_frame, text=comment, font=FONTS['comment'],
-                    fg=COLORS['text_secondary'], bg=bg_color,
-                    wraplength=CARD_WIDTH - 70, justify='left', anchor='w'
-                    ).pack(side='left', fill='x', expand=True)
-
-        # 按钮区
-        btn_row = tk.Frame(card_inner, bg=bg_color)
-        btn_row.pack(fill='x')
-
-        # 检查是否讨论过这篇论文
-        discussed = paper_id in self.papers_discussed
-
-        # ☆ 收藏按钮
-        is_bookmarked = self.bookmark_manager.is_bookmarked(paper_id)
-        bookmark_text = '★' if is_bookmarked else '☆'
-        bookmark_color = COLORS['star'] if is_bookmarked else COLORS['star_empty']
-        bookmark_btn = tk.Label(btn_row, text=bookmark_text, font=FONTS['body'],
-                               fg=bookmark_color, bg=bg_color, cursor='hand2')
-        bookmark_btn.pack(side='right', padx=2)
-        bookmark_btn.bind('<Button-1>', lambda e, p=paper, b=bookmark_btn:
-                         self._toggle_bookmark(p, b))
-
-        # 📝 笔记按钮
-        note_btn = tk.Label(btn_row, text='📝', font=FONTS['small'],
-                           fg=COLORS['note_btn'] if discussed else COLORS['btn_disabled'],
-                           bg=bg_color, cursor='hand2' if discussed else 'arrow')
-        note_btn.pack(side='right', padx=2)
-        if discussed:
-            note_btn.bind('<Button-1>', lambda e, p=paper: self._save_note(p))
-
-        # 复制按钮
-        copy_btn = tk.Label(btn_row, text='📋', font=FONTS['small'],
-                           fg=COLORS['copy_btn'], bg=bg_color, cursor='hand2')
-        copy_btn.pack(side='right', padx=2)
-        copy_btn.bind('<Button-1>', lambda e, p=paper, b=copy_btn: self._copy_paper(p, b))
-
-        # 👎 按钮
-        feedback = self.today_feedback.get(paper_id)
-        down_color = COLORS['thumbs_down'] if feedback == 'down' else COLORS['btn_disabled']
-        down_btn = tk.Label(btn_row, text='👎', font=FONTS['small'],
-                           fg=down_color, bg=bg_color,
-                           cursor='hand2' if feedback != 'up' else 'arrow')
-        down_btn.pack(side='right', padx=2)
-
-        # 👍 按钮
-        up_color = COLORS['thumbs_up'] if feedback == 'up' else COLORS['btn_disabled']
-        up_btn = tk.Label(btn_row, text='👍', font=FONTS['small'],
-                         fg=up_color, bg=bg_color,
-                         cursor='hand2' if feedback != 'down' else 'arrow')
-        up_btn.pack(side='right', padx=2)
-
-        # 绑定反馈事件
-        if feedback is None:
-            up_btn.bind('<Button-1>', lambda e, p=paper, ub=up_btn, db=down_btn:
-                       self._on_thumbs_up(p, ub, db))
-            down_btn.bind('<Button-1>', lambda e, p=paper, ub=up_btn, db=down_btn:
-                         self._on_thumbs_down(p, ub, db))
-
-        # 绑定滚轮
-        for w in [card, card_inner, title_label]:
-            w.bind('<MouseWheel>', self._on_mousewheel)
+    def _bind_wheel(self, widget: tk.Widget):
+        """卡片及其子控件都转发滚轮"""
+        widget.bind('<MouseWheel>', self._on_mousewheel)
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
 
     # ===== 反馈功能 =====
 
@@ -728,6 +1069,7 @@ class PaperChatWindow:
         # 更新品味档案
         for tag in paper.get('tags', []):
             self.taste_profile.boost_tag(tag, amount=0.5)
+        self.taste_profile.record_feedback(paper, liked=True)
         self.taste_profile.save()
 
         # 更新反馈记录
@@ -739,14 +1081,10 @@ class PaperChatWindow:
             self.save_manager.add_trust(0.25, 'paper')
             self.save_manager.save()
 
-        # 更新UI
+        # 更新UI（卡片会回收复用，不解绑事件，点击时按反馈记录判断）
         up_btn.config(fg=COLORS['thumbs_up'], cursor='arrow')
         down_btn.config(fg=COLORS['btn_disabled'], cursor='arrow')
 
-        # 解绑事件
-        up_btn.unbind('<Button-1>')
-        down_btn.unbind('<Button-1>')
-
         self._show_toast("已记住你喜欢这类论文~")
 
     def _on_thumbs_down(self, paper: Dict, up_btn: tk.Label, down_btn: tk.Label):
@@ -755,6 +1093,7 @@ class PaperChatWindow:
 
         for tag in paper.get('tags', []):
             self.taste_profile.reduce_tag(tag, amount=0.3)
+        self.taste_profile.record_feedback(paper, liked=False)
         self.taste_profile.save()
 
         self.today_feedback[paper_id] = 'down'
@@ -763,9 +1102,6 @@ class PaperChatWindow:
         down_btn.config(fg=COLORS['thumbs_down'], cursor='arrow')
         up_btn.config(fg=COLORS['btn_disabled'], cursor='arrow')
 
-        up_btn.unbind('<Button-1>')
-        down_btn.unbind('<Button-1>')
-
         self._show_toast("下次少推这类了")
 
     def _show_toast(self, message: str):
@@ -789,34 +1125,12 @@ class PaperChatWindow:
 
     # ===== 聊天功能 =====
 
-    def _add_message(self, text: str, is_user: bool = False, save: bool = True):
+    def _add_message(self, text: str, is_user: bool = False, save: bool = True) -> Dict:
         """添加聊天消息"""
-        msg_frame = tk.Frame(self.content_frame, bg=COLORS['bg_main'])
-        msg_frame.pack(fill='x', padx=10, pady=5)
-
-        if is_user:
-            bubble = tk.Label(msg_frame, text=text, font=FONTS['body'],
-                             fg=COLORS['text_primary'], bg=COLORS['user_bubble'],
-                             wraplength=CARD_WIDTH - 60, justify='left', padx=12, pady=8)
-            bubble.pack(side='right')
-        else:
-            avatar_canvas = tk.Canvas(msg_frame, width=20, height=14,
-                                     bg=COLORS['bg_main'], highlightthickness=0)
-            avatar_canvas.pack(side='left', anchor='n', padx=(0, 8), pady=4)
-            self._draw_pet_emoji(avatar_canvas, 'idle', pixel_size=2)
-
-            bubble = tk.Label(msg_frame, text=text, font=FONTS['body'],
-                             fg=COLORS['text_primary'], bg=COLORS['bg_card'],
-                             wraplength=CARD_WIDTH - 60, justify='left', padx=12, pady=8,
-                             highlightbackground=COLORS['border_card'], highlightthickness=1)
-            bubble.pack(side='left')
-
-        msg_frame.bind('<MouseWheel>', self._on_mousewheel)
-        bubble.bind('<MouseWheel>', self._on_mousewheel)
-
-        self.window.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
-        self.canvas.yview_moveto(1.0)
+        message = {'text': text}
+        self.card_list.append(Row('user_message' if is_user else 'pet_message', message))
+        self.card_list.scroll_to_end()
+        return message
 
     def _on_send(self, event=None):
         """发送消息"""
@@ -828,16 +1142,15 @@ class PaperChatWindow:
         self._add_message(user_input, is_user=True, save=False)
 
         self.placeholder_text = '继续问？'
-        self._add_message("让我想想...", is_user=False, save=False)
+        self._thinking_message = self._add_message("让我想想...", is_user=False, save=False)
 
-        def get_response():
-            # 带上历史context
-            response = self._chat_with_context(user_input)
-            self.window.after(0, lambda: self._show_response(user_input, response))
+        # 带上历史context；窗口关掉时取消
+        get_bridge(self.parent).submit(
+            self._chat_with_context(user_input),
+            on_done=lambda response: self._show_response(user_input, response),
+            owner=self)
 
-        threading.Thread(target=get_response, daemon=True).start()
-
-    def _chat_with_context(self, user_question: str) -> str:
+    async def _chat_with_context(self, user_question: str) -> str:
         """带历史context的聊天"""
         # 构建历史消息（最多5轮）
         history = []
@@ -848,17 +1161,14 @@ class PaperChatWindow:
             history.append({'role': 'user', 'content': user_msg})
             history.append({'role': 'assistant', 'content': ai_msg})
 
-        return self.summarizer.chat(user_question, self.papers, history)
+        return await self.summarizer.achat(user_question, self.papers, history, owner=self)
 
     def _show_response(self, user_msg: str, response: str):
         """显示AI回复"""
         # 移除"让我想想..."
-        for widget in self.content_frame.winfo_children():
-            if isinstance(widget, tk.Frame):
-                for child in widget.winfo_children():
-                    if isinstance(child, tk.Label) and child.cget('text') == '让我想想...':
-                        widget.destroy()
-                        break
+        if self._thinking_message is not None:
+            self.card_list.remove(self._thinking_message)
+            self._thinking_message = None
 
         self._add_message(response, is_user=False, save=False)
 
@@ -870,6 +1180,43 @@ class PaperChatWindow:
         # 用户只要提问了，就可以为任意论文生成笔记
         for paper in self.papers:
             self.papers_discussed.add(paper.get('id', paper.get('title', '')))
+        self.card_list.rebind_visible()
+
+    # ===== 往日论文 =====
+
+    def _page_day(self, step: int):
+        """翻到前一天（step=-1）或后一天（step=1）的论文"""
+        if step < 0:
+            date = self.archive.previous_date(self.view_date)
+            if date is None:
+                self._show_toast("没有更早的论文了")
+                return
+        else:
+            date = self.archive.next_date(self.view_date)
+            if date is None or date >= self.today:
+                if self.view_date != self.today:
+                    self._show_papers_view()
+                return
+        self._show_day(date)
+
+    def _show_day(self, date: str):
+        """显示归档里某一天的论文（只读，不重新抓取或总结）"""
+        papers = self.archive.load_day(date)
+        self.showing_notebook = False
+        self.showing_bookmarks = False
+        self._hide_search_bar()
+        self.view_date = date
+        self.date_label.config(text=date)
+        self.title_label.config(text='往日论文')
+        self.greeting_label.config(text=f'这天读了 {len(papers)} 篇，点 ▶ 回到后一天')
+
+        # 聊天只针对今天的论文，隐藏输入区
+        self.input_container.pack_forget()
+
+        if papers:
+            self.card_list.set_rows(self._paper_rows(papers))
+        else:
+            self.card_list.set_rows([Row('empty', ('📰', '这天没有论文', ''))])
 
     # ===== 笔记功能 =====
 
@@ -894,16 +1241,15 @@ class PaperChatWindow:
         # 生成笔记内容
         self._show_toast("正在生成笔记...")
 
-        def generate_and_save():
-            try:
-                # 构建对话文本
-                conv_text = '\n'.join([
-                    f"> 用户：{c['user']}\n> 小铁皮：{c['assistant']}"
-                    for c in related_convs
-                ])
+        async def generate_and_save():
+            # 构建对话文本
+            conv_text = '\n'.join([
+                f"> 用户：{c['user']}\n> 小铁皮：{c['assistant']}"
+                for c in related_convs
+            ])
 
-                # 调用AI生成总结
-                summary_prompt = f"""请根据以下对话，提取关于这篇论文的讨论要点。
+            # 调用AI生成总结
+            summary_prompt = f"""请根据以下对话，提取关于这篇论文的讨论要点。
 
 论文标题：{title}
 
@@ -916,10 +1262,14 @@ class PaperChatWindow:
 
 用中文，3-6个要点就够，不要太长。只输出要点，不要其他内容。"""
 
-                summary = self.summarizer.chat(summary_prompt, [], [])
+            # 笔记额度用完就只存原始对话
+            if await asyncio.to_thread(get_meter().over_budget, FEATURE_NOTE):
+                summary = "（今天的 AI 额度用完了，没有生成要点，见下方原始对话）"
+            else:
+                summary = await self.summarizer.achat(summary_prompt, [], [], feature=FEATURE_NOTE)
 
-                # 生成笔记内容
-                note_content = f"""# {title}
+            # 生成笔记内容
+            note_content = f"""# {title}
 
 论文链接: {url}
 讨论日期: {self.today}
@@ -933,24 +1283,39 @@ class PaperChatWindow:
 {conv_text}
 """
 
-                # 保存文件
-                NOTES_DIR.mkdir(parents=True, exist_ok=True)
+            # 写文件和更新索引放到线程池
+            await asyncio.to_thread(self._write_note, title, url, note_content)
 
-                # 生成文件名
-                safe_title = re.sub(r'[^a-zA-Z0-9\s]', '', title)[:50].strip()
-                safe_title = safe_title.replace(' ', '_').lower()
-                filename = f"{safe_title}_{self.today}.txt"
-                filepath = NOTES_DIR / filename
+        def on_done(_):
+            if self.window:
+                self._show_toast("笔记已保存~ 📝")
 
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(note_content)
+        def on_error(e):
+            if self.window:
+                self._show_toast(f"保存失败: {e}")
 
-                self.window.after(0, lambda: self._show_toast(f"笔记已保存~ 📝"))
+        # 不绑定窗口：窗口关掉了笔记也照样存完
+        get_bridge(self.parent).submit(generate_and_save(), on_done=on_done, on_error=on_error)
 
-            except Exception as e:
-                self.window.after(0, lambda: self._show_toast(f"保存失败: {e}"))
+    def _write_note(self, title: str, url: str, note_content: str):
+        """写入笔记文件并加进全文索引（在线程池里执行）"""
+        # 保存文件
+        NOTES_DIR.mkdir(parents=True, exist_ok=True)
+
+        # 生成文件名
+        safe_title = re.sub(r'[^a-zA-Z0-9\s]', '', title)[:50].strip()
+        safe_title = safe_title.replace(' ', '_').lower()
+        filename = f"{safe_title}_{self.today}.txt"
+        filepath = NOTES_DIR / filename
 
-        threading.Thread(target=generate_and_save, daemon=True).start()
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(note_content)
+
+        index = get_search_index()
+        if index:
+            index.index_note({'filepath': str(filepath), 'title': title,
+                              'date': self.today, 'url': url,
+                              'content': note_content})
 
     # ===== 笔记本查看器 =====
 
@@ -967,177 +1332,55 @@ class PaperChatWindow:
         """显示笔记本视图"""
         self.showing_notebook = True
         self.showing_bookmarks = False
+        self._hide_search_bar()
         self.title_label.config(text='论文笔记')
         self.greeting_label.config(text='')
 
         # 隐藏输入区
         self.input_container.pack_forget()
 
-        # 清空内容区
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
         # 加载笔记
         notes = self._load_notes()
 
         if not notes:
             # 空状态
-            empty_frame = tk.Frame(self.content_frame, bg=COLORS['bg_main'])
-            empty_frame.pack(fill='both', expand=True, pady=50)
-
-            tk.Label(empty_frame, text='📝', font=('Helvetica', 40),
-                    bg=COLORS['bg_main']).pack()
-            tk.Label(empty_frame, text='还没有笔记哦~',
-                    font=FONTS['title'], fg=COLORS['text_secondary'],
-                    bg=COLORS['bg_main']).pack(pady=10)
-            tk.Label(empty_frame, text='和我聊聊论文，然后点 📝 保存吧',
-                    font=FONTS['body'], fg=COLORS['text_secondary'],
-                    bg=COLORS['bg_main']).pack()
+            self.card_list.set_rows([Row('empty', ('📝', '还没有笔记哦~',
+                                                   '和我聊聊论文，然后点 📝 保存吧'))])
         else:
             # 显示笔记列表
-            for note in notes:
-                self._create_note_card(note)
-
-        self.window.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+            self.card_list.set_rows([Row('note', note, key=f"note:{note['filepath']}")
+                                     for note in notes])
 
     def _show_papers_view(self):
         """返回论文视图"""
         self.showing_notebook = False
         self.showing_bookmarks = False
+        self._hide_search_bar()
+        self.view_date = self.today
+        self.date_label.config(text=self.today)
         self.title_label.config(text='学术日报')
         self.greeting_label.config(text=self._get_greeting())
 
         # 显示输入区
         self.input_container.pack(fill='x', side='bottom')
 
-        # 清空并重新填充
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
+        # 重新填充
         self._populate_papers()
         self._load_today_conversations()
 
     def _load_notes(self) -> List[Dict]:
-        """加载所有笔记"""
-        notes = []
-        if not NOTES_DIR.exists():
-            return notes
-
-        for filepath in NOTES_DIR.glob('*.txt'):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # 解析标题和日期
-                lines = content.split('\n')
-                title = lines[0].lstrip('# ').strip() if lines else filepath.stem
-
-                # 从文件名提取日期
-                match = re.search(r'(\d{4}-\d{2}-\d{2})', filepath.stem)
-                date = match.group(1) if match else ''
-
-                # 提取链接
-                url = ''
-                for line in lines:
-                    if line.startswith('论文链接:'):
-                        url = line.replace('论文链接:', '').strip()
-                        break
-
-                notes.append({
-                    'filepath': str(filepath),
-                    'filename': filepath.name,
-                    'title': title,
-                    'date': date,
-                    'url': url,
-                    'content': content
-                })
-            except:
-                continue
-
-        # 按日期倒序
-        return sorted(notes, key=lambda x: x['date'], reverse=True)
-
-    def _create_note_card(self, note: Dict):
-        """创建笔记卡片"""
-        card = tk.Frame(self.content_frame, bg=COLORS['bg_card'],
-                       highlightbackground=COLORS['border_card'], highlightthickness=1)
-        card.pack(fill='x', padx=10, pady=5)
-
-        card_inner = tk.Frame(card, bg=COLORS['bg_card'])
-        card_inner.pack(fill='x', padx=12, pady=10)
-
-        # 标题
-        title_text = note['title'][:40] + '...' if len(note['title']) > 40 else note['title']
-        title_label = tk.Label(card_inner, text=f"📄 {title_text}",
-                              font=FONTS['paper_title'], fg=COLORS['text_link'],
-                              bg=COLORS['bg_card'], anchor='w', cursor='hand2')
-        title_label.pack(fill='x')
-        title_label.bind('<Button-1>', lambda e, n=note: self._show_note_detail(n))
-
-        # 日期
-        tk.Label(card_inner, text=note['date'], font=FONTS['small'],
-                fg=COLORS['text_secondary'], bg=COLORS['bg_card'],
-                anchor='w').pack(fill='x')
-
-        card.bind('<MouseWheel>', self._on_mousewheel)
+        """加载笔记列表（只有标题/日期/链接/预览，正文看详情时再读）"""
+        return self.note_catalog.list()
 
     def _show_note_detail(self, note: Dict):
         """显示笔记详情"""
-        # 清空内容区
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
-        # 返回按钮
-        back_frame = tk.Frame(self.content_frame, bg=COLORS['bg_main'])
-        back_frame.pack(fill='x', padx=10, pady=5)
-
-        back_btn = tk.Label(back_frame, text='← 返回列表', font=FONTS['body'],
-                           fg=COLORS['text_link'], bg=COLORS['bg_main'], cursor='hand2')
-        back_btn.pack(side='left')
-        back_btn.bind('<Button-1>', lambda e: self._show_notebook_view())
-
-        # 笔记内容卡片
-        content_card = tk.Frame(self.content_frame, bg=COLORS['bg_card'],
-                               highlightbackground=COLORS['border_card'], highlightthickness=1)
-        content_card.pack(fill='both', expand=True, padx=10, pady=5)
-
-        content_inner = tk.Frame(content_card, bg=COLORS['bg_card'])
-        content_inner.pack(fill='both', expand=True, padx=12, pady=10)
-
-        # 显示笔记内容
-        content_label = tk.Label(content_inner, text=note['content'],
-                                font=FONTS['body'], fg=COLORS['text_primary'],
-                                bg=COLORS['bg_card'], wraplength=CARD_WIDTH - 40,
-                                justify='left', anchor='nw')
-        content_label.pack(fill='both', expand=True)
-
-        # 按钮区
-        btn_frame = tk.Frame(content_inner, bg=COLORS['bg_card'])
-        btn_frame.pack(fill='x', pady=(10, 0))
-
-        if note.get('url'):
-            open_btn = tk.Label(btn_frame, text='打开原文', font=FONTS['small'],
-                               fg=COLORS['btn_send_text'], bg=COLORS['btn_send'],
-                               padx=8, pady=4, cursor='hand2')
-            open_btn.pack(side='left', padx=(0, 5))
-            open_btn.bind('<Button-1>', lambda e, u=note['url']: self._open_link(u))
-
-        finder_btn = tk.Label(btn_frame, text='在Finder中显示', font=FONTS['small'],
-                             fg=COLORS['btn_send_text'], bg=COLORS['note_btn'],
-                             padx=8, pady=4, cursor='hand2')
-        finder_btn.pack(side='left', padx=(0, 5))
-        finder_btn.bind('<Button-1>', lambda e, p=note['filepath']: self._open_in_finder(p))
-
-        delete_btn = tk.Label(btn_frame, text='删除', font=FONTS['small'],
-                             fg=COLORS['btn_send_text'], bg=COLORS['thumbs_down'],
-                             padx=8, pady=4, cursor='hand2')
-        delete_btn.pack(side='left')
-        delete_btn.bind('<Button-1>', lambda e, n=note: self._delete_note(n))
-
-        content_card.bind('<MouseWheel>', self._on_mousewheel)
-        self.window.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+        if 'content' not in note:
+            note = read_note(note['filepath'])
+            if note is None:
+                self._show_toast("笔记已不存在")
+                self._show_notebook_view()
+                return
+        self.card_list.set_rows([Row('note_detail', note)])
 
     def _open_in_finder(self, filepath: str):
         """在Finder中显示文件"""
@@ -1151,6 +1394,10 @@ class PaperChatWindow:
         if messagebox.askyesno('确认删除', f'确定要删除这条笔记吗？\n\n{note["title"]}'):
             try:
                 os.remove(note['filepath'])
+                self.note_catalog.forget(note['filepath'])
+                index = get_search_index()
+                if index:
+                    index.remove_note(note['filepath'])
                 self._show_toast("已删除")
                 self._show_notebook_view()
             except Exception as e:
@@ -1186,6 +1433,7 @@ class PaperChatWindow:
         """显示收藏列表视图"""
         self.showing_bookmarks = True
         self.showing_notebook = False
+        self._hide_search_bar()
 
         bookmarks = self.bookmark_manager.get_all()
         count = len(bookmarks)
@@ -1195,122 +1443,111 @@ class PaperChatWindow:
         # 隐藏输入区
         self.input_container.pack_forget()
 
-        # 清空内容区
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
         if not bookmarks:
             # 空状态
-            empty_frame = tk.Frame(self.content_frame, bg=COLORS['bg_main'])
-            empty_frame.pack(fill='both', expand=True, pady=50)
-
-            tk.Label(empty_frame, text='⭐', font=('Helvetica', 40),
-                    bg=COLORS['bg_main']).pack()
-            tk.Label(empty_frame, text='还没有收藏哦~',
-                    font=FONTS['title'], fg=COLORS['text_secondary'],
-                    bg=COLORS['bg_main']).pack(pady=10)
-            tk.Label(empty_frame, text='看到喜欢的论文，点 ☆ 收藏吧',
-                    font=FONTS['body'], fg=COLORS['text_secondary'],
-                    bg=COLORS['bg_main']).pack()
+            self.card_list.set_rows([Row('empty', ('⭐', '还没有收藏哦~',
+                                                   '看到喜欢的论文，点 ☆ 收藏吧'))])
         else:
             # 显示收藏列表
-            for bookmark in bookmarks:
-                self._create_bookmark_card(bookmark)
+            self.card_list.set_rows([Row('bookmark', b, key=f"bookmark:{b['id']}")
+                                     for b in bookmarks])
 
-        self.window.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
-
-    def _create_bookmark_card(self, bookmark: Dict):
-        """创建收藏卡片"""
-        card = tk.Frame(self.content_frame, bg=COLORS['bg_card'],
-                       highlightbackground=COLORS['border_card'], highlightthickness=1)
-        card.pack(fill='x', padx=10, pady=5)
+    def _remove_bookmark(self, bookmark: Dict):
+        """从收藏列表移除"""
+        paper_id = bookmark.get('id', '')
+        self.bookmark_manager.remove(paper_id)
+        self._show_toast("已取消收藏")
 
-        card_inner = tk.Frame(card, bg=COLORS['bg_card'])
-        card_inner.pack(fill='x', padx=12, pady=10)
+        # 只移除这一条，不重建整个列表
+        count = len(self.bookmark_manager.get_all())
+        if count:
+            self.card_list.remove(bookmark)
+            self.title_label.config(text=f'我的收藏 ({count}篇)')
+        else:
+            self._show_bookmarks_view()
 
-        # 星级
-        score = bookmark.get('interest_score', 3)
-        stars_text = '★' * score + '☆' * (5 - score)
+    # ===== 搜索 =====
 
-        top_row = tk.Frame(card_inner, bg=COLORS['bg_card'])
-        top_row.pack(fill='x')
+    def _ensure_search_index(self):
+        """第一次使用时在后台用现有文件建好索引"""
+        index = get_search_index()
+        if not index or index.is_built():
+            return
 
-        tk.Label(top_row, text=stars_text, font=FONTS['body'],
-                fg=COLORS['star'], bg=COLORS['bg_card']).pack(side='left')
+        catalog = self._load_notes()
+        bookmarks = list(self.bookmark_manager.get_all())
 
-        # 标签
-        for tag in bookmark.get('tags', [])[:2]:
-            tk.Label(top_row, text=tag, font=FONTS['tag'],
-                    fg=COLORS['tag_text'], bg=COLORS['tag_bg'],
-                    padx=4, pady=1).pack(side='left', padx=(6, 0))
+        def build():
+            notes = [read_note(n['filepath']) for n in catalog]
+            index.rebuild([n for n in notes if n], bookmarks)
 
-        # 标题（使用中文标题如果有的话）
-        title = bookmark.get('title_cn') or bookmark.get('title', 'Untitled')
-        title_display = title[:45] + '...' if len(title) > 45 else title
-        url = bookmark.get('url', '')
+        get_bridge(self.parent).run_io(build)
 
-        title_label = tk.Label(card_inner, text=title_display,
-                              font=FONTS['paper_title'], fg=COLORS['text_link'],
-                              bg=COLORS['bg_card'], anchor='w', wraplength=CARD_WIDTH - 50,
-                              justify='left', cursor='hand2' if url else 'arrow')
-        title_label.pack(fill='x', pady=(5, 0))
-
-        if url:
-            title_label.bind('<Button-1>', lambda e, u=url: self._open_link(u))
-
-        # 收藏日期
-        bookmarked_at = bookmark.get('bookmarked_at', '')
-        if bookmarked_at:
-            try:
-                dt = datetime.fromisoformat(bookmarked_at)
-                date_str = dt.strftime('%Y-%m-%d')
-            except:
-                date_str = ''
+    def _toggle_search(self):
+        """切换搜索视图"""
+        if self.showing_search:
+            self._show_papers_view()
         else:
-            date_str = ''
-
-        if date_str:
-            tk.Label(card_inner, text=f'收藏于 {date_str}', font=FONTS['small'],
-                    fg=COLORS['text_secondary'], bg=COLORS['bg_card'],
-                    anchor='w').pack(fill='x', pady=(2, 0))
-
-        # 点评
-        comment = bookmark.get('comment', '')
-        if comment:
-            comment_display = comment[:60] + '...' if len(comment) > 60 else comment
-            tk.Label(card_inner, text=f'💬 {comment_display}', font=FONTS['small'],
-                    fg=COLORS['text_secondary'], bg=COLORS['bg_card'],
-                    anchor='w', wraplength=CARD_WIDTH - 60,
-                    justify='left').pack(fill='x', pady=(4, 0))
+            self._show_search_view()
 
-        # 按钮区
-        btn_frame = tk.Frame(card_inner, bg=COLORS['bg_card'])
-        btn_frame.pack(fill='x', pady=(8, 0))
-
-        # 打开原文按钮
-        if url:
-            open_btn = tk.Label(btn_frame, text='打开原文', font=FONTS['small'],
-                               fg=COLORS['btn_send_text'], bg=COLORS['btn_send'],
-                               padx=8, pady=3, cursor='hand2')
-            open_btn.pack(side='left', padx=(0, 5))
-            open_btn.bind('<Button-1>', lambda e, u=url: self._open_link(u))
-
-        # 删除按钮
-        delete_btn = tk.Label(btn_frame, text='取消收藏', font=FONTS['small'],
-                             fg=COLORS['btn_send_text'], bg=COLORS['thumbs_down'],
-                             padx=8, pady=3, cursor='hand2')
-        delete_btn.pack(side='left')
-        delete_btn.bind('<Button-1>', lambda e, b=bookmark: self._remove_bookmark(b))
+    def _show_search_view(self):
+        """显示搜索视图"""
+        self.showing_search = True
+        self.showing_notebook = False
+        self.showing_bookmarks = False
+        self.title_label.config(text='搜索')
+        self.greeting_label.config(text='笔记、收藏、聊天记录、历史论文都能搜')
 
-        card.bind('<MouseWheel>', self._on_mousewheel)
+        # 隐藏输入区，显示搜索框
+        self.input_container.pack_forget()
+        self.search_frame.pack(fill='x', padx=10, pady=(0, 5), before=self.content_container)
+        self.search_entry.focus_set()
+        self._run_search()
+
+    def _hide_search_bar(self):
+        self.showing_search = False
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+            self._search_job = None
+        self.search_frame.pack_forget()
+
+    def _on_search_key(self, event):
+        """边输入边搜，停顿一下再查询"""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self._search_job = self.window.after(SEARCH_DELAY, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        query = self.search_entry.get().strip()
+        if not query:
+            self.card_list.set_rows([Row('empty', ('🔍', '想找什么？',
+                                                   '输入关键词，中英文都可以'))])
+            return
 
-    def _remove_bookmark(self, bookmark: Dict):
-        """从收藏列表移除"""
-        paper_id = bookmark.get('id', '')
-        self.bookmark_manager.remove(paper_id)
-        self._show_toast("已取消收藏")
-        self._show_bookmarks_view()  # 刷新列表
+        index = get_search_index()
+        results = index.search(query) if index else []
+        if not results:
+            self.card_list.set_rows([Row('empty', ('🔍', '没有找到相关内容',
+                                                   '换个关键词试试？'))])
+        else:
+            # 摘录随关键词变化，不跨查询缓存高度
+            self.card_list.set_rows([Row('search_result', r) for r in results])
+
+    def _open_search_result(self, result: Dict):
+        """打开搜索结果：笔记显示详情，论文/收藏打开原文"""
+        if result['kind'] == 'note':
+            note = read_note(result['ref'])
+            if note:
+                self._hide_search_bar()
+                self.showing_notebook = True
+                self.title_label.config(text='论文笔记')
+                self.greeting_label.config(text='')
+                self._show_note_detail(note)
+            else:
+                self._show_toast("笔记已不存在")
+        elif result.get('url'):
+            self._open_link(result['url'])
 
     # ===== 工具方法 =====
 
@@ -1330,12 +1567,6 @@ class PaperChatWindow:
         except:
             pass
 
-    def _on_frame_configure(self, event):
-        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
-
-    def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
-
     def _on_mousewheel(self, event):
         self.canvas.yview_scroll(int(-event.delta), 'units')
 
@@ -1364,6 +1595,9 @@ class PaperChatWindow:
 
     def _on_close(self):
         """关闭窗口"""
+        # 取消还没回来的聊天请求（包括还在 LLM 调度队列里排队的）
+        get_llm_scheduler().cancel_owner(self)
+        get_bridge(self.parent).cancel_owner(self)
         self._save_history()
         if self.on_close:
             self.on_close()
@@ -10,6 +10,14 @@ FETCH_HOUR = 6
 MAX_PAPERS_PER_DAY = 10
 MIN_PAPERS_PER_DAY = 5
 
+# 分级总结：本地相关度先留下 TRIAGE_CANDIDATES 篇，LLM 只看标题和截断的摘要批量初筛打分，
+# 前 MAX_PAPERS_PER_DAY 篇写完整解读，其中精读推荐（最多 MAX_DEEP_READ 篇）再单独写精读
+ARXIV_MAX_RESULTS = 200
+TRIAGE_CANDIDATES = 200
+TRIAGE_BATCH_SIZE = 50
+TRIAGE_ABSTRACT_CHARS = 300
+TRIAGE_DEFAULT_SCORE = 3    # 某批初筛失败时这些论文按 3 分、本地顺序排
+
 ANTHROPIC_MODEL = "claude-haiku-4-5-20251001"
 SUMMARIZE_TEMPERATURE = 0.3
 CHAT_TEMPERATURE = 0.5
@@ -18,11 +26,43 @@ MAX_DEEP_READ = 2
 TASTE_DECAY_RATE = 0.9
 EVOLVED_KEYWORD_THRESHOLD = 10
 
+# 本地相关度：关键词优先级（主关键词命中 = 1.0）加上 RELEVANCE_WEIGHT × 余弦相似度；
+# 没命中关键词但相似度达到 RELEVANCE_MIN_SCORE 的论文也能入选
+RELEVANCE_WEIGHT = 3.0
+RELEVANCE_MIN_SCORE = 0.2
+
 ARXIV_API_URL = "https://export.arxiv.org/api/query"
 BIORXIV_API_URL = "https://api.biorxiv.org/details/biorxiv"
 ARXIV_CATEGORIES = ["q-bio.BM", "q-bio.QM", "cs.LG", "stat.ML"]
 REQUEST_DELAY = 3
 
+# 调试日志：级别可用环境变量 XIAOTIEPI_LOG_LEVEL 覆盖（DEBUG / INFO / WARNING / ERROR / OFF）
+DEBUG_LOG_FILE = SAVE_DIR / 'debug.log'
+DEBUG_WORKER_LOG_FILE = SAVE_DIR / 'debug-worker.log'   # 论文流水线子进程单独写一个文件
+LOG_LEVEL = os.environ.get('XIAOTIEPI_LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# LLM 用量：每个功能每天的 token 预算（输入 + 输出 + 缓存，0 表示不限），超了就降级
+DAILY_TOKEN_BUDGETS = {
+    'triage': 150000,
+    'summarize': 300000,
+    'deep_read': 50000,
+    'chat': 200000,
+    'note': 50000,
+    'casual': 50000,
+}
+# 估算费用用的单价（美元 / 百万 token：输入、输出），缓存读按输入的 0.1 倍、写按 1.25 倍
+MODEL_PRICES = {
+    'claude-haiku-4-5-20251001': (1.0, 5.0),
+    'claude-sonnet-4-20250514': (3.0, 15.0),
+}
+
+# LLM 请求调度：同时进行的请求数、每分钟 token 上限（按账号限速档位设置）、429/529 重试次数
+LLM_MAX_CONCURRENCY = 3
+LLM_TOKENS_PER_MINUTE = 40000
+LLM_MAX_RETRIES = 4
+
 SEED_KEYWORDS = {
     "primary": [
         "protein structure prediction",
@@ -107,7 +147,37 @@ SCHOLAR_SYSTEM_PROMPT = '''你是小铁皮，一个热爱科学的像素桌面
 
 ## 精读推荐
 
-将评分最高的 1-2 篇标记 "deep_read": true。精读推荐的论文，summary 可以写得更详细（4-6句），并额外说明值得深入了解的具体部分。'''
+将评分最高的 1-2 篇标记 "deep_read": true。精读解读之后会单独写，这里精读推荐的 summary 和其他论文一样长就行。'''
+
+TRIAGE_SYSTEM_PROMPT = '''你是小铁皮，每天帮主人从一大批新论文里挑出值得读的。
+
+你的主人是生物信息学方向的硕士生，专注蛋白质结构预测和蛋白-核酸相互作用，熟悉深度学习方法。
+
+只根据标题和摘要开头，给每篇论文打 1-5 分：
+- 5分：直接相关 + 方法有重大创新
+- 4分：高度相关，或在主人研究方向上有直接应用价值
+- 3分：相关领域，有一定新意
+- 2分：边缘相关或增量改进
+- 1分：基本无关
+
+只输出一个 JSON 整数数组，按编号顺序每篇一个分数，例如 [3, 5, 1, 2]，不要输出其他任何内容。'''
+
+DEEP_READ_SYSTEM_PROMPT = '''你是小铁皮，一个热爱科学的像素桌面宠物。主人挑了今天最值得精读的论文，请你写一份精读解读。
+
+你的主人是生物信息学方向的硕士生，专注蛋白质结构预测和蛋白-核酸相互作用，熟悉深度学习方法。不需要解释基础概念。
+
+每篇写 6-10 句口语化的中文，依次讲清楚：
+1. 要解决的问题和为什么难
+2. 方法的关键设计（模型结构、训练目标、数据），和已有工作比新在哪
+3. 主要结果和对比的 baseline
+4. 可能的局限或没说清楚的地方
+5. 主人最值得细读的部分（哪一节、哪张图、哪个实验），以及对主人研究可能的启发
+
+严格按以下 JSON 格式输出（按论文编号顺序的数组）：
+
+[
+  {"deep_summary": "精读解读"}
+]'''
 
 CHAT_SYSTEM_PROMPT_ADDON = '''
 现在用户想深入讨论论文。你能记得今天和主人聊过的内容。如果主人问"刚才那篇"或"你说的那个方法"，你可以根据对话历史理解他指的是什么。
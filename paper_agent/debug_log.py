@@ -0,0 +1,152 @@
+"""
+debug_log.py - 共用的调试日志
+调用方只把日志记录放进队列（不碰文件），后台线程统一写 ~/.xiaotiepi/debug.log，按大小轮转
+（论文流水线子进程写 debug-worker.log，两个进程轮转同一个文件会互相踩）；
+每条可以带结构化字段（component、latency_ms、tokens……）。
+低于当前级别的日志在 isEnabledFor 处就返回，热路径里的埋点可以常驻
+
+    log = get_logger('summarizer')
+    log.debug('step 1: importing anthropic')
+    log.info('messages.create done', latency_ms=812, tokens=1530)
+"""
+
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+from .config import DEBUG_LOG_FILE, DEBUG_WORKER_LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+ROOT_LOGGER = 'xiaotiepi'
+QUEUE_SIZE = 10000      # 写日志的线程跟不上时最多积压的条数，再多就丢
+
+LEVEL_OFF = logging.CRITICAL + 1
+
+# logging 自己认识的关键字参数，其余的都当结构化字段
+_LOG_KWARGS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+
+class _Formatter(logging.Formatter):
+    """时间 级别 [组件] 消息 key=value ..."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-5s [%(component)s] %(message)s%(field_text)s',
+                         datefmt='%Y-%m-%d %H:%M:%S')
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'component'):
+            record.component = record.name.rpartition('.')[2]
+        fields = getattr(record, 'fields', None)
+        record.field_text = ''.join(f' {k}={v}' for k, v in fields.items()) if fields else ''
+        return super().format(record)
+
+
+class _QueueHandler(QueueHandler):
+    """只在调用线程里把参数拼进消息（参数对象之后可能被改），时间和堆栈留给写日志的线程格式化"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandler.dropped += 1
+
+
+class ComponentLogger(logging.LoggerAdapter):
+    """带组件名的日志；多余的关键字参数作为结构化字段，如 log.info('done', latency_ms=12)"""
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _LOG_KWARGS}
+        extra = dict(kwargs.get('extra') or ())
+        extra['component'] = self.extra['component']
+        if fields:
+            extra['fields'] = fields
+        kwargs['extra'] = extra
+        return msg, kwargs
+
+    # 级别不够时只做一次 isEnabledFor（LoggerAdapter 默认实现多绕了几层）
+    def debug(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.log(logging.INFO, msg, *args, **kwargs)
+
+
+_listener: Optional[QueueListener] = None
+_configured = False
+_setup_lock = threading.Lock()
+
+
+def _parse_level(name: str) -> int:
+    if name == 'OFF':
+        return LEVEL_OFF
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _default_log_file() -> Path:
+    """主进程写 debug.log，子进程（论文流水线）写 debug-worker.log"""
+    return DEBUG_LOG_FILE if multiprocessing.parent_process() is None else DEBUG_WORKER_LOG_FILE
+
+
+def setup(level: Optional[str] = None, log_file: Optional[Path] = None) -> None:
+    """配置日志（可重复调用，第一次 get_logger 时会自动调用）；OFF 时不启动写日志的线程"""
+    global _listener, _configured
+    log_file = log_file or _default_log_file()
+    with _setup_lock:
+        _configured = True
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(_parse_level(level or LOG_LEVEL))
+        root.propagate = False
+        if _listener is not None or root.level >= LEVEL_OFF:
+            return
+
+        try:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                               backupCount=LOG_BACKUP_COUNT,
+                                               encoding='utf-8', delay=True)
+        except Exception as e:
+            print(f"Debug log setup error: {e}")
+            return
+        file_handler.setFormatter(_Formatter())
+
+        log_queue: 'queue.Queue' = queue.Queue(QUEUE_SIZE)
+        root.handlers[:] = [_QueueHandler(log_queue)]
+        _listener = QueueListener(log_queue, file_handler)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def get_logger(component: str) -> ComponentLogger:
+    """某个组件的日志，写进 debug.log 时带 [component] 前缀"""
+    if not _configured:
+        setup()
+    return ComponentLogger(logging.getLogger(f'{ROOT_LOGGER}.{component}'),
+                           {'component': component})
+
+
+def shutdown() -> None:
+    """把队列里剩下的日志写完并停止后台线程（退出时自动调用）"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        if _QueueHandler.dropped:
+            print(f"Debug log dropped {_QueueHandler.dropped} records")
@@ -1,17 +1,82 @@
+import asyncio
+import contextlib
 import time
 import json
 import re
+import threading
 import urllib.request
 import urllib.parse
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from xml.etree import ElementTree as ET
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 from .config import (
     ARXIV_API_URL, BIORXIV_API_URL, ARXIV_CATEGORIES,
-    SEED_KEYWORDS, REQUEST_DELAY, MAX_PAPERS_PER_DAY, MIN_PAPERS_PER_DAY,
-    PAPER_DATA_FILE, TASTE_PROFILE_FILE, SAVE_DIR
+    SEED_KEYWORDS, REQUEST_DELAY, MAX_PAPERS_PER_DAY, MIN_PAPERS_PER_DAY, ARXIV_MAX_RESULTS,
+    RELEVANCE_WEIGHT, RELEVANCE_MIN_SCORE,
+    TASTE_PROFILE_FILE, SAVE_DIR
 )
+from .archive import get_archive
+from .relevance import RelevanceModel
+
+# 同一来源两次请求至少间隔 REQUEST_DELAY 秒（批量回填时多个线程共用）
+_throttle_lock = threading.Lock()
+_next_request: Dict[str, float] = {}
+
+# 相关度模型的读-改-写不能并发
+_relevance_lock = threading.Lock()
+
+
+USER_AGENT = 'xiaotiepi-paper-agent/1.0'
+HTTP_TIMEOUT = 30
+
+
+def _reserve(source: str) -> float:
+    """占一个请求时间槽，返回还要等几秒"""
+    with _throttle_lock:
+        now = time.monotonic()
+        slot = max(now, _next_request.get(source, 0.0))
+        _next_request[source] = slot + REQUEST_DELAY
+    return slot - now
+
+
+def _throttle(source: str) -> None:
+    wait = _reserve(source)
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def _athrottle(source: str) -> None:
+    wait = _reserve(source)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def _download(url: str) -> str:
+    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as response:
+        return response.read().decode('utf-8')
+
+
+def _async_client():
+    """有 httpx（anthropic 的依赖）就用异步 HTTP，否则退回线程池里的 urllib"""
+    if httpx is None:
+        return contextlib.nullcontext(None)
+    return httpx.AsyncClient(headers={'User-Agent': USER_AGENT}, timeout=HTTP_TIMEOUT,
+                             follow_redirects=True)
+
+
+async def _adownload(client, url: str) -> str:
+    if client is None:
+        return await asyncio.to_thread(_download, url)
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.text
 
 
 class PaperFetcher:
@@ -49,20 +114,36 @@ class PaperFetcher:
 
         return priority, total_hits
 
-    def fetch_arxiv(self, max_results: int = 50) -> List[Dict]:
+    def _arxiv_url(self, max_results: int = ARXIV_MAX_RESULTS, date: Optional[str] = None) -> str:
         # 注意：arXiv API 要求 +OR+ 不能被 URL 编码，所以手动构建 URL
         categories = '+OR+'.join([f'cat:{cat}' for cat in ARXIV_CATEGORIES])
-        url = (f"{ARXIV_API_URL}?search_query={categories}"
-               f"&sortBy=submittedDate&sortOrder=descending&max_results={max_results}")
+        if date:
+            day = date.replace('-', '')
+            categories = f"%28{categories}%29+AND+submittedDate:%5B{day}0000+TO+{day}2359%5D"
+        return (f"{ARXIV_API_URL}?search_query={categories}"
+                f"&sortBy=submittedDate&sortOrder=descending&max_results={max_results}")
+
+    def fetch_arxiv(self, max_results: int = ARXIV_MAX_RESULTS, date: Optional[str] = None) -> List[Dict]:
+        """最新的论文；给了 date（YYYY-MM-DD）就只取那天提交的"""
+        try:
+            _throttle('arxiv')
+            xml_data = _download(self._arxiv_url(max_results, date))
+        except Exception as e:
+            print(f"arXiv fetch error: {e}")
+            return []
+        return self._parse_arxiv(xml_data)
 
+    async def afetch_arxiv(self, client, max_results: int = ARXIV_MAX_RESULTS,
+                           date: Optional[str] = None) -> List[Dict]:
         try:
-            req = urllib.request.Request(url, headers={'User-Agent': 'xiaotiepi-paper-agent/1.0'})
-            with urllib.request.urlopen(req, timeout=30) as response:
-                xml_data = response.read().decode('utf-8')
+            await _athrottle('arxiv')
+            xml_data = await _adownload(client, self._arxiv_url(max_results, date))
         except Exception as e:
             print(f"arXiv fetch error: {e}")
             return []
+        return self._parse_arxiv(xml_data)
 
+    def _parse_arxiv(self, xml_data: str) -> List[Dict]:
         papers = []
         ns = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
 
@@ -101,20 +182,35 @@ class PaperFetcher:
 
         return papers
 
-    def fetch_biorxiv(self, days_back: int = 3) -> List[Dict]:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
+    def _biorxiv_url(self, days_back: int = 3, date: Optional[str] = None) -> str:
+        if date:
+            start_date = end_date = datetime.strptime(date, '%Y-%m-%d')
+        else:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days_back)
+        return f"{BIORXIV_API_URL}/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}/0"
 
-        url = f"{BIORXIV_API_URL}/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}/0"
+    def fetch_biorxiv(self, days_back: int = 3, date: Optional[str] = None) -> List[Dict]:
+        """最近几天的论文；给了 date 就只取那一天的"""
+        try:
+            _throttle('biorxiv')
+            data = json.loads(_download(self._biorxiv_url(days_back, date)))
+        except Exception as e:
+            print(f"bioRxiv fetch error: {e}")
+            return []
+        return self._parse_biorxiv(data)
 
+    async def afetch_biorxiv(self, client, days_back: int = 3,
+                             date: Optional[str] = None) -> List[Dict]:
         try:
-            req = urllib.request.Request(url, headers={'User-Agent': 'xiaotiepi-paper-agent/1.0'})
-            with urllib.request.urlopen(req, timeout=30) as response:
-                data = json.loads(response.read().decode('utf-8'))
+            await _athrottle('biorxiv')
+            data = json.loads(await _adownload(client, self._biorxiv_url(days_back, date)))
         except Exception as e:
             print(f"bioRxiv fetch error: {e}")
             return []
+        return self._parse_biorxiv(data)
 
+    def _parse_biorxiv(self, data: Dict) -> List[Dict]:
         papers = []
         for item in data.get('collection', []):
             papers.append({
@@ -128,21 +224,33 @@ class PaperFetcher:
 
         return papers
 
-    def filter_papers(self, papers: List[Dict]) -> List[Dict]:
+    def filter_papers(self, papers: List[Dict], limit: int = MAX_PAPERS_PER_DAY,
+                      learn: bool = True) -> List[Dict]:
+        """按关键词和本地相关度排序，留下前 limit 篇；learn=False 时不把候选计入文档频率"""
         scored_papers = []
 
-        for paper in papers:
+        # 本地相关度：口味向量与每篇论文的余弦相似度
+        with _relevance_lock:
+            model = RelevanceModel()
+            features = model.featurize(papers)
+            if learn:
+                model.observe(features, [p.get('id') or p.get('title', '') for p in papers])
+            relevance = model.score(features)
+            if learn:
+                model.save()
+
+        for paper, rel in zip(papers, relevance):
             text = f"{paper['title']} {paper['abstract']}"
             priority, hits = self._match_keywords(text)
 
-            if hits > 0:
-                paper['_priority'] = priority
+            if hits > 0 or rel >= RELEVANCE_MIN_SCORE:
+                paper['_priority'] = priority / 100 + RELEVANCE_WEIGHT * rel
                 paper['_hits'] = hits
                 scored_papers.append(paper)
 
         scored_papers.sort(key=lambda x: x['_priority'], reverse=True)
 
-        result = scored_papers[:MAX_PAPERS_PER_DAY]
+        result = scored_papers[:limit]
 
         for p in result:
             p.pop('_priority', None)
@@ -150,62 +258,43 @@ class PaperFetcher:
 
         return result
 
-    def fetch_all(self) -> List[Dict]:
-        print("Fetching from arXiv...")
-        arxiv_papers = self.fetch_arxiv()
+    async def afetch_candidates(self, date: Optional[str] = None) -> List[Dict]:
+        """两个来源同时抓（各自仍按 REQUEST_DELAY 限速）"""
+        print("Fetching from arXiv and bioRxiv...")
+        async with _async_client() as client:
+            arxiv_papers, biorxiv_papers = await asyncio.gather(
+                self.afetch_arxiv(client, date=date),
+                self.afetch_biorxiv(client, date=date),
+            )
         print(f"Got {len(arxiv_papers)} papers from arXiv")
-
-        time.sleep(REQUEST_DELAY)
-
-        print("Fetching from bioRxiv...")
-        biorxiv_papers = self.fetch_biorxiv()
         print(f"Got {len(biorxiv_papers)} papers from bioRxiv")
+        return arxiv_papers + biorxiv_papers
 
-        all_papers = arxiv_papers + biorxiv_papers
+    def fetch_candidates(self, date: Optional[str] = None) -> List[Dict]:
+        """两个来源的候选论文（未筛选）"""
+        return asyncio.run(self.afetch_candidates(date))
 
-        filtered = self.filter_papers(all_papers)
+    def fetch_all(self) -> List[Dict]:
+        filtered = self.filter_papers(self.fetch_candidates())
         print(f"After filtering: {len(filtered)} papers")
 
         return filtered
 
     def should_fetch_today(self) -> bool:
-        if not PAPER_DATA_FILE.exists():
-            return True
-
+        today = datetime.now().strftime('%Y-%m-%d')
         try:
-            with open(PAPER_DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                last_fetch = data.get('last_fetch_date')
-                if last_fetch:
-                    today = datetime.now().strftime('%Y-%m-%d')
-                    return last_fetch != today
-        except:
-            pass
-
-        return True
+            return not get_archive().has_day(today)
+        except Exception as e:
+            print(f"Paper archive error: {e}")
+            return True
 
     def save_papers(self, papers: List[Dict]) -> None:
-        data = {
-            'last_fetch_date': datetime.now().strftime('%Y-%m-%d'),
-            'today_papers': papers,
-            'briefing_delivered': False,
-            'briefing_text': None
-        }
-
-        with open(PAPER_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        get_archive().save_day(datetime.now().strftime('%Y-%m-%d'), papers)
 
     def load_today_papers(self) -> List[Dict]:
-        if not PAPER_DATA_FILE.exists():
-            return []
-
+        today = datetime.now().strftime('%Y-%m-%d')
         try:
-            with open(PAPER_DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                today = datetime.now().strftime('%Y-%m-%d')
-                if data.get('last_fetch_date') == today:
-                    return data.get('today_papers', [])
-        except:
-            pass
-
-        return []
+            return get_archive().load_day(today)
+        except Exception as e:
+            print(f"Paper archive error: {e}")
+            return []
@@ -0,0 +1,229 @@
+"""
+llm_scheduler.py - LLM 请求调度
+论文聊天 / 闲聊（交互）> 笔记 > 每日初筛/总结/精读（后台）三档优先级排队，全局限制同时进行的请求数，
+后台请求永远给交互留一个位置；按最近一分钟的 token 用量（llm_usage.db，跨进程）准入，
+低优先级只能用到每分钟上限的一部分。429/529 退避重试（退避期间让出位置），
+窗口关闭时取消它还在排队的请求
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import LLM_MAX_CONCURRENCY, LLM_TOKENS_PER_MINUTE, LLM_MAX_RETRIES
+from .debug_log import get_logger
+
+# 优先级（数值小的先执行）
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NOTE = 1
+PRIORITY_BACKGROUND = 2
+
+FEATURE_PRIORITY = {
+    'chat': PRIORITY_INTERACTIVE,
+    'casual': PRIORITY_INTERACTIVE,
+    'note': PRIORITY_NOTE,
+    'triage': PRIORITY_BACKGROUND,
+    'summarize': PRIORITY_BACKGROUND,
+    'deep_read': PRIORITY_BACKGROUND,
+}
+
+# 各优先级最多能用到每分钟 token 上限的多少（剩下的留给更高优先级）
+RATE_SHARE = {
+    PRIORITY_INTERACTIVE: 1.0,
+    PRIORITY_NOTE: 0.8,
+    PRIORITY_BACKGROUND: 0.6,
+}
+
+RATE_WINDOW = 60.0          # token 速率窗口（秒）
+RECHECK_SECONDS = 0.5       # 因速率或冷却等待时的重新检查间隔
+RETRY_STATUS = (429, 529)   # 限流 / 过载
+BACKOFF_BASE = 2.0          # 第 n 次重试等 BACKOFF_BASE × 2^n 秒（加抖动），服务端给了 retry-after 就听它的
+BACKOFF_MAX = 60.0
+CHARS_PER_TOKEN = 2         # 估算请求 token 数（中英混排取保守值）
+
+log = get_logger('llm_scheduler')
+
+
+class RequestCancelled(Exception):
+    """排队中的请求被取消（窗口关闭）"""
+
+
+def estimate_tokens(request: Dict) -> int:
+    """粗估一次请求的 token 数：提示词长度 + max_tokens"""
+    chars = len(request.get('system') or '') + len(json.dumps(request.get('messages', []),
+                                                              ensure_ascii=False))
+    return chars // CHARS_PER_TOKEN + request.get('max_tokens', 0)
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """可重试的错误返回等待秒数，否则 None"""
+    if getattr(error, 'status_code', None) not in RETRY_STATUS:
+        return None
+    response = getattr(error, 'response', None)
+    try:
+        retry_after = float(response.headers.get('retry-after'))
+    except Exception:
+        retry_after = None
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX) * random.uniform(0.8, 1.2)
+
+
+class _Ticket:
+    __slots__ = ('priority', 'seq', 'estimate', 'owner', 'cancelled', 'admitted')
+
+    def __init__(self, priority: int, seq: int, estimate: int, owner: Optional[int]):
+        self.priority = priority
+        self.seq = seq
+        self.estimate = estimate
+        self.owner = owner
+        self.cancelled = False
+        self.admitted = False
+
+    def __lt__(self, other: '_Ticket') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """进程内的 LLM 请求调度器（线程安全；同步调用 call，协程里 await acall）"""
+
+    def __init__(self, window_tokens: Callable[[float], int],
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.window_tokens = window_tokens      # since 时间戳之后已完成调用的 token 数
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._running: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._cooldown_until = 0.0
+
+    # ===== 准入 =====
+
+    def _can_admit(self, ticket: _Ticket) -> bool:
+        if time.monotonic() < self._cooldown_until:
+            return False
+        # 后台请求不占最后一个位置
+        slots = self.max_concurrency - (1 if ticket.priority == PRIORITY_BACKGROUND else 0)
+        if len(self._running) >= max(1, slots):
+            return False
+        limit = self.tokens_per_minute * RATE_SHARE[ticket.priority]
+        if ticket.estimate > limit:
+            # 单个请求就超过这一档的份额，等不到配额：没有别的请求在跑时直接放行
+            return not self._running
+        in_flight = sum(t.estimate for t in self._running)
+        used = self.window_tokens(time.time() - RATE_WINDOW) + in_flight
+        return used + ticket.estimate <= limit
+
+    def acquire(self, ticket: _Ticket) -> None:
+        """排队直到轮到 ticket（只有队首能进），被取消抛 RequestCancelled"""
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if ticket.cancelled:
+                        raise RequestCancelled()
+                    if self._waiting[0] is ticket and self._can_admit(ticket):
+                        break
+                    cooldown = self._cooldown_until - time.monotonic()
+                    self._cond.wait(min(RECHECK_SECONDS, cooldown) if cooldown > 0 else RECHECK_SECONDS)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            ticket.admitted = True
+            self._running.append(ticket)
+
+    def release(self, ticket: _Ticket) -> None:
+        with self._cond:
+            if ticket.admitted:
+                ticket.admitted = False
+                self._running.remove(ticket)
+            self._cond.notify_all()
+
+    def _backoff(self, delay: float) -> None:
+        """限流时所有请求一起冷却"""
+        with self._cond:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def cancel(self, ticket: _Ticket) -> None:
+        with self._cond:
+            ticket.cancelled = True
+            self._cond.notify_all()
+
+    def cancel_owner(self, owner: Any) -> None:
+        """取消某个 owner（一般是窗口）还在排队的请求"""
+        key = id(owner)
+        with self._cond:
+            for ticket in self._waiting:
+                if ticket.owner == key:
+                    ticket.cancelled = True
+            self._cond.notify_all()
+
+    def _ticket(self, feature: str, estimate: int, owner: Any) -> _Ticket:
+        return _Ticket(FEATURE_PRIORITY.get(feature, PRIORITY_BACKGROUND), next(self._seq),
+                       estimate, id(owner) if owner is not None else None)
+
+    # ===== 调用 =====
+
+    def call(self, feature: str, fn: Callable[[], Any], estimate: int = 0, owner: Any = None) -> Any:
+        """排队后执行 fn()，429/529 退避重试"""
+        for attempt in range(self.max_retries + 1):
+            ticket = self._ticket(feature, estimate, owner)
+            self.acquire(ticket)
+            try:
+                return fn()
+            except Exception as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                log.warning('rate limited, retrying', feature=feature, attempt=attempt + 1,
+                            delay_s=round(delay, 1))
+                self._backoff(delay)
+            finally:
+                self.release(ticket)
+
+    async def acall(self, feature: str, fn: Callable[[], Awaitable], estimate: int = 0,
+                    owner: Any = None) -> Any:
+        """call 的异步版本：fn() 返回协程；排队在线程池里等，任务被取消时撤掉排队"""
+        for attempt in range(self.max_retries + 1):
+            ticket = self._ticket(feature, estimate, owner)
+            try:
+                await asyncio.to_thread(self.acquire, ticket)
+            except asyncio.CancelledError:
+                self.cancel(ticket)
+                self.release(ticket)
+                raise
+            try:
+                return await fn()
+            except Exception as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                log.warning('rate limited, retrying', feature=feature, attempt=attempt + 1,
+                            delay_s=round(delay, 1))
+                self._backoff(delay)
+            finally:
+                self.release(ticket)
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """进程内共享的调度器（token 速率按 llm_usage.db 里所有进程的调用算）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from .metering import get_meter
+            _scheduler = LLMScheduler(lambda since: get_meter().tokens_since(since))
+        return _scheduler
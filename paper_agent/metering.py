@@ -0,0 +1,269 @@
+"""
+metering.py - LLM 调用计量
+所有 Anthropic 调用都经过 create_message / acreate_message（由 llm_scheduler 排队）：用流式接口拿到首 token 时间，
+把功能、模型、输入/输出/缓存 token、首 token 延迟和总耗时记进 ~/.xiaotiepi/llm_usage.db，
+按天、按周汇总（右键菜单可看），每个功能每天有 token 预算，超了抛 BudgetExceeded 让调用方降级
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .config import SAVE_DIR, DAILY_TOKEN_BUDGETS, MODEL_PRICES
+from .debug_log import get_logger
+
+LLM_USAGE_FILE = SAVE_DIR / 'llm_usage.db'
+
+# 功能标签
+FEATURE_TRIAGE = 'triage'
+FEATURE_SUMMARIZE = 'summarize'
+FEATURE_DEEP_READ = 'deep_read'
+FEATURE_CHAT = 'chat'
+FEATURE_NOTE = 'note'
+FEATURE_CASUAL = 'casual'
+
+FEATURE_LABELS = {
+    FEATURE_TRIAGE: '论文初筛',
+    FEATURE_SUMMARIZE: '论文总结',
+    FEATURE_DEEP_READ: '精读',
+    FEATURE_CHAT: '论文聊天',
+    FEATURE_NOTE: '笔记',
+    FEATURE_CASUAL: '闲聊',
+}
+
+log = get_logger('metering')
+
+
+class BudgetExceeded(Exception):
+    """这个功能今天的 token 预算用完了"""
+
+    def __init__(self, feature: str, used: int, budget: int):
+        super().__init__(f'{feature} 今日 token 预算已用完（{used}/{budget}）')
+        self.feature = feature
+
+
+def _usage_tokens(message) -> Tuple[int, int, int, int]:
+    """(输入, 输出, 缓存读, 缓存写)"""
+    usage = getattr(message, 'usage', None)
+    if usage is None:
+        return 0, 0, 0, 0
+    return (usage.input_tokens or 0, usage.output_tokens or 0,
+            getattr(usage, 'cache_read_input_tokens', None) or 0,
+            getattr(usage, 'cache_creation_input_tokens', None) or 0)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_read: int = 0, cache_write: int = 0) -> float:
+    """估算费用（美元），不认识的模型按 0 算"""
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * price_in + cache_read * price_in * 0.1
+            + cache_write * price_in * 1.25 + output_tokens * price_out) / 1e6
+
+
+class UsageMeter:
+    """LLM 调用台账（SQLite，流水线子进程和界面进程共用一个文件）"""
+
+    def __init__(self, path=LLM_USAGE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        SAVE_DIR.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS calls (
+                ts REAL NOT NULL,
+                day TEXT NOT NULL,
+                feature TEXT NOT NULL,
+                model TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cache_read_tokens INTEGER NOT NULL,
+                cache_write_tokens INTEGER NOT NULL,
+                ttft_ms INTEGER,
+                latency_ms INTEGER NOT NULL,
+                ok INTEGER NOT NULL)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS calls_day ON calls (day, feature)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS calls_ts ON calls (ts)')
+
+    # ===== 记录 =====
+
+    def record(self, feature: str, model: str, message=None, ttft: Optional[float] = None,
+               latency: float = 0.0, ok: bool = True) -> None:
+        input_tokens, output_tokens, cache_read, cache_write = _usage_tokens(message)
+        now = datetime.now()
+        ttft_ms = round(ttft * 1000) if ttft is not None else None
+        latency_ms = round(latency * 1000)
+        try:
+            with self._lock, self.conn:
+                self.conn.execute('INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                    now.timestamp(), now.strftime('%Y-%m-%d'), feature, model,
+                    input_tokens, output_tokens, cache_read, cache_write,
+                    ttft_ms, latency_ms, 1 if ok else 0))
+        except sqlite3.Error as e:
+            print(f"LLM usage record error: {e}")
+        log.info('llm call', feature=feature, model=model, ok=ok, ttft_ms=ttft_ms,
+                 latency_ms=latency_ms, tokens=input_tokens + output_tokens + cache_read + cache_write)
+
+    # ===== 预算 =====
+
+    def tokens_today(self, feature: str) -> int:
+        day = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT COALESCE(SUM(input_tokens + output_tokens + cache_read_tokens + cache_write_tokens), 0) '
+                'FROM calls WHERE day = ? AND feature = ?', (day, feature)).fetchone()
+        return row[0]
+
+    def tokens_since(self, since: float) -> int:
+        """since（时间戳）之后所有进程、所有功能用掉的 token，给请求调度算速率"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT COALESCE(SUM(input_tokens + output_tokens + cache_read_tokens + cache_write_tokens), 0) '
+                'FROM calls WHERE ts >= ?', (since,)).fetchone()
+        return row[0]
+
+    def check_budget(self, feature: str) -> None:
+        """预算用完时抛 BudgetExceeded"""
+        budget = DAILY_TOKEN_BUDGETS.get(feature, 0)
+        if not budget:
+            return
+        used = self.tokens_today(feature)
+        if used >= budget:
+            raise BudgetExceeded(feature, used, budget)
+
+    def over_budget(self, feature: str) -> bool:
+        try:
+            self.check_budget(feature)
+        except BudgetExceeded:
+            return True
+        return False
+
+    # ===== 汇总 =====
+
+    def rollup(self, since: str, period: str = 'day') -> List[Dict]:
+        """since 之后按天（'day'）或按周（'week'，周一开始）、按功能汇总"""
+        bucket = "day" if period == 'day' else "date(day, '-' || ((strftime('%w', day) + 6) % 7) || ' days')"
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT {bucket} AS bucket, feature, model, COUNT(*), SUM(input_tokens), SUM(output_tokens), '
+                'SUM(cache_read_tokens), SUM(cache_write_tokens), AVG(ttft_ms), AVG(latency_ms), '
+                'SUM(1 - ok) FROM calls WHERE day >= ? GROUP BY bucket, feature, model '
+                'ORDER BY bucket DESC, feature', (since,)).fetchall()
+        return [{
+            'period': bucket, 'feature': feature, 'model': model, 'calls': calls,
+            'input_tokens': inp, 'output_tokens': out, 'cache_read_tokens': cr, 'cache_write_tokens': cw,
+            'avg_ttft_ms': round(ttft) if ttft is not None else None,
+            'avg_latency_ms': round(latency), 'errors': errors,
+            'cost': estimate_cost(model, inp, out, cr, cw),
+        } for bucket, feature, model, calls, inp, out, cr, cw, ttft, latency, errors in rows]
+
+    def report_text(self) -> str:
+        """右键菜单里显示的用量报告：今天按功能，最近 7 天按天，最近 4 周按周"""
+        today = datetime.now().date()
+        lines = ['📅 今天']
+        today_rows = self.rollup(today.strftime('%Y-%m-%d'))
+        if not today_rows:
+            lines.append('  还没有调用过')
+        for r in today_rows:
+            budget = DAILY_TOKEN_BUDGETS.get(r['feature'], 0)
+            used = r['input_tokens'] + r['output_tokens'] + r['cache_read_tokens'] + r['cache_write_tokens']
+            ttft = f"首字 {r['avg_ttft_ms']}ms，" if r['avg_ttft_ms'] is not None else ''
+            lines.append(f"  {FEATURE_LABELS.get(r['feature'], r['feature'])}：{r['calls']} 次，"
+                         f"{used} token" + (f" / {budget}" if budget else '') +
+                         f"，{ttft}平均 {r['avg_latency_ms']}ms，${r['cost']:.3f}"
+                         + (f"，失败 {r['errors']} 次" if r['errors'] else ''))
+
+        for title, since, period in (('📊 最近 7 天', today - timedelta(days=6), 'day'),
+                                     ('🗓 最近 4 周', today - timedelta(days=today.weekday() + 21), 'week')):
+            totals: Dict[str, List] = {}
+            for r in self.rollup(since.strftime('%Y-%m-%d'), period):
+                t = totals.setdefault(r['period'], [0, 0, 0.0])
+                t[0] += r['calls']
+                t[1] += r['input_tokens'] + r['output_tokens'] + r['cache_read_tokens'] + r['cache_write_tokens']
+                t[2] += r['cost']
+            lines.append('')
+            lines.append(title)
+            if not totals:
+                lines.append('  （空）')
+            for key, (calls, tokens, cost) in totals.items():
+                label = key[5:] if period == 'day' else f'{key[5:]} 起'
+                lines.append(f"  {label}：{calls} 次，{tokens} token，${cost:.3f}")
+        return '\n'.join(lines)
+
+
+_meter: Optional[UsageMeter] = None
+_meter_lock = threading.Lock()
+
+
+def get_meter() -> UsageMeter:
+    """进程内共享的用量台账"""
+    global _meter
+    with _meter_lock:
+        if _meter is None:
+            _meter = UsageMeter()
+        return _meter
+
+
+# ===== 计量的调用入口 =====
+
+def _is_text_event(event) -> bool:
+    return getattr(event, 'type', None) in ('text', 'content_block_delta')
+
+
+def create_message(client, feature: str, owner=None, **request):
+    """同步调用 messages（流式，记录首 token 时间），返回完整的 Message
+
+    预算用完抛 BudgetExceeded；经 llm_scheduler 排队，owner 关闭时排队中的请求抛 RequestCancelled
+    """
+    from .llm_scheduler import get_llm_scheduler, estimate_tokens
+
+    meter = get_meter()
+    meter.check_budget(feature)
+    model = request.get('model', '')
+
+    def attempt():
+        start = time.perf_counter()
+        ttft = None
+        try:
+            with client.messages.stream(**request) as stream:
+                for event in stream:
+                    if ttft is None and _is_text_event(event):
+                        ttft = time.perf_counter() - start
+                message = stream.get_final_message()
+        except Exception:
+            meter.record(feature, model, latency=time.perf_counter() - start, ok=False)
+            raise
+        meter.record(feature, model, message, ttft, time.perf_counter() - start)
+        return message
+
+    return get_llm_scheduler().call(feature, attempt, estimate_tokens(request), owner)
+
+
+async def acreate_message(client, feature: str, owner=None, **request):
+    """create_message 的异步版本（在 async_bridge 的事件循环里用），读写台账放到线程池"""
+    from .llm_scheduler import get_llm_scheduler, estimate_tokens
+
+    meter = await asyncio.to_thread(get_meter)
+    await asyncio.to_thread(meter.check_budget, feature)
+    model = request.get('model', '')
+
+    async def attempt():
+        start = time.perf_counter()
+        ttft = None
+        try:
+            async with client.messages.stream(**request) as stream:
+                async for event in stream:
+                    if ttft is None and _is_text_event(event):
+                        ttft = time.perf_counter() - start
+                message = await stream.get_final_message()
+        except Exception:
+            await asyncio.to_thread(meter.record, feature, model, None, None,
+                                    time.perf_counter() - start, False)
+            raise
+        await asyncio.to_thread(meter.record, feature, model, message, ttft,
+                                time.perf_counter() - start)
+        return message
+
+    return await get_llm_scheduler().acall(feature, attempt, estimate_tokens(request), owner)
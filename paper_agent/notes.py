@@ -0,0 +1,151 @@
+"""
+notes.py - 论文笔记目录
+notes/ 下每个 .txt 是一条笔记；旁边的 catalog.json 记录每个文件的
+(mtime, size, 标题, 日期, 链接, 预览)，打开笔记本时只 stat 一遍，
+变化了的文件才重新解析，正文等到看详情时再读
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import SAVE_DIR
+
+NOTES_DIR = SAVE_DIR / 'notes'
+NOTES_CATALOG_FILE = NOTES_DIR / 'catalog.json'
+
+PREVIEW_CHARS = 60
+
+
+def parse_note(filepath: Path, content: str) -> Dict:
+    """从笔记正文解析标题、日期、链接和预览"""
+    lines = content.split('\n')
+    title = lines[0].lstrip('# ').strip() if lines else filepath.stem
+
+    # 从文件名提取日期
+    match = re.search(r'(\d{4}-\d{2}-\d{2})', filepath.stem)
+    date = match.group(1) if match else ''
+
+    # 提取链接
+    url = ''
+    for line in lines:
+        if line.startswith('论文链接:'):
+            url = line.replace('论文链接:', '').strip()
+            break
+
+    # 预览：讨论要点的第一条
+    preview = ''
+    if '## 讨论要点' in lines:
+        for line in lines[lines.index('## 讨论要点') + 1:]:
+            line = line.strip()
+            if line.startswith('#'):
+                break
+            if line:
+                preview = line.lstrip('-•* ').strip()[:PREVIEW_CHARS]
+                break
+
+    return {
+        'filepath': str(filepath),
+        'filename': filepath.name,
+        'title': title,
+        'date': date,
+        'url': url,
+        'preview': preview,
+    }
+
+
+def read_note(filepath) -> Optional[Dict]:
+    """读取一条笔记的完整内容（含 content）"""
+    filepath = Path(filepath)
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except:
+        return None
+    note = parse_note(filepath, content)
+    note['content'] = content
+    return note
+
+
+class NoteCatalog:
+    """笔记目录：按文件名缓存解析结果，用 stat 判断是否过期"""
+
+    def __init__(self, notes_dir: Path = NOTES_DIR, catalog_file: Path = NOTES_CATALOG_FILE):
+        self.notes_dir = notes_dir
+        self.catalog_file = catalog_file
+        self.entries: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if self.catalog_file.exists():
+            try:
+                with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('notes', {})
+            except:
+                self.entries = {}
+
+    def _save(self) -> None:
+        try:
+            tmp_file = self.catalog_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'notes': self.entries}, f, ensure_ascii=False)
+            tmp_file.replace(self.catalog_file)
+        except Exception as e:
+            print(f"Save notes catalog error: {e}")
+
+    def _parse(self, entry: os.DirEntry, stat: os.stat_result) -> Optional[Dict]:
+        note = read_note(entry.path)
+        if note is None:
+            return None
+        del note['content']
+        note['mtime'] = stat.st_mtime
+        note['size'] = stat.st_size
+        return note
+
+    def list(self) -> List[Dict]:
+        """所有笔记（按日期倒序），只重新解析新增或修改过的文件"""
+        if not self.notes_dir.exists():
+            return []
+
+        changed = False
+        seen = set()
+        try:
+            dir_entries = list(os.scandir(self.notes_dir))
+        except OSError:
+            return []
+
+        for entry in dir_entries:
+            if not entry.name.endswith('.txt'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            seen.add(entry.name)
+            cached = self.entries.get(entry.name)
+            if (cached and cached.get('mtime') == stat.st_mtime
+                    and cached.get('size') == stat.st_size
+                    and cached.get('filepath') == entry.path):
+                continue
+            note = self._parse(entry, stat)
+            if note is None:
+                self.entries.pop(entry.name, None)
+            else:
+                self.entries[entry.name] = note
+            changed = True
+
+        for name in [name for name in self.entries if name not in seen]:
+            del self.entries[name]
+            changed = True
+
+        if changed:
+            self._save()
+
+        return sorted(self.entries.values(), key=lambda x: x['date'], reverse=True)
+
+    def forget(self, filepath: str) -> None:
+        """删除笔记后同步目录"""
+        if self.entries.pop(Path(filepath).name, None) is not None:
+            self._save()
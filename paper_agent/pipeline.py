@@ -0,0 +1,75 @@
+"""
+pipeline.py - 每日论文流水线
+抓取 → 筛选 → 初筛 → 总结 → 精读 → 更新口味 → 归档，前台抓取、后台预取和命令行共用一份；
+本地相关度留下几百篇候选，LLM 先只看标题和摘要开头批量打分，完整解读只写前几篇，精读只写一两篇；
+归档是最后一步（单个事务），归档里有了当天就说明整条流水线都跑完了
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .config import FETCH_HOUR, TRIAGE_CANDIDATES
+
+# 阶段回调：(阶段名, 耗时秒数, 处理的论文数)
+StageCallback = Callable[[str, float, int], None]
+
+
+def today_str(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now()).strftime('%Y-%m-%d')
+
+
+def is_fetch_due(now: Optional[datetime] = None) -> bool:
+    """今天已过 FETCH_HOUR 且论文还没归档"""
+    from .archive import get_archive
+    now = now or datetime.now()
+    if now.hour < FETCH_HOUR:
+        return False
+    return not get_archive().has_day(today_str(now))
+
+
+def _timed(on_stage: Optional[StageCallback], name: str, fn, *args):
+    """跑一个阶段，把耗时和处理量报给 on_stage；阶段函数返回论文列表"""
+    start = time.perf_counter()
+    result = fn(*args)
+    if on_stage:
+        on_stage(name, time.perf_counter() - start, len(result))
+    return result
+
+
+def run_daily_pipeline(date: Optional[str] = None, on_stage: Optional[StageCallback] = None,
+                       learn: bool = True) -> List[Dict]:
+    """跑完整条流水线，返回当天的论文（没抓到返回空列表）
+
+    不给 date 就是今天（取最新的论文，跨零点跑完也记在开始那天）；
+    给了 date 就只抓那天提交的论文（回填用）。learn=False 时不更新口味，也不计入文档频率
+    """
+    from .fetcher import PaperFetcher
+    from .summarizer import PaperSummarizer
+    from .taste import TasteProfile
+
+    fetch_date = date
+    date = date or today_str()
+
+    fetcher = PaperFetcher()
+    candidates = _timed(on_stage, 'fetch', fetcher.fetch_candidates, fetch_date)
+    papers = _timed(on_stage, 'filter', fetcher.filter_papers, candidates, TRIAGE_CANDIDATES, learn)
+    print(f"After filtering: {len(papers)} papers")
+    if not papers:
+        return []
+
+    summarizer = PaperSummarizer()
+    papers = _timed(on_stage, 'triage', summarizer.triage_papers, papers)
+    papers = _timed(on_stage, 'summarize', summarizer.summarize_papers, papers)
+    papers = _timed(on_stage, 'deep_read', summarizer.deep_read_papers, papers)
+
+    if learn:
+        def update_taste(papers):
+            TasteProfile().update_from_papers(papers)
+            return papers
+        _timed(on_stage, 'taste', update_taste, papers)
+
+    def archive(papers):
+        summarizer.save_summarized_papers(papers, date)
+        return papers
+    return _timed(on_stage, 'archive', archive, papers)
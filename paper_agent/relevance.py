@@ -0,0 +1,325 @@
+"""
+relevance.py - 本地论文相关度打分
+标题/摘要/作者切成单词和相邻词对，哈希到固定维度的向量空间，按 TF-IDF 加权；
+用户兴趣是同一空间里的一个向量，随评分、收藏标签、👍👎 增量更新，
+候选论文和兴趣向量的余弦相似度一次矩阵乘法算完（没有 numpy 时退化为稀疏点积）。
+界面进程和流水线子进程都会写 taste_vector.json：保存时加文件锁、重新读一遍，
+只把本实例攒下的增量合并进去，不拿手里的旧副本整份覆盖；
+计入文档频率的论文按 ID 记下来，同一天重跑（--force、回填、子进程重启、预取重试）不会重复计数
+"""
+
+import json
+import math
+import re
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .config import SAVE_DIR, SEED_KEYWORDS
+
+RELEVANCE_FILE = SAVE_DIR / 'taste_vector.json'
+RELEVANCE_LOCK_FILE = SAVE_DIR / 'taste_vector.lock'
+
+DIM = 1 << 12           # 哈希空间维度
+SEEN_LIMIT = 30000      # 记住最近这么多篇已计入文档频率的论文（约三个月的候选）
+AUTHOR_WEIGHT = 2.0     # 作者特征相对单词的权重
+
+# 种子关键词在冷启动兴趣向量里的权重
+SEED_WEIGHTS = {
+    'primary': 1.0,
+    'tools': 0.6,
+    'methods': 0.4,
+}
+
+STOPWORDS = {
+    'the', 'of', 'and', 'in', 'to', 'for', 'on', 'with', 'by', 'is', 'are', 'we',
+    'this', 'that', 'an', 'as', 'from', 'at', 'be', 'or', 'our', 'these', 'which',
+    'can', 'it', 'its', 'has', 'have', 'was', 'were', 'such', 'also', 'using',
+    'based', 'via', 'into', 'than', 'their', 'both', 'while', 'not', 'but',
+}
+
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9\-]*[a-z0-9]|[a-z]')
+
+
+# 词 / 词对 → 哈希桶（同一批摘要里大量重复，缓存起来）
+_bucket_cache: Dict = {}
+BUCKET_CACHE_SIZE = 200000
+
+
+def _bucket(token) -> int:
+    b = _bucket_cache.get(token)
+    if b is None:
+        text = token if isinstance(token, str) else ' '.join(token)
+        # crc32 在不同进程间稳定（内置 hash 会随机化）
+        b = zlib.crc32(text.encode('utf-8')) % DIM
+        if len(_bucket_cache) >= BUCKET_CACHE_SIZE:
+            _bucket_cache.clear()
+        _bucket_cache[token] = b
+    return b
+
+
+def text_features(text: str) -> Dict[int, float]:
+    """单词 + 相邻词对的哈希词频"""
+    words = [w for w in _WORD_RE.findall((text or '').lower()) if w not in STOPWORDS]
+    tokens = Counter(words)
+    tokens.update(zip(words, words[1:]))
+    cache = _bucket_cache
+    counts: Dict[int, float] = {}
+    for token, c in tokens.items():
+        b = cache.get(token)
+        if b is None:
+            b = _bucket(token)
+        counts[b] = counts.get(b, 0) + c
+    return counts
+
+
+def paper_features(paper: Dict) -> Dict[int, float]:
+    counts = text_features(f"{paper.get('title', '')} {paper.get('title', '')} "
+                           f"{paper.get('abstract', '')}")
+    for author in paper.get('authors', [])[:5]:
+        b = _bucket('author:' + author.lower())
+        counts[b] = counts.get(b, 0) + AUTHOR_WEIGHT
+    return counts
+
+
+@contextmanager
+def _file_lock():
+    """跨进程互斥（没有 fcntl 的平台上不加锁）"""
+    if fcntl is None:
+        yield
+        return
+    SAVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(RELEVANCE_LOCK_FILE, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _doc_key(doc_id: str) -> int:
+    return zlib.crc32(doc_id.encode('utf-8'))
+
+
+def _read_file() -> Tuple[int, Dict[int, int], Dict[int, float], Dict[int, None]]:
+    """(n_docs, doc_freq, interest, seen)，文件不存在或读不出来时为空；seen 按计入先后排列"""
+    if RELEVANCE_FILE.exists():
+        try:
+            with open(RELEVANCE_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return (data.get('n_docs', 0),
+                    {int(k): v for k, v in data.get('doc_freq', {}).items()},
+                    {int(k): v for k, v in data.get('interest', {}).items()},
+                    dict.fromkeys(data.get('seen', [])))
+        except:
+            pass
+    return 0, {}, {}, {}
+
+
+def _merge(interest: Dict[int, float], delta: Dict[int, float]) -> None:
+    """interest += delta（原地），接近 0 的分量去掉"""
+    for b, d in delta.items():
+        w = interest.get(b, 0.0) + d
+        if abs(w) < 1e-5:
+            interest.pop(b, None)
+        else:
+            interest[b] = w
+
+
+def _decayed(interest: Dict[int, float], rate: float) -> Dict[int, float]:
+    return {b: v * rate for b, v in interest.items() if abs(v * rate) >= 1e-4}
+
+
+class RelevanceModel:
+    """哈希 TF-IDF 向量空间 + 用户兴趣向量"""
+
+    def __init__(self):
+        self.n_docs = 0
+        self.doc_freq: Dict[int, int] = {}
+        self.interest: Dict[int, float] = {}
+        self.seen: Dict[int, None] = {}
+        self._idf_cache: Dict[int, float] = {}
+        self._reset_pending()
+        self._load()
+        if not self.interest:
+            self._seed()
+
+    # ===== 持久化 =====
+
+    def _reset_pending(self) -> None:
+        # 上次读 / 写文件之后的增量：save 时合并进文件里的最新数据
+        self._new_docs: Dict[int, List[int]] = {}     # 论文 ID 的哈希 → 哈希桶
+        self._decay = 1.0
+        self._interest_delta: Dict[int, float] = {}
+
+    def _load(self) -> None:
+        self.n_docs, self.doc_freq, self.interest, self.seen = _read_file()
+        self._idf_cache.clear()
+
+    def save(self) -> None:
+        """重新读文件（别的进程可能刚写过），合并本实例的增量后写回"""
+        try:
+            with _file_lock():
+                n_docs, doc_freq, interest, seen = _read_file()
+                for key, buckets in self._new_docs.items():
+                    if key in seen:
+                        continue    # 别的进程已经计入过
+                    seen[key] = None
+                    n_docs += 1
+                    for b in buckets:
+                        doc_freq[b] = doc_freq.get(b, 0) + 1
+                if len(seen) > SEEN_LIMIT:
+                    seen = dict.fromkeys(list(seen)[-SEEN_LIMIT:])
+                if self._decay != 1.0:
+                    interest = _decayed(interest, self._decay)
+                _merge(interest, self._interest_delta)
+
+                tmp_file = RELEVANCE_FILE.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'dim': DIM,
+                        'n_docs': n_docs,
+                        'doc_freq': doc_freq,
+                        'interest': {k: round(v, 5) for k, v in interest.items()},
+                        'seen': list(seen),
+                    }, f)
+                tmp_file.replace(RELEVANCE_FILE)
+        except Exception as e:
+            print(f"Save taste vector error: {e}")
+            return
+        self.n_docs, self.doc_freq, self.interest, self.seen = n_docs, doc_freq, interest, seen
+        self._idf_cache.clear()
+        self._reset_pending()
+
+    def _seed(self) -> None:
+        """冷启动：用种子关键词初始化兴趣"""
+        for category, keywords in SEED_KEYWORDS.items():
+            weight = SEED_WEIGHTS.get(category, 0.5)
+            for kw in keywords:
+                self.learn_text(kw, weight)
+
+    # ===== 向量 =====
+
+    @staticmethod
+    def featurize(papers: Iterable[Dict]) -> List[Dict[int, float]]:
+        """论文 → 哈希词频（observe 和 score 共用，避免重复切词）"""
+        return [paper_features(p) for p in papers]
+
+    def observe(self, features: Iterable[Dict[int, float]], doc_ids: Iterable[str]) -> None:
+        """把候选论文计入文档频率（IDF 随抓取量增长），已经计入过的论文 ID 跳过"""
+        for counts, doc_id in zip(features, doc_ids):
+            key = _doc_key(doc_id)
+            if key in self.seen or key in self._new_docs:
+                continue
+            self._new_docs[key] = list(counts)
+            self.n_docs += 1
+            for b in counts:
+                self.doc_freq[b] = self.doc_freq.get(b, 0) + 1
+        self._idf_cache.clear()
+
+    def _idf(self, b: int) -> float:
+        idf = self._idf_cache.get(b)
+        if idf is None:
+            idf = self._idf_cache[b] = math.log((1 + self.n_docs) / (1 + self.doc_freq.get(b, 0))) + 1
+        return idf
+
+    def _weigh(self, counts: Dict[int, float]) -> Dict[int, float]:
+        """词频 → 对数 TF × IDF，再做 L2 归一化"""
+        vec = {b: (1 + math.log(c)) * self._idf(b) for b, c in counts.items() if c > 0}
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        if not norm:
+            return {}
+        return {b: v / norm for b, v in vec.items()}
+
+    def vectorize(self, paper: Dict) -> Dict[int, float]:
+        return self._weigh(paper_features(paper))
+
+    # ===== 学习 =====
+
+    def _add(self, vec: Dict[int, float], weight: float) -> None:
+        delta = {b: weight * v for b, v in vec.items()}
+        _merge(self.interest, delta)
+        for b, d in delta.items():
+            self._interest_delta[b] = self._interest_delta.get(b, 0.0) + d
+
+    def learn(self, paper: Dict, weight: float) -> None:
+        """weight > 0 表示喜欢，< 0 表示不喜欢"""
+        self._add(self.vectorize(paper), weight)
+
+    def learn_text(self, text: str, weight: float) -> None:
+        """用一段文字（关键词、标签）调整兴趣"""
+        self._add(self._weigh(text_features(text)), weight)
+
+    def decay(self, rate: float) -> None:
+        self.interest = _decayed(self.interest, rate)
+        # 保存时先对文件里的兴趣乘上累计的衰减，再加上（同样衰减过的）增量
+        self._decay *= rate
+        self._interest_delta = {b: d * rate for b, d in self._interest_delta.items()}
+
+    # ===== 打分 =====
+
+    def score(self, features: List[Dict[int, float]]) -> List[float]:
+        """每篇论文（featurize 的结果）与兴趣向量的余弦相似度（-1 ~ 1）"""
+        if not features:
+            return []
+        norm = math.sqrt(sum(v * v for v in self.interest.values()))
+        if not norm:
+            return [0.0] * len(features)
+
+        if np is not None:
+            return self._score_matrix(features, norm)
+
+        # 没有 numpy：逐篇算 TF-IDF 的模长和与兴趣向量的点积
+        interest = self.interest
+        idf = self._idf
+        log = math.log
+        scores = []
+        for counts in features:
+            dot = 0.0
+            square = 0.0
+            for b, c in counts.items():
+                v = (1 + log(c)) * idf(b)
+                square += v * v
+                w = interest.get(b)
+                if w is not None:
+                    dot += v * w
+            scores.append(dot / (math.sqrt(square) * norm) if square else 0.0)
+        return scores
+
+    def _score_matrix(self, features: List[Dict[int, float]], norm: float) -> List[float]:
+        """TF-IDF 矩阵 × 兴趣向量，一次算完"""
+        n = len(features)
+        lengths = np.fromiter((len(c) for c in features), dtype=np.intp, count=n)
+        total = int(lengths.sum())
+        rows = np.repeat(np.arange(n), lengths)
+        cols = np.fromiter(chain.from_iterable(features), dtype=np.intp, count=total)
+        vals = np.fromiter(chain.from_iterable(c.values() for c in features),
+                           dtype=np.float32, count=total)
+        tf = np.zeros((n, DIM), dtype=np.float32)
+        tf[rows, cols] = 1 + np.log(vals)
+
+        df = np.zeros(DIM, dtype=np.float32)
+        df[np.fromiter(self.doc_freq.keys(), dtype=np.intp)] = \
+            np.fromiter(self.doc_freq.values(), dtype=np.float32)
+        idf = np.log((1 + self.n_docs) / (1 + df)) + 1
+
+        interest = np.zeros(DIM, dtype=np.float32)
+        interest[np.fromiter(self.interest.keys(), dtype=np.intp)] = \
+            np.fromiter(self.interest.values(), dtype=np.float32)
+
+        matrix = tf * idf
+        row_norms = np.linalg.norm(matrix, axis=1)
+        row_norms[row_norms == 0] = 1
+        return (matrix @ interest / (row_norms * norm)).tolist()
@@ -0,0 +1,327 @@
+"""
+search_index.py - 本地全文检索
+笔记、收藏、聊天记录和历史论文都写进一个 SQLite 倒排索引（有 FTS5 用 FTS5，没有就退化成 LIKE）；
+中文按相邻两字切分，英文按单词切分，保存笔记/收藏/聊天/摘要时增量更新
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .config import SAVE_DIR, CHAT_HISTORY_FILE
+from .archive import get_archive
+
+SEARCH_INDEX_FILE = SAVE_DIR / 'search_index.db'
+SCHEMA_VERSION = 1
+
+MAX_RESULTS = 50
+SNIPPET_CHARS = 60
+
+# 中日韩统一表意文字（含扩展 A、兼容区）和假名
+_CJK = '぀-ヿ㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(f'[{_CJK}]+|[a-z0-9]+')
+_CJK_RE = re.compile(f'[{_CJK}]')
+
+KIND_LABELS = {
+    'note': '笔记',
+    'bookmark': '收藏',
+    'chat': '聊天',
+    'paper': '论文',
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """中英混排切词：英文/数字按单词（小写），中文连续片段切成相邻两字"""
+    tokens = []
+    for run in _TOKEN_RE.findall((text or '').lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def make_snippet(body: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """截取第一个命中词附近的一段正文"""
+    text = ' '.join((body or '').split())
+    lower = text.lower()
+    pos = -1
+    for word in _TOKEN_RE.findall((query or '').lower()):
+        pos = lower.find(word)
+        if pos >= 0:
+            break
+    if pos < 0:
+        return text[:width] + ('...' if len(text) > width else '')
+    start = max(0, pos - width // 3)
+    end = min(len(text), start + width)
+    return ('...' if start else '') + text[start:end] + ('...' if end < len(text) else '')
+
+
+class SearchIndex:
+    """全文索引
+
+    每条文档由 key 唯一确定（如 note:/path/to.txt、paper:2401.00001、chat:2025-01-01:3），
+    重复写入同一个 key 就是更新。可以在后台线程里调用。
+    """
+
+    def __init__(self, path=SEARCH_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        SAVE_DIR.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.fts = self._has_fts5()
+        self._create_tables()
+
+    # ===== 建表 =====
+
+    def _has_fts5(self) -> bool:
+        try:
+            self.conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x)')
+            self.conn.execute('DROP TABLE temp._fts5_probe')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _create_tables(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)')
+            row = self.conn.execute("SELECT v FROM meta WHERE k = 'version'").fetchone()
+            if row and row[0] != str(SCHEMA_VERSION):
+                self.conn.execute('DROP TABLE IF EXISTS docs')
+                self.conn.execute('DROP TABLE IF EXISTS docs_fts')
+                self.conn.execute("DELETE FROM meta WHERE k = 'built'")
+
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                title TEXT,
+                date TEXT,
+                url TEXT,
+                ref TEXT,
+                body TEXT,
+                tokens TEXT)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS docs_kind_date ON docs (kind, date)')
+            if self.fts:
+                # rowid 与 docs.id 对应；已经切好词，用空格分隔即可
+                self.conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts '
+                                  'USING fts5(tokens, kind UNINDEXED, tokenize="unicode61")')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                              (str(SCHEMA_VERSION),))
+
+    # ===== 写入 =====
+
+    def add(self, key: str, kind: str, title: str, body: str = '', date: str = '',
+            url: str = '', ref: str = '') -> None:
+        """写入或更新一条文档"""
+        self.add_many([(key, kind, title, body, date, url, ref)])
+
+    def add_many(self, docs: Iterable[tuple]) -> None:
+        """批量写入 (key, kind, title, body, date, url, ref)，一个事务提交"""
+        try:
+            with self._lock, self.conn:
+                for key, kind, title, body, date, url, ref in docs:
+                    tokens = ' '.join(tokenize(f'{title}\n{body}'))
+                    self._delete(key)
+                    cur = self.conn.execute(
+                        'INSERT INTO docs (key, kind, title, date, url, ref, body, tokens) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (key, kind, title, date, url, ref, body, tokens))
+                    if self.fts:
+                        self.conn.execute('INSERT INTO docs_fts (rowid, tokens, kind) '
+                                          'VALUES (?, ?, ?)', (cur.lastrowid, tokens, kind))
+        except sqlite3.Error as e:
+            print(f"Search index write error: {e}")
+
+    def remove(self, key: str) -> None:
+        try:
+            with self._lock, self.conn:
+                self._delete(key)
+        except sqlite3.Error as e:
+            print(f"Search index delete error: {e}")
+
+    def _delete(self, key: str) -> None:
+        row = self.conn.execute('SELECT id FROM docs WHERE key = ?', (key,)).fetchone()
+        if row:
+            self.conn.execute('DELETE FROM docs WHERE id = ?', row)
+            if self.fts:
+                self.conn.execute('DELETE FROM docs_fts WHERE rowid = ?', row)
+
+    # ===== 各类文档 =====
+
+    def index_note(self, note: Dict) -> None:
+        """note 需要 filepath/title/date/url/content"""
+        self.add(f"note:{note['filepath']}", 'note', note.get('title', ''),
+                 note.get('content', ''), note.get('date', ''), note.get('url', ''),
+                 note['filepath'])
+
+    def remove_note(self, filepath: str) -> None:
+        self.remove(f'note:{filepath}')
+
+    @staticmethod
+    def _bookmark_doc(bookmark: Dict) -> tuple:
+        title = bookmark.get('title_cn') or bookmark.get('title', '')
+        body = '\n'.join([bookmark.get('title', ''), ' '.join(bookmark.get('tags', [])),
+                          bookmark.get('comment', '')])
+        return (f"bookmark:{bookmark['id']}", 'bookmark', title, body,
+                (bookmark.get('bookmarked_at') or '')[:10], bookmark.get('url', ''),
+                bookmark['id'])
+
+    def index_bookmark(self, bookmark: Dict) -> None:
+        self.add_many([self._bookmark_doc(bookmark)])
+
+    def remove_bookmark(self, paper_id: str) -> None:
+        self.remove(f'bookmark:{paper_id}')
+
+    @staticmethod
+    def _paper_doc(paper: Dict, date: str) -> tuple:
+        paper_id = paper.get('id', paper.get('title', ''))
+        title = paper.get('title_cn') or paper.get('title', '')
+        body = '\n'.join([paper.get('title', ''), ' '.join(paper.get('authors', [])),
+                          ' '.join(paper.get('tags', [])), paper.get('comment', ''),
+                          paper.get('abstract', '')])
+        return (f'paper:{paper_id}', 'paper', title, body, date,
+                paper.get('url', ''), paper_id)
+
+    def index_papers(self, papers: List[Dict], date: str) -> None:
+        self.add_many(self._paper_doc(p, date) for p in papers)
+
+    @staticmethod
+    def _chat_doc(date: str, n: int, conv: Dict) -> tuple:
+        user = conv.get('user', '')
+        body = f"{user}\n{conv.get('assistant', '')}"
+        return (f'chat:{date}:{n}', 'chat', user[:40], body, date, '', f'{date}:{n}')
+
+    def index_conversation(self, date: str, n: int, conv: Dict) -> None:
+        """第 n 轮对话（同一天内从 0 开始编号）"""
+        self.add_many([self._chat_doc(date, n, conv)])
+
+    # ===== 全量重建 =====
+
+    def is_built(self) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT v FROM meta WHERE k = 'built'").fetchone()
+        return bool(row)
+
+    def rebuild(self, notes: List[Dict] = (), bookmarks: List[Dict] = ()) -> None:
+        """从现有文件重建整个索引（第一次使用或索引损坏时）"""
+        docs = []
+        for note in notes:
+            docs.append((f"note:{note['filepath']}", 'note', note.get('title', ''),
+                         note.get('content', ''), note.get('date', ''), note.get('url', ''),
+                         note['filepath']))
+        docs.extend(self._bookmark_doc(b) for b in bookmarks)
+
+        try:
+            with open(CHAT_HISTORY_FILE, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+            for date, day in history.items():
+                if isinstance(day, dict):
+                    for n, conv in enumerate(day.get('conversations', [])):
+                        docs.append(self._chat_doc(date, n, conv))
+        except:
+            pass
+
+        try:
+            docs.extend(self._paper_doc(p, date) for date, p in get_archive().iter_all())
+        except Exception as e:
+            print(f"Search index archive error: {e}")
+
+        try:
+            with self._lock, self.conn:
+                self.conn.execute('DELETE FROM docs')
+                if self.fts:
+                    self.conn.execute('DELETE FROM docs_fts')
+        except sqlite3.Error as e:
+            print(f"Search index rebuild error: {e}")
+            return
+        self.add_many(docs)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', '1')")
+
+    # ===== 查询 =====
+
+    @staticmethod
+    def _match_expr(query: str) -> str:
+        """每个中文片段是一个短语（相邻两字依次出现），英文单词各自匹配；
+        最后一个词边输入边搜，按前缀匹配（单个汉字也只能按前缀匹配二元词）"""
+        runs = _TOKEN_RE.findall(query.lower())
+        terms = []
+        for n, run in enumerate(runs):
+            tokens = tokenize(run)
+            phrase = '"' + ' '.join(tokens).replace('"', '""') + '"'
+            last = n == len(runs) - 1
+            if last and (not _CJK_RE.match(run) or len(run) == 1):
+                phrase += '*'
+            terms.append(phrase)
+        return ' '.join(terms)
+
+    def search(self, query: str, kinds: List[str] = None, limit: int = MAX_RESULTS) -> List[Dict]:
+        """按相关度返回命中的文档"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        kind_filter = ''
+        params: list = []
+        if kinds:
+            kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})"
+            params = list(kinds)
+
+        try:
+            with self._lock:
+                if self.fts:
+                    # 先在倒排表里排序取前 limit 条，再回表取内容
+                    rows = self.conn.execute(
+                        'SELECT d.key, d.kind, d.title, d.date, d.url, d.ref, d.body '
+                        'FROM (SELECT rowid, rank FROM docs_fts '
+                        f'      WHERE docs_fts MATCH ?{kind_filter} ORDER BY rank LIMIT ?) hit '
+                        'JOIN docs d ON d.id = hit.rowid ORDER BY hit.rank',
+                        [self._match_expr(query)] + params + [limit]).fetchall()
+                else:
+                    likes = ' AND '.join(["(' ' || tokens || ' ') LIKE ?"] * len(tokens))
+                    patterns = [f'% {t} %' for t in tokens]
+                    patterns[-1] = f'% {tokens[-1]}%'
+                    rows = self.conn.execute(
+                        'SELECT key, kind, title, date, url, ref, body '
+                        f'FROM docs WHERE {likes}{kind_filter} ORDER BY date DESC LIMIT ?',
+                        patterns + params + [limit]).fetchall()
+        except sqlite3.Error as e:
+            print(f"Search error: {e}")
+            return []
+
+        return [{
+            'key': key,
+            'kind': kind,
+            'title': title,
+            'date': date,
+            'url': url,
+            'ref': ref,
+            'snippet': make_snippet(body, query),
+        } for key, kind, title, date, url, ref, body in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """进程内共享的索引；打不开时返回 None，调用方跳过索引即可"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = SearchIndex()
+            except Exception as e:
+                print(f"Search index unavailable: {e}")
+                return None
+        return _index
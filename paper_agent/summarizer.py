@@ -1,54 +1,53 @@
 import os
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
 
 from .config import (
     ANTHROPIC_MODEL, SUMMARIZE_TEMPERATURE, CHAT_TEMPERATURE,
     SCHOLAR_SYSTEM_PROMPT, CHAT_SYSTEM_PROMPT_ADDON,
-    MAX_DEEP_READ, PAPER_DATA_FILE, TASTE_PROFILE_FILE
+    TRIAGE_SYSTEM_PROMPT, DEEP_READ_SYSTEM_PROMPT,
+    MAX_PAPERS_PER_DAY, MAX_DEEP_READ, TASTE_PROFILE_FILE,
+    TRIAGE_BATCH_SIZE, TRIAGE_ABSTRACT_CHARS, TRIAGE_DEFAULT_SCORE, LLM_MAX_CONCURRENCY
 )
 from .api_key_manager import get_api_key
+from .search_index import get_search_index
+from .archive import get_archive
+from .debug_log import get_logger
+from .metering import (create_message, acreate_message, BudgetExceeded,
+                       FEATURE_TRIAGE, FEATURE_SUMMARIZE, FEATURE_DEEP_READ, FEATURE_CHAT)
+
+log = get_logger('summarizer')
+
+BUDGET_EXCEEDED_REPLY = "今天的 AI 额度用完啦，明天再聊吧 😴"
 
 
 class PaperSummarizer:
     def __init__(self):
-        # 调试日志
-        from pathlib import Path
-        log_file = Path.home() / '.xiaotiepi' / 'debug.log'
-        def log(msg):
-            try:
-                with open(log_file, 'a') as f:
-                    f.write(f"[summarizer] {msg}\n")
-            except:
-                pass
-
         self.api_key = get_api_key()
-        log(f"api_key found: {bool(self.api_key)}")
+        log.debug('api_key found: %s', bool(self.api_key))
 
         self.client = None
         if self.api_key:
             try:
-                log("step 1: importing anthropic...")
+                log.debug('step 1: importing anthropic...')
                 import anthropic
-                log(f"step 2: anthropic imported, version: {anthropic.__version__}")
+                log.debug('step 2: anthropic imported, version: %s', anthropic.__version__)
             except BaseException as e:
-                import traceback
-                log(f"IMPORT FAILED: {type(e).__name__}: {e}")
-                log(traceback.format_exc())
+                log.error('IMPORT FAILED: %s: %s', type(e).__name__, e, exc_info=True)
                 return
 
             try:
-                log("step 3: creating Anthropic client...")
-                self.client = anthropic.Anthropic(api_key=self.api_key)
-                log("step 4: client created OK")
+                log.debug('step 3: creating Anthropic client...')
+                # 429/529 由 llm_scheduler 统一退避重试
+                self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+                log.debug('step 4: client created OK')
             except BaseException as e:
-                import traceback
-                log(f"CLIENT FAILED: {type(e).__name__}: {e}")
-                log(traceback.format_exc())
+                log.error('CLIENT FAILED: %s: %s', type(e).__name__, e, exc_info=True)
         else:
-            log("no api_key, skipping client creation")
+            log.info('no api_key, skipping client creation')
 
     def _get_taste_addon(self) -> str:
         if not TASTE_PROFILE_FILE.exists():
@@ -77,6 +76,56 @@ class PaperSummarizer:
         except:
             return ""
 
+    # ===== 初筛 =====
+
+    def triage_papers(self, papers: List[Dict], top_k: int = MAX_PAPERS_PER_DAY) -> List[Dict]:
+        """只看标题和截断的摘要给候选论文批量打分，返回分数最高的 top_k 篇
+
+        papers 已按本地相关度排好序；没有 API、额度用完或某批解析失败时按本地顺序补位
+        """
+        if len(papers) <= top_k or not self.client:
+            return papers[:top_k]
+
+        system_prompt = TRIAGE_SYSTEM_PROMPT + self._get_taste_addon()
+        batches = [papers[i:i + TRIAGE_BATCH_SIZE] for i in range(0, len(papers), TRIAGE_BATCH_SIZE)]
+        # 各批并发（实际并发数由 llm_scheduler 控制）
+        with ThreadPoolExecutor(max_workers=min(len(batches), LLM_MAX_CONCURRENCY)) as pool:
+            scores = [s for batch in pool.map(lambda b: self._triage_batch(b, system_prompt), batches)
+                      for s in batch]
+
+        order = sorted(range(len(papers)),
+                       key=lambda i: (-(scores[i] or TRIAGE_DEFAULT_SCORE), i))[:top_k]
+        for i in order:
+            if scores[i] is not None:
+                papers[i]['triage_score'] = scores[i]
+        print(f"Triage: {len(papers)} -> {len(order)} papers")
+        return [papers[i] for i in order]
+
+    def _triage_batch(self, papers: List[Dict], system_prompt: str) -> List[Optional[int]]:
+        """一批论文的初筛分数（失败时全为 None）"""
+        papers_text = "\n\n".join(
+            f"{i+1}. {p['title']}\n{p['abstract'][:TRIAGE_ABSTRACT_CHARS]}" for i, p in enumerate(papers))
+        try:
+            message = create_message(
+                self.client, FEATURE_TRIAGE,
+                model=ANTHROPIC_MODEL,
+                max_tokens=4 * len(papers) + 32,
+                system=system_prompt,
+                messages=[{"role": "user", "content": f"给以下{len(papers)}篇论文打分：\n\n{papers_text}"}],
+                temperature=0,
+            )
+            scores = self._parse_json_response(message.content[0].text)
+        except Exception as e:
+            print(f"Triage error: {e}")
+            return [None] * len(papers)
+
+        if len(scores) != len(papers):
+            print(f"Triage: got {len(scores)} scores for {len(papers)} papers, using local order")
+            return [None] * len(papers)
+        return [max(1, min(5, int(s))) if isinstance(s, (int, float)) else None for s in scores]
+
+    # ===== 总结 =====
+
     def summarize_papers(self, papers: List[Dict]) -> List[Dict]:
         if not self.client:
             return self._fallback_summarize(papers)
@@ -88,7 +137,8 @@ class PaperSummarizer:
         system_prompt = SCHOLAR_SYSTEM_PROMPT + self._get_taste_addon()
 
         try:
-            message = self.client.messages.create(
+            message = create_message(
+                self.client, FEATURE_SUMMARIZE,
                 model=ANTHROPIC_MODEL,
                 max_tokens=4096,
                 system=system_prompt,
@@ -127,6 +177,39 @@ class PaperSummarizer:
             print(f"Summarize error: {e}")
             return self._fallback_summarize(papers)
 
+    # ===== 精读 =====
+
+    def deep_read_papers(self, papers: List[Dict]) -> List[Dict]:
+        """给精读推荐的论文（最多 MAX_DEEP_READ 篇）单独写一份更长的精读解读（deep_summary）"""
+        picks = [p for p in papers if p.get('deep_read')][:MAX_DEEP_READ]
+        if not picks or not self.client:
+            return papers
+
+        papers_text = ""
+        for i, p in enumerate(picks):
+            papers_text += (f"\n### 论文 {i+1}\n标题：{p['title']}\n作者：{', '.join(p.get('authors', []))}\n"
+                            f"摘要：{p['abstract']}\n")
+
+        try:
+            message = create_message(
+                self.client, FEATURE_DEEP_READ,
+                model=ANTHROPIC_MODEL,
+                max_tokens=1024 * len(picks),
+                system=DEEP_READ_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": f"请精读以下{len(picks)}篇论文：\n{papers_text}"}],
+                temperature=SUMMARIZE_TEMPERATURE,
+            )
+            results = self._parse_json_response(message.content[0].text)
+        except Exception as e:
+            print(f"Deep read error: {e}")
+            return papers
+
+        if len(results) == len(picks):
+            for paper, result in zip(picks, results):
+                if isinstance(result, dict) and result.get('deep_summary'):
+                    paper['deep_summary'] = result['deep_summary']
+        return papers
+
     def _parse_json_response(self, text: str) -> List[Dict]:
         text = text.strip()
 
@@ -159,12 +242,10 @@ class PaperSummarizer:
             paper['fetched_at'] = datetime.now().isoformat()
         return papers
 
-    def chat(self, user_message: str, papers: List[Dict], history: List[Dict] = None) -> str:
-        if not self.client:
-            return "抱歉，AI 服务暂时不可用 😔"
-
+    def _chat_request(self, user_message: str, papers: List[Dict], history: List[Dict] = None) -> Dict:
+        """chat / achat 共用的请求参数"""
         papers_context = "\n".join([
-            f"【{p.get('title_cn', p['title'])}】\n{p.get('summary', p['abstract'][:300])}\n"
+            f"【{p.get('title_cn', p['title'])}】\n{p.get('deep_summary') or p.get('summary', p['abstract'][:300])}\n"
             for p in papers if p.get('deep_read') or p.get('interest_score', 0) >= 4
         ])
 
@@ -176,25 +257,52 @@ class PaperSummarizer:
                 messages.append({"role": h['role'], "content": h['content']})
         messages.append({"role": "user", "content": user_message})
 
+        return {
+            'model': ANTHROPIC_MODEL,
+            'max_tokens': 1024,
+            'system': system_prompt,
+            'messages': messages,
+            'temperature': CHAT_TEMPERATURE,
+        }
+
+    def chat(self, user_message: str, papers: List[Dict], history: List[Dict] = None,
+             feature: str = FEATURE_CHAT) -> str:
+        if not self.client:
+            return "抱歉，AI 服务暂时不可用 😔"
+
         try:
-            message = self.client.messages.create(
-                model=ANTHROPIC_MODEL,
-                max_tokens=1024,
-                system=system_prompt,
-                messages=messages,
-                temperature=CHAT_TEMPERATURE,
-            )
+            message = create_message(self.client, feature,
+                                     **self._chat_request(user_message, papers, history))
             return message.content[0].text
+        except BudgetExceeded:
+            return BUDGET_EXCEEDED_REPLY
         except Exception as e:
             return f"出错了：{e}"
 
-    def save_summarized_papers(self, papers: List[Dict]) -> None:
-        data = {
-            'last_fetch_date': datetime.now().strftime('%Y-%m-%d'),
-            'today_papers': papers,
-            'briefing_delivered': False,
-            'briefing_text': None
-        }
+    async def achat(self, user_message: str, papers: List[Dict], history: List[Dict] = None,
+                    feature: str = FEATURE_CHAT, owner=None) -> str:
+        """chat 的异步版本（在 async_bridge 的事件循环里用），每次用完就关掉连接；owner 关闭时取消排队"""
+        if not self.client:
+            return "抱歉，AI 服务暂时不可用 😔"
+
+        import anthropic
+        client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=0)
+        try:
+            message = await acreate_message(client, feature, owner,
+                                            **self._chat_request(user_message, papers, history))
+            return message.content[0].text
+        except BudgetExceeded:
+            return BUDGET_EXCEEDED_REPLY
+        except Exception as e:
+            return f"出错了：{e}"
+        finally:
+            await client.close()
+
+    def save_summarized_papers(self, papers: List[Dict], date: Optional[str] = None) -> None:
+        today = date or datetime.now().strftime('%Y-%m-%d')
+        get_archive().save_day(today, papers)
 
-        with open(PAPER_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # 当天论文写入全文索引
+        index = get_search_index()
+        if index:
+            index.index_papers(papers, today)
@@ -6,12 +6,14 @@ from .config import (
     TASTE_PROFILE_FILE, TASTE_DECAY_RATE, EVOLVED_KEYWORD_THRESHOLD,
     SEED_KEYWORDS, SAVE_DIR
 )
+from .relevance import RelevanceModel
 
 
 class TasteProfile:
     def __init__(self):
         SAVE_DIR.mkdir(parents=True, exist_ok=True)
         self.data = self._load()
+        self.relevance = RelevanceModel()
 
     def _load(self) -> Dict:
         if TASTE_PROFILE_FILE.exists():
@@ -32,8 +34,11 @@ class TasteProfile:
 
     def save(self) -> None:
         self.data['updated_at'] = datetime.now().isoformat()
-        with open(TASTE_PROFILE_FILE, 'w', encoding='utf-8') as f:
+        tmp_file = TASTE_PROFILE_FILE.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(self.data, f, ensure_ascii=False, indent=2)
+        tmp_file.replace(TASTE_PROFILE_FILE)
+        self.relevance.save()
 
     def update_from_papers(self, papers: List[Dict]) -> None:
         tag_scores = self.data.get('tag_scores', {})
@@ -47,6 +52,9 @@ class TasteProfile:
             for tag in tags:
                 tag_scores[tag] = tag_scores.get(tag, 0) + score
 
+            # 评分 1~5 → 兴趣向量 -1~+1
+            self.relevance.learn(paper, (score - 3) / 2)
+
             if score >= 4:
                 for author in authors[:3]:
                     fav_authors[author] = fav_authors.get(author, 0) + 1
@@ -112,6 +120,7 @@ class TasteProfile:
 
         tag_scores = {k: v for k, v in tag_scores.items() if v >= 0.5}
         self.data['tag_scores'] = tag_scores
+        self.relevance.decay(TASTE_DECAY_RATE)
 
         self.data['last_decay_week'] = current_week
 
@@ -122,6 +131,7 @@ class TasteProfile:
             tag_scores[tag] = 1.0
         tag_scores[tag] = min(10.0, tag_scores[tag] + amount)
         self.data['tag_scores'] = tag_scores
+        self.relevance.learn_text(tag, amount)
 
     def reduce_tag(self, tag: str, amount: float = 0.3) -> None:
         """减少某个标签的兴趣权重（用户点👎）"""
@@ -129,6 +139,15 @@ class TasteProfile:
         if tag in tag_scores:
             tag_scores[tag] = max(0.1, tag_scores[tag] - amount)
             self.data['tag_scores'] = tag_scores
+        self.relevance.learn_text(tag, -amount)
+
+    def record_feedback(self, paper: Dict, liked: bool) -> None:
+        """👍/👎 一篇论文：整篇摘要和作者都计入兴趣向量"""
+        self.relevance.learn(paper, 1.0 if liked else -1.0)
+
+    def rank(self, papers: List[Dict]) -> List[float]:
+        """候选论文与口味的相似度（和 papers 一一对应）"""
+        return self.relevance.score(self.relevance.featurize(papers))
 
     def get_top_interests(self, n: int = 5) -> List[tuple]:
         tag_scores = self.data.get('tag_scores', {})
@@ -0,0 +1,266 @@
+"""
+virtual_list.py - 虚拟化卡片列表
+只为可见区域内的条目创建卡片，滚动出去的卡片回收复用；
+条目高度测量一次后缓存，成千上万条也能瞬间打开
+"""
+
+import tkinter as tk
+from typing import Callable, Dict, List, Optional
+
+OVERSCAN = 200          # 可见区上下多渲染的像素，滚动时不露白
+DEFAULT_HEIGHT = 120    # 还没测量过的条目按这个高度估算
+PAD_X = 10
+PAD_Y = 5
+
+
+class HeightIndex:
+    """条目高度的树状数组：改高度、求前缀和、按偏移找条目都是 O(log n)"""
+
+    def __init__(self, heights: List[int] = None):
+        self.heights: List[int] = []
+        self.tree: List[int] = [0]
+        for h in heights or []:
+            self.append(h)
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+    def append(self, height: int) -> None:
+        self.heights.append(height)
+        n = len(self.heights)
+        low = n & -n
+        # tree[n] 覆盖 (n - low, n] 这一段
+        self.tree.append(self.prefix(n - 1) - self.prefix(n - low) + height)
+
+    def update(self, index: int, height: int) -> None:
+        delta = height - self.heights[index]
+        if not delta:
+            return
+        self.heights[index] = height
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> int:
+        """前 count 个条目的高度和（即第 count 个条目的顶部偏移）"""
+        total = 0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def total(self) -> int:
+        return self.prefix(len(self.heights))
+
+    def find(self, offset: int) -> int:
+        """包含 offset 的条目序号（超出末尾时返回最后一个）"""
+        n = len(self.heights)
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and self.tree[nxt] <= offset:
+                pos = nxt
+                offset -= self.tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+
+class Row:
+    """列表中的一条：kind 决定用哪种卡片，key 用于跨视图缓存高度"""
+
+    __slots__ = ('kind', 'data', 'key')
+
+    def __init__(self, kind: str, data, key: str = None):
+        self.kind = kind
+        self.data = data
+        self.key = key
+
+
+class Card:
+    """可回收的卡片基类：构造时建好控件，bind 时换上条目内容"""
+
+    def __init__(self, parent: tk.Widget):
+        self.frame = tk.Frame(parent)
+        self.item_id: Optional[int] = None
+        self.kind = ''
+
+    def bind(self, data) -> None:
+        raise NotImplementedError
+
+
+class VirtualList:
+    """在 Canvas 上按需摆放卡片
+
+    renderers: kind → 卡片类（参数为 Canvas），同一种卡片回收后复用
+    """
+
+    def __init__(self, canvas: tk.Canvas, renderers: Dict[str, Callable[[tk.Widget], Card]],
+                 on_yscroll: Callable = None, estimates: Dict[str, int] = None):
+        self.canvas = canvas
+        self.renderers = renderers
+        self.on_yscroll = on_yscroll
+        self.estimates = estimates or {}
+
+        self.rows: List[Row] = []
+        self.index = HeightIndex()
+        self._measured: Dict[str, int] = {}       # key → 实测高度（跨视图保留）
+        self._row_measured: List[bool] = []
+        self._visible: Dict[int, Card] = {}        # 行号 → 当前显示的卡片
+        self._pools: Dict[str, List[Card]] = {}
+        self._width = 1
+        self._region = None
+        self._refresh_job = None
+
+        canvas.configure(yscrollcommand=self._on_yscroll)
+        canvas.bind('<Configure>', self._on_configure, add='+')
+
+    # ===== 内容 =====
+
+    def set_rows(self, rows: List[Row]) -> None:
+        """替换全部条目，回到顶部"""
+        self._release_all()
+        self.rows = list(rows)
+        self._rebuild_index()
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def append(self, row: Row) -> None:
+        self.rows.append(row)
+        height, measured = self._cached_height(row)
+        self.index.append(height)
+        self._row_measured.append(measured)
+        self.refresh()
+
+    def remove(self, data) -> None:
+        """移除 data 对应的条目"""
+        for i, row in enumerate(self.rows):
+            if row.data is data:
+                self._release_all()
+                del self.rows[i]
+                self._rebuild_index()
+                self.refresh()
+                return
+
+    def clear(self) -> None:
+        self.set_rows([])
+
+    def rebind_visible(self) -> None:
+        """条目数据变了（比如收藏状态），重新绑定可见卡片"""
+        for i, card in self._visible.items():
+            card.bind(self.rows[i].data)
+
+    def scroll_to_end(self) -> None:
+        self.refresh()
+        self.canvas.yview_moveto(1.0)
+        self.refresh()
+
+    # ===== 布局 =====
+
+    def _cached_height(self, row: Row):
+        if row.key is not None and row.key in self._measured:
+            return self._measured[row.key], True
+        return self.estimates.get(row.kind, DEFAULT_HEIGHT), False
+
+    def _rebuild_index(self) -> None:
+        self.index = HeightIndex()
+        self._row_measured = []
+        for row in self.rows:
+            height, measured = self._cached_height(row)
+            self.index.append(height)
+            self._row_measured.append(measured)
+
+    def _on_yscroll(self, first, last) -> None:
+        if self.on_yscroll:
+            self.on_yscroll(first, last)
+        if self._refresh_job is None:
+            self._refresh_job = self.canvas.after_idle(self._idle_refresh)
+
+    def _idle_refresh(self) -> None:
+        self._refresh_job = None
+        self.refresh()
+
+    def _on_configure(self, event) -> None:
+        if event.width != self._width:
+            self._width = event.width
+            for card in self._visible.values():
+                self.canvas.itemconfig(card.item_id, width=self._card_width())
+        self.refresh()
+
+    def _card_width(self) -> int:
+        return max(1, self._width - PAD_X * 2)
+
+    def _viewport(self):
+        top = self.canvas.canvasy(0)
+        return top, top + max(1, self.canvas.winfo_height())
+
+    def refresh(self) -> None:
+        """只让与可见区相交的条目有卡片"""
+        if not self.rows:
+            self._release_all()
+            self._set_region(0)
+            return
+
+        # 新测量的高度可能改变可见范围，最多迭代几次直到稳定
+        for _ in range(3):
+            top, bottom = self._viewport()
+            first = self.index.find(max(0, int(top) - OVERSCAN))
+            last = self.index.find(int(bottom) + OVERSCAN)
+
+            for i in [i for i in self._visible if i < first or i > last]:
+                self._release(i)
+
+            changed = False
+            for i in range(first, last + 1):
+                if i not in self._visible:
+                    changed |= self._materialize(i)
+            if not changed:
+                break
+
+        for i, card in self._visible.items():
+            self.canvas.coords(card.item_id, PAD_X, self.index.prefix(i) + PAD_Y)
+        self._set_region(self.index.total())
+
+    def _set_region(self, height: int) -> None:
+        # 只在变化时设置，避免 scrollregion → yscrollcommand → refresh 的循环
+        region = (0, 0, self._width, height)
+        if region != self._region:
+            self._region = region
+            self.canvas.configure(scrollregion=region)
+
+    def _materialize(self, i: int) -> bool:
+        """给第 i 行取一张卡片，返回高度估计是否被修正"""
+        row = self.rows[i]
+        pool = self._pools.setdefault(row.kind, [])
+        card = pool.pop() if pool else self.renderers[row.kind](self.canvas)
+        card.kind = row.kind
+        card.bind(row.data)
+
+        if card.item_id is None:
+            card.item_id = self.canvas.create_window(
+                PAD_X, 0, window=card.frame, anchor='nw', width=self._card_width())
+        else:
+            self.canvas.itemconfig(card.item_id, state='normal', width=self._card_width())
+        self._visible[i] = card
+
+        if self._row_measured[i]:
+            return False
+        card.frame.update_idletasks()
+        height = card.frame.winfo_reqheight() + PAD_Y * 2
+        self._row_measured[i] = True
+        if row.key is not None:
+            self._measured[row.key] = height
+        if height != self.index.heights[i]:
+            self.index.update(i, height)
+            return True
+        return False
+
+    def _release(self, i: int) -> None:
+        card = self._visible.pop(i)
+        self.canvas.itemconfig(card.item_id, state='hidden')
+        self._pools.setdefault(card.kind, []).append(card)
+
+    def _release_all(self) -> None:
+        for i in list(self._visible):
+            self._release(i)
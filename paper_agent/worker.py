@@ -0,0 +1,171 @@
+"""
+worker.py - 在独立进程里跑论文流水线
+XML/JSON 解析、打分、LLM 响应解析和归档都在子进程里做，不和界面线程抢 GIL；
+子进程通过消息队列汇报阶段进度、单篇结果和错误，主进程定时 poll，只拿最终结果。
+子进程异常退出会自动重启几次，取消时先打招呼、超时再强杀
+（归档是最后一步且是单个事务，强杀不会留下半天的数据）
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+# 消息（子进程 → 主进程）都是 (类型, dict)
+MSG_STAGE = 'stage'          # {'stage', 'seconds', 'count'} 一个阶段跑完
+MSG_PAPER = 'paper'          # {'id', 'title', 'score'} 单篇总结结果
+MSG_DONE = 'done'            # {'date', 'papers'} 最终结果
+MSG_ERROR = 'error'          # {'error', 'traceback'}
+MSG_CANCELLED = 'cancelled'  # {}
+
+FINAL_MESSAGES = (MSG_DONE, MSG_ERROR, MSG_CANCELLED)
+
+MAX_RESTARTS = 2        # 子进程崩溃（没发最终消息就退出）后最多重启几次
+RESTART_DELAY = 5.0     # 重启前等几秒
+CANCEL_GRACE = 3.0      # 取消后等子进程自己退出的时间，超时强杀
+
+Message = Tuple[str, Dict]
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _worker_main(out_queue, cancel_event, learn: bool) -> None:
+    """子进程入口"""
+    from .pipeline import run_daily_pipeline, today_str
+
+    date = today_str()
+
+    def on_stage(name: str, seconds: float, count: int) -> None:
+        out_queue.put((MSG_STAGE, {'stage': name, 'seconds': seconds, 'count': count}))
+        # 归档之前的阶段之间检查取消
+        if cancel_event.is_set() and name != 'archive':
+            raise Cancelled()
+
+    try:
+        papers = run_daily_pipeline(on_stage=on_stage, learn=learn)
+        for paper in papers:
+            out_queue.put((MSG_PAPER, {
+                'id': paper.get('id', ''),
+                'title': paper.get('title_cn') or paper.get('title', ''),
+                'score': paper.get('interest_score'),
+            }))
+        out_queue.put((MSG_DONE, {'date': date, 'papers': papers}))
+    except Cancelled:
+        out_queue.put((MSG_CANCELLED, {}))
+    except Exception as e:
+        out_queue.put((MSG_ERROR, {'error': str(e), 'traceback': traceback.format_exc()}))
+
+
+class PipelineWorker:
+    """论文流水线子进程的监督者
+
+    start() 之后由界面定时调用 poll()（不阻塞），拿到的消息里最后一条是
+    done / error / cancelled 之一，之后 finished 为 True
+    """
+
+    def __init__(self, learn: bool = True, max_restarts: int = MAX_RESTARTS):
+        # spawn：macOS 上 fork 带着 Tk 的进程不安全
+        self.ctx = mp.get_context('spawn')
+        if getattr(sys, 'frozen', False):
+            # 打包后 spawn 执行 "sys.executable --multiprocessing-fork ..."；py2app 的 sys.executable
+            # 是包里的 python 解释器，认不得这个参数，要换成 App 的启动程序（EXECUTABLEPATH），
+            # 这样子进程会走 main.py 开头的 spawn.freeze_support()。PyInstaller 的 sys.executable 就是 App 本身
+            self.ctx.set_executable(os.environ.get('EXECUTABLEPATH') or sys.executable)
+        self.learn = learn
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.finished = False
+        self.process = None
+        self.queue = None
+        self.cancel_event = None
+        self._restart_at: Optional[float] = None
+        self._cancel_deadline: Optional[float] = None
+
+    def start(self) -> None:
+        self.queue = self.ctx.Queue()
+        self.cancel_event = self.ctx.Event()
+        self._spawn()
+
+    def _spawn(self) -> None:
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(self.queue, self.cancel_event, self.learn),
+            name='paper-pipeline',
+            daemon=True,
+        )
+        self.process.start()
+
+    def cancel(self) -> None:
+        """请求取消：子进程在下一个阶段结束时退出，CANCEL_GRACE 秒内没退出就强杀"""
+        if self.finished or self._cancel_deadline is not None:
+            return
+        self.cancel_event.set()
+        self._cancel_deadline = time.monotonic() + CANCEL_GRACE
+
+    def _drain(self, timeout: float = 0.0) -> List[Message]:
+        messages = []
+        while True:
+            try:
+                if timeout:
+                    messages.append(self.queue.get(timeout=timeout))
+                    timeout = 0.0
+                else:
+                    messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                return messages
+            except (EOFError, OSError):
+                return messages
+
+    def poll(self) -> List[Message]:
+        """取出子进程发来的消息，处理崩溃重启和取消超时"""
+        if self.finished:
+            return []
+
+        messages = self._drain()
+        now = time.monotonic()
+
+        if not any(kind in FINAL_MESSAGES for kind, _ in messages):
+            if self._restart_at is not None:
+                if now >= self._restart_at:
+                    self._restart_at = None
+                    print(f"论文流水线子进程重启（第 {self.restarts} 次）")
+                    self._spawn()
+            elif not self.process.is_alive():
+                # 退出前写进队列的消息可能还没读到，再等一下
+                messages.extend(self._drain(timeout=0.2))
+                if not any(kind in FINAL_MESSAGES for kind, _ in messages):
+                    final = self._on_crash(now)
+                    if final:
+                        messages.append(final)
+            elif self._cancel_deadline is not None and now >= self._cancel_deadline:
+                self.process.terminate()
+                messages.append((MSG_CANCELLED, {}))
+
+        if any(kind in FINAL_MESSAGES for kind, _ in messages):
+            self._finish()
+        return messages
+
+    def _on_crash(self, now: float) -> Optional[Message]:
+        exitcode = self.process.exitcode
+        if self._cancel_deadline is not None:
+            return (MSG_CANCELLED, {})
+        if self.restarts < self.max_restarts:
+            self.restarts += 1
+            self._restart_at = now + RESTART_DELAY
+            print(f"论文流水线子进程异常退出（exitcode={exitcode}），{RESTART_DELAY:.0f} 秒后重启")
+            return None
+        return (MSG_ERROR, {'error': f'worker exited with code {exitcode}', 'traceback': ''})
+
+    def _finish(self) -> None:
+        self.finished = True
+        if self.process is not None:
+            self.process.join(timeout=1.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.queue is not None:
+            self.queue.close()
@@ -24,18 +24,106 @@ from save import SaveManager
 from bubble import Bubble, PaperBubbleManager
 from casual_chat_window import CasualChatWindow
 from inventory_window import InventoryWindow
-import threading
+from scheduler import (Scheduler, FrameTimer, FRAME_SECONDS,
+                       PRIORITY_HIGH, PRIORITY_LOW)
+from animation import AnimationStateMachine, StateFlag, StateTimer
+from window_position import WindowPositionManager
+from drag_tracker import DragTracker
+from pixel_font import PixelTextCache, text_width
+from stall_watchdog import StallWatchdog
 from datetime import datetime
 
 
+# 情绪 → 精灵
+EMOTION_SPRITES = {
+    'super_annoyed': 'super_annoyed',
+    'angry': 'angry',
+    'annoyed': 'angry',
+    'sad': 'lonely',
+    'very_sad': 'lonely',
+}
+
+# 深夜被打扰 → 精灵
+SLEEP_DISTURB_SPRITES = {
+    'sleepy': 'sleepy_disturbed',
+    'annoyed': 'annoyed_sleepy',
+    'super_annoyed': 'super_annoyed',
+}
+
+# 走路模式 → 精灵（其余模式用 walk）
+WALK_SPRITES = {'run': 'run', 'hop': 'hop'}
+
+# 待机时（只有呼吸起伏）的刷新间隔
+IDLE_FRAME_SECONDS = 0.1
+# 卡顿后单帧最多补算的帧数
+MAX_FRAME_SCALE = 4.0
+
+# 后台预取论文：按墙上时钟每分钟检查一次（电脑睡眠时单调时钟会停，墙上时钟不会）
+PREFETCH_CHECK_SECONDS = 60
+# 鼠标多久没碰小铁皮才算空闲
+PREFETCH_IDLE_SECONDS = 30
+# 预取失败后隔多久再试
+PREFETCH_RETRY_SECONDS = 30 * 60
+# 论文流水线子进程的消息轮询间隔
+WORKER_POLL_SECONDS = 0.5
+
+
 class Pet:
     """桌面宠物主类"""
 
+    # 帧计时器：以帧数赋值，按墙钟到期（见 scheduler.FrameTimer）
+    season_effect_timer = FrameTimer()
+    walk_pause_timer = FrameTimer()
+    look_timer = FrameTimer()
+    push_glasses_timer = FrameTimer()
+
+    # 动画状态（见 animation.ANIMATION_STATES），is_* 标志直接映射到状态机
+    is_dragging = StateFlag('dragging')
+    is_dizzy = StateFlag('dizzy')
+    is_falling = StateFlag('falling')
+    shake_angry = StateFlag('shake_angry')
+    is_being_comforted = StateFlag('comforted')
+    is_reading_papers = StateFlag('reading')
+    is_yawning = StateFlag('yawn')
+    is_sitting = StateFlag('sit')
+    is_blinking = StateFlag('blink')
+    is_looking_around = StateFlag('look')
+    is_walking = StateFlag('walking')
+    jumping = StateFlag('jump')
+    is_bathing = StateFlag('bath')
+    is_eating = StateFlag('eating')
+    is_playing_game = StateFlag('playing')
+    is_dreaming = StateFlag('dream')
+    happy_event_active = StateFlag('happy_event')
+
+    # 状态计时器：赋值即进入状态，到期自动退出
+    happy_timer = StateTimer('happy')
+    dizzy_timer = StateTimer('dizzy')
+    shake_angry_timer = StateTimer('shake_angry')
+    bath_timer = StateTimer('bath')
+    eat_timer = StateTimer('eating')
+    play_timer = StateTimer('playing')
+    yawn_timer = StateTimer('yawn')
+    sit_timer = StateTimer('sit')
+    sleep_disturb_timer = StateTimer('sleep_disturb')
+    dream_timer = StateTimer('dream')
+    comfort_timer = StateTimer('comforted')
+    happy_event_timer = StateTimer('happy_event')
+
     def __init__(self):
         # 初始化主窗口
         self.root = tk.Tk()
         self.root.title('小铁皮')
 
+        # 统一定时调度（所有循环和倒计时都挂在这里）
+        self.scheduler = Scheduler(self.root)
+        # 主线程卡顿检测（报告写到 ~/.xiaotiepi/stall_report.json）
+        self.watchdog = StallWatchdog(self.scheduler)
+        self.watchdog.start()
+
+        # 动画状态机
+        self.anim = AnimationStateMachine(self)
+
         # 无边框透明窗口
         self.root.overrideredirect(True)
         self.root.wm_attributes('-topmost', True)
@@ -61,6 +149,8 @@ class Pet:
             bg=self._canvas_bg
         )
         self.canvas.pack()
+        # 像素文字（等级标签等）渲染成图片缓存，每帧只画一个图片项
+        self.pixel_text = PixelTextCache(self.root)
 
         # 状态管理
         self.save_manager = SaveManager()
@@ -69,19 +159,19 @@ class Pet:
 
         # 动画状态
         self.current_frame = 0
-        self.tick_ms = 50  # 动画刷新间隔
+        self.frame_scale = 1.0  # 本帧相当于多少个 50ms 帧
+        self._last_frame_time = self.scheduler.now()
         self.bounce_phase = 0.0  # 呼吸弹跳相位
 
         # 眨眼
         self.is_blinking = False
-        self._blink_job = None
 
         # 移动状态
         self.is_walking = False
         self.walk_direction = 1  # 1=右, -1=左
         self.walk_speed = 2
         self.walk_frame = 0
-        self.walk_tick = 0
+        self.walk_tick = 0.0
 
         # 跳跃状态
         self.jumping = False
@@ -93,8 +183,9 @@ class Pet:
         # 开心状态计时
         self.happy_timer = 0
 
-        # 拖拽状态
-        self.drag_data = {'x': 0, 'y': 0, 'dragging': False}
+        # 拖拽状态（按下时宠物窗口的位置）
+        self.drag_data = {'x': 0, 'y': 0}
+        self.is_dragging = False
         self._press_rx = 0
         self._press_ry = 0
 
@@ -114,7 +205,7 @@ class Pet:
         self.dizzy_timer = 0
         self.is_falling = False
         self.fall_velocity = 0
-        self.drag_history = []
+        self.drag_tracker = DragTracker()  # 最近 0.5 秒的拖拽轨迹
         self.shake_threshold = 400
         self.direction_changes = 0
         self.shake_count = 0
@@ -127,6 +218,7 @@ class Pet:
         self.bath_timer = 0
         self.bath_duration = 100  # 100帧 = 5秒
         self.water_drops = []
+        self.water_drop_acc = 0.0
         self.shower_offset_y = 0
 
         # 喂食动画状态
@@ -152,6 +244,7 @@ class Pet:
         # 走路模式
         self.walk_mode = 'normal'
         self.walk_pause_timer = 0
+        self.walk_paused = False
         self.is_looking_around = False
         self.look_direction = 'left'
         self.look_count = 0
@@ -175,7 +268,6 @@ class Pet:
 
         # 情绪系统状态
         self.apology_dialog = None  # 道歉对话框
-        self.cold_war_tick_timer = 0  # 冷战计时器
         self.last_cold_war_bubble = 0  # 上次冷战气泡时间
 
         # 梦境系统
@@ -201,11 +293,12 @@ class Pet:
 
         # 论文阅读系统
         self.is_reading_papers = False
-        self.reading_timer = 0
+        self.reading_started = 0.0
         self.reading_eye_phase = 0
         self.push_glasses_timer = 0
         self.paper_chat_window = None
         self.paper_fetching = False
+        self.paper_worker = None    # 论文流水线子进程（paper_agent.worker.PipelineWorker）
         self.today_papers = []
         self.paper_briefing_ready = False
 
@@ -229,14 +322,19 @@ class Pet:
         self.x = self.screen_w // 2
         self.y = self.screen_h - 100 - sprite_h
         self.base_y = self.y
-        self.root.geometry(f'+{self.x}+{self.y}')
+
+        # 窗口位置管理：本地记录位置，宠物和气泡的移动合并到每帧一次
+        self.windows = WindowPositionManager(self.root, self.scheduler, self.x, self.y)
+        self.windows.attach(self.bubble)
+        self.windows.attach(self.paper_bubble)
+        self.windows.flush()
 
         # 衰减计时
         self.last_decay_time = time.time()
         self.decay_interval = 60  # 每60秒检查一次衰减
 
         # 自动保存间隔
-        self.save_interval = 30000  # 30秒
+        self.save_interval = 30  # 30秒
 
         # 绑定事件
         self._bind_events()
@@ -248,14 +346,21 @@ class Pet:
         self._schedule_blink()
         self._tick()
         self._decay_loop()
-        self._auto_save()
+        self.scheduler.call_every(10, self._decay_loop, key='decay')
+        self.scheduler.call_every(self.save_interval, self._auto_save,
+                                  priority=PRIORITY_LOW, key='auto_save')
+        # 冷战倒计时（每秒一次）
+        self.scheduler.call_every(1.0, self._update_cold_war, key='cold_war')
 
         # 启动时执行每日流程（延迟1秒让窗口先显示）
-        self.root.after(1000, self._on_app_start)
+        self.scheduler.call_later(1.0, self._on_app_start)
 
         # 启动跨天检测循环（每10分钟检查一次）
         self._start_daily_check_loop()
 
+        # 到 FETCH_HOUR 后在后台预取今天的论文
+        self._start_prefetch_loop()
+
     def _bind_events(self) -> None:
         """绑定鼠标事件"""
         self.canvas.bind('<ButtonPress-1>', self._on_press)
@@ -280,6 +385,7 @@ class Pet:
         self.menu.add_separator()
         self.menu.add_command(label='📰 今日论文', command=self._open_paper_chat)
         self.menu.add_command(label='🔑 设置 API Key', command=self._set_api_key)
+        self.menu.add_command(label='💰 AI 用量', command=self._show_llm_usage)
 
         # 走动控制
         self.walk_menu_index = self.menu.index(tk.END) + 1
@@ -320,75 +426,45 @@ class Pet:
     def _get_current_sprite(self):
         body_type = self.save_manager.get_body_type()
 
-        # 被拖拽时显示拖拽精灵
-        if self.drag_data.get('dragging'):
-            return get_sprite(body_type, 'dragging')[0]
-
-        if self.is_dizzy or self.is_falling:
-            return get_sprite(body_type, 'dizzy')[0]
-
-        if self.save_manager.data.get('is_dead'):
-            return get_sprite(body_type, 'dead')[0]
-
-        if self.shake_angry and self.is_hiding:
-            sprite = get_sprite(body_type, 'angry')[0]
-            return [row[::-1] for row in sprite]
+        # 动画状态按优先级提供精灵
+        sprite = self.anim.sprite(body_type, get_sprite)
+        if sprite is not None:
+            return sprite
 
-        if self.is_being_comforted:
-            return get_sprite(body_type, 'comforted')[0]
-
-        if self.is_reading_papers:
-            if self.push_glasses_timer > 0:
-                frames = get_sprite(body_type, 'push_glasses')
-                idx = 0 if self.push_glasses_timer > 15 else 1
-                return frames[idx]
-            else:
-                frames = get_sprite(body_type, 'reading')
-                return frames[self.reading_eye_phase % len(frames)]
-
-        if self.sleep_disturb_state == 'sleepy':
-            return get_sprite(body_type, 'sleepy_disturbed')[0]
-        elif self.sleep_disturb_state == 'annoyed':
-            return get_sprite(body_type, 'annoyed_sleepy')[0]
-        elif self.sleep_disturb_state == 'super_annoyed':
-            return get_sprite(body_type, 'super_annoyed')[0]
-
-        if self.is_yawning:
-            return get_sprite(body_type, 'yawn')[0]
-
-        if self.is_sitting:
-            return get_sprite(body_type, 'sit')[0]
+        # 检查情绪状态（优先级高于普通状态）
+        emotion_sprite = EMOTION_SPRITES.get(self.save_manager.get_emotion_state())
+        if emotion_sprite:
+            return get_sprite(body_type, emotion_sprite)[0]
 
-        if self.happy_timer > 0:
-            return get_sprite(body_type, 'happy')[0]
+        status = self.save_manager.get_status()
+        frames = get_sprite(body_type, status)
+        return frames[0]
 
-        if self.is_blinking:
-            return get_sprite(body_type, 'blink')[0]
+    def _hiding_sprite(self, body_type: str):
+        """被晃生气后躲到屏幕边，背对着人"""
+        if not self.is_hiding:
+            return None
+        sprite = get_sprite(body_type, 'angry')[0]
+        return [row[::-1] for row in sprite]
 
-        if self.is_looking_around:
-            return get_sprite(body_type, f'look_{self.look_direction}')[0]
+    def _reading_sprite(self, body_type: str):
+        if self.push_glasses_timer > 0:
+            frames = get_sprite(body_type, 'push_glasses')
+            idx = 0 if self.push_glasses_timer > 15 else 1
+            return frames[idx]
+        frames = get_sprite(body_type, 'reading')
+        return frames[self.reading_eye_phase % len(frames)]
 
-        if self.is_walking:
-            if self.walk_mode == 'run':
-                frames = get_sprite(body_type, 'run')
-            elif self.walk_mode == 'hop':
-                frames = get_sprite(body_type, 'hop')
-            else:
-                frames = get_sprite(body_type, 'walk')
-            return frames[self.walk_frame % len(frames)]
+    def _sleep_disturb_sprite(self, body_type: str):
+        name = SLEEP_DISTURB_SPRITES.get(self.sleep_disturb_state)
+        return get_sprite(body_type, name)[0] if name else None
 
-        # 检查情绪状态（优先级高于普通状态）
-        emotion_state = self.save_manager.get_emotion_state()
-        if emotion_state == 'super_annoyed':
-            return get_sprite(body_type, 'super_annoyed')[0]
-        elif emotion_state in ['angry', 'annoyed']:
-            return get_sprite(body_type, 'angry')[0]
-        elif emotion_state in ['sad', 'very_sad']:
-            return get_sprite(body_type, 'lonely')[0]
+    def _look_sprite(self, body_type: str):
+        return get_sprite(body_type, f'look_{self.look_direction}')[0]
 
-        status = self.save_manager.get_status()
-        frames = get_sprite(body_type, status)
-        return frames[0]
+    def _walking_sprite(self, body_type: str):
+        frames = get_sprite(body_type, WALK_SPRITES.get(self.walk_mode, 'walk'))
+        return frames[self.walk_frame % len(frames)]
 
     def _draw(self) -> None:
         """绘制当前精灵图"""
@@ -475,20 +551,11 @@ class Pet:
         if status == 'sleep':
             self._draw_zzz(pad, oy)
 
-        # 绘制晕倒星星
-        if self.is_dizzy or self.is_falling:
-            self._draw_dizzy_stars(pad, oy)
-
         # 绘制季节特效
         self._draw_season_effects(pad, oy)
 
-        # 绘制动作动画
-        self._draw_bath(pad, oy)
-        self._draw_eating(pad, oy)
-        self._draw_playing(pad, oy)
-        self._draw_dream(pad, oy)
-        self._draw_happy_event(pad, oy)
-        self._draw_paper(pad, oy)
+        # 绘制动作动画（晕倒星星、洗澡、吃饭、梦境等，只画激活的状态）
+        self.anim.draw(pad, oy)
 
     def _draw_dizzy_stars(self, pad: int, oy: int) -> None:
         """绘制晕倒时头顶转圈的像素星星"""
@@ -525,7 +592,7 @@ class Pet:
         ps = sprites.PIXEL_SIZE
 
         # 更新 Zzz 相位
-        self.zzz_phase += 0.15
+        self.zzz_phase += 0.15 * self.frame_scale
 
         # 计算 Zzz 位置（从右上角飘出）
         base_x = pad + 8 * ps
@@ -607,145 +674,21 @@ class Pet:
 
     def _draw_head_ui(self, pad: int, oy: int) -> None:
         """绘制头顶 UI（像素风格等级标签）"""
-        # 像素字体定义 (3x5 每个字符)
-        PIXEL_FONT = {
-            'L': [
-                [1,0,0],
-                [1,0,0],
-                [1,0,0],
-                [1,0,0],
-                [1,1,1],
-            ],
-            'v': [
-                [0,0,0],
-                [1,0,1],
-                [1,0,1],
-                [1,0,1],
-                [0,1,0],
-            ],
-            '.': [
-                [0,0,0],
-                [0,0,0],
-                [0,0,0],
-                [0,0,0],
-                [0,1,0],
-            ],
-            '0': [
-                [1,1,1],
-                [1,0,1],
-                [1,0,1],
-                [1,0,1],
-                [1,1,1],
-            ],
-            '1': [
-                [0,1,0],
-                [1,1,0],
-                [0,1,0],
-                [0,1,0],
-                [1,1,1],
-            ],
-            '2': [
-                [1,1,1],
-                [0,0,1],
-                [1,1,1],
-                [1,0,0],
-                [1,1,1],
-            ],
-            '3': [
-                [1,1,1],
-                [0,0,1],
-                [1,1,1],
-                [0,0,1],
-                [1,1,1],
-            ],
-            '4': [
-                [1,0,1],
-                [1,0,1],
-                [1,1,1],
-                [0,0,1],
-                [0,0,1],
-            ],
-            '5': [
-                [1,1,1],
-                [1,0,0],
-                [1,1,1],
-                [0,0,1],
-                [1,1,1],
-            ],
-            '6': [
-                [1,1,1],
-                [1,0,0],
-                [1,1,1],
-                [1,0,1],
-                [1,1,1],
-            ],
-            '7': [
-                [1,1,1],
-                [0,0,1],
-                [0,0,1],
-                [0,0,1],
-                [0,0,1],
-            ],
-            '8': [
-                [1,1,1],
-                [1,0,1],
-                [1,1,1],
-                [1,0,1],
-                [1,1,1],
-            ],
-            '9': [
-                [1,1,1],
-                [1,0,1],
-                [1,1,1],
-                [0,0,1],
-                [1,1,1],
-            ],
-        }
-
         pixel_size = 2  # 每个像素块的大小
-        char_gap = 1    # 字符间距
 
-        # 获取等级
+        # 获取等级（文字不变时复用缓存的图片，升级后才重新渲染）
         level = self.save_manager.get_level()
         text = f"Lv.{level}"
 
-        # 计算总宽度
-        total_width = 0
-        for char in text:
-            if char in PIXEL_FONT:
-                total_width += len(PIXEL_FONT[char][0]) * pixel_size + char_gap
-
         # 计算起始位置（居中）
         ps = sprites.PIXEL_SIZE
         center_x = pad + 6 * ps
         top_y = pad + oy
-        start_x = center_x - total_width // 2
+        start_x = center_x - text_width(text, pixel_size) // 2
         label_y = top_y - 12
 
-        # 绘制像素文字
-        current_x = start_x
-        for char in text:
-            if char not in PIXEL_FONT:
-                continue
-            glyph = PIXEL_FONT[char]
-            for r, row in enumerate(glyph):
-                for c, val in enumerate(row):
-                    if val:
-                        px = current_x + c * pixel_size
-                        py = label_y + r * pixel_size
-                        # 阴影（偏移1像素）
-                        self.canvas.create_rectangle(
-                            px + 1, py + 1,
-                            px + pixel_size + 1, py + pixel_size + 1,
-                            fill='#000000', outline=''
-                        )
-                        # 主体（白色）
-                        self.canvas.create_rectangle(
-                            px, py,
-                            px + pixel_size, py + pixel_size,
-                            fill='#FFFFFF', outline=''
-                        )
-            current_x += len(glyph[0]) * pixel_size + char_gap
+        # 白字 + 右下 1 像素黑色阴影
+        self.pixel_text.draw(self.canvas, start_x, label_y, text, pixel_size)
 
     def _draw_season_effects(self, pad: int, oy: int) -> None:
         """绘制季节特效（像素风格）"""
@@ -814,7 +757,7 @@ class Pet:
         # 秋天落叶
         if season == 'autumn':
             # 随机添加新落叶
-            if random.random() < 0.03 and len(self.falling_leaves) < 5:
+            if self._chance(0.03) and len(self.falling_leaves) < 5:
                 self.falling_leaves.append({
                     'x': random.randint(0, canvas_w),
                     'y': -10,
@@ -824,15 +767,15 @@ class Pet:
 
             # 更新落叶位置
             for leaf in self.falling_leaves:
-                leaf['y'] += leaf['speed']
-                leaf['x'] += math.sin(leaf['y'] / 10) * 0.5
+                leaf['y'] += leaf['speed'] * self.frame_scale
+                leaf['x'] += math.sin(leaf['y'] / 10) * 0.5 * self.frame_scale
 
             # 移除超出范围的落叶
             self.falling_leaves = [l for l in self.falling_leaves if l['y'] < canvas_h + 10]
 
         # 春天花瓣
         elif season == 'spring':
-            if random.random() < 0.02 and len(self.falling_petals) < 3:
+            if self._chance(0.02) and len(self.falling_petals) < 3:
                 self.falling_petals.append({
                     'x': random.randint(0, canvas_w),
                     'y': -5,
@@ -840,91 +783,105 @@ class Pet:
                 })
 
             for petal in self.falling_petals:
-                petal['y'] += petal['speed']
-                petal['x'] += math.sin(petal['y'] / 8) * 0.3
+                petal['y'] += petal['speed'] * self.frame_scale
+                petal['x'] += math.sin(petal['y'] / 8) * 0.3 * self.frame_scale
 
             self.falling_petals = [p for p in self.falling_petals if p['y'] < canvas_h + 5]
 
-        # 季节特效计时器
-        self.season_effect_timer += 1
-
-        # 冬天偶尔打喷嚏
+        # 冬天偶尔打喷嚏（持续 1 秒）
         if season == 'winter':
             if self.is_sneezing:
-                if self.season_effect_timer % 20 == 0:
+                if self.season_effect_timer <= 0:
                     self.is_sneezing = False
-            elif random.random() < 0.002:  # 偶尔打喷嚏
+            elif self._chance(0.002):  # 偶尔打喷嚏
                 self.is_sneezing = True
+                self.season_effect_timer = 20
 
-        # 夏天偶尔擦汗
+        # 夏天偶尔擦汗（持续 1.5 秒）
         elif season == 'summer':
             if self.is_sweating:
-                if self.season_effect_timer % 30 == 0:
+                if self.season_effect_timer <= 0:
                     self.is_sweating = False
-            elif random.random() < 0.002:  # 偶尔擦汗
+            elif self._chance(0.002):  # 偶尔擦汗
                 self.is_sweating = True
+                self.season_effect_timer = 30
 
     def _tick(self) -> None:
-        self._update_dizzy()
-        self._update_falling()
-        self._update_season_effects()
-        self._update_bath()
-        self._update_eating()
-        self._update_playing()
-        self._update_dream()
-        self._update_sleep_disturb()
-        self._update_comfort()
-        self._update_happy_event()
-        self._update_reading()
-
-        # 冷战计时（每秒更新一次，tick 是 50ms，所以每 20 次 tick 更新一次）
-        self.cold_war_tick_timer += 1
-        if self.cold_war_tick_timer >= 20:
-            self.cold_war_tick_timer = 0
-            self._update_cold_war()
+        # 按实际经过的时间折算帧数，掉帧或降频时动画速度保持不变
+        now = self.scheduler.now()
+        elapsed = max(0.0, now - self._last_frame_time)
+        self.frame_scale = min(elapsed / FRAME_SECONDS, MAX_FRAME_SCALE)
+        self._last_frame_time = now
 
-        if self.is_dizzy or self.is_falling:
-            self._draw()
-            self.root.after(self.tick_ms, self._tick)
-            return
+        self._update_season_effects()
+        self.anim.set('dead', bool(self.save_manager.data.get('is_dead')))
 
-        self._update_mouse_tracking()
-        self._update_behaviors()
-        self._check_random_happy_event()
+        # 晕倒/下落时暂停普通行为
+        frozen = self.anim.frozen
+        if not frozen:
+            self._update_mouse_tracking()
+            self._update_behaviors()
+            self._check_random_happy_event()
 
-        if self.is_walking and not self.save_manager.data.get('is_dead'):
-            self._update_walking()
+        # 只更新激活的动画状态
+        self.anim.update()
 
-        if self.is_sitting:
-            self.foot_swing_phase += 0.15
+        if not frozen and not self.is_walking and not self.jumping and not self.is_sitting:
+            self.bounce_phase += 0.08 * self.frame_scale
 
-        if not self.is_walking and not self.jumping and not self.is_sitting:
-            self.bounce_phase += 0.08
+        # 本帧的窗口移动和绘制一起生效
+        self.windows.flush()
+        self._draw()
+        self._schedule_frame()
+
+    def _update_jump(self) -> None:
+        self.jump_vy += self.gravity * self.frame_scale
+        self.jump_y += self.jump_vy * self.frame_scale
+        if self.jump_y >= 0:
+            self.jump_y = 0
+            self.jumping = False
+
+    def _update_sit(self) -> None:
+        self.foot_swing_phase += 0.15 * self.frame_scale
+
+    def _is_animating(self) -> bool:
+        """除呼吸起伏外是否还有需要流畅刷新的动画"""
+        return bool(
+            self.is_walking or self.jumping or self.is_dragging
+            or self.is_dizzy or self.is_falling or self.shake_angry
+            or self.is_sitting or self.is_bathing or self.is_eating
+            or self.is_playing_game or self.is_dreaming or self.happy_event_active
+            or self.is_reading_papers or self.is_sneezing or self.is_sweating
+            or self.falling_leaves or self.falling_petals
+            or self.save_manager.get_status() == 'sleep'
+        )
 
-        if self.jumping:
-            self.jump_vy += self.gravity
-            self.jump_y += self.jump_vy
-            if self.jump_y >= 0:
-                self.jump_y = 0
-                self.jumping = False
+    def _schedule_frame(self, delay: float = None) -> None:
+        """安排下一帧（已有更早的帧时不变）"""
+        if delay is None:
+            delay = FRAME_SECONDS if self._is_animating() else IDLE_FRAME_SECONDS
+        pending = self.scheduler.get('frame')
+        if pending and pending.deadline <= self.scheduler.now() + delay:
+            return
+        self.scheduler.call_later(delay, self._tick, priority=PRIORITY_HIGH, key='frame')
 
-        if self.happy_timer > 0:
-            self.happy_timer -= 1
+    def _chance(self, p: float) -> bool:
+        """每帧概率事件，按本帧折算的帧数放大"""
+        return random.random() < p * self.frame_scale
 
-        self._draw()
-        self.root.after(self.tick_ms, self._tick)
+    @staticmethod
+    def _crossed(prev: float, cur: float, period: int) -> bool:
+        """帧计数从 prev 走到 cur 时是否经过 period 的整数倍"""
+        return math.ceil(prev / period) < math.ceil(cur / period)
 
     def _schedule_blink(self) -> None:
         """安排眨眼"""
-        if self._blink_job:
-            self.root.after_cancel(self._blink_job)
-        delay = random.randint(2000, 6000)
-        self._blink_job = self.root.after(delay, self._blink)
+        self.scheduler.call_later(random.uniform(2, 6), self._blink, key='blink')
 
     def _blink(self) -> None:
         """眨眼"""
         self.is_blinking = True
-        self.root.after(150, self._unblink)
+        self.scheduler.call_later(0.15, self._unblink, key='blink')
 
     def _unblink(self) -> None:
         """眨眼结束"""
@@ -938,39 +895,26 @@ class Pet:
         now = time.time()
         idle_time = now - self.last_mouse_move
 
-        if self.shake_angry_timer > 0:
-            self.shake_angry_timer -= 1
-            if self.shake_angry_timer <= 0:
-                self.shake_angry = False
-                self.shake_count = 0
-                self.is_hiding = False
-
         if self.shake_angry and not self.is_hiding:
             if self.x > self.screen_w // 2:
                 target_x = self.screen_w - 50
             else:
                 target_x = 10
             if abs(self.x - target_x) > 5:
-                self.x += 8 if target_x > self.x else -8
-                self.root.geometry(f'+{self.x}+{self.y}')
+                step = round(8 * self.frame_scale)
+                self.x += step if target_x > self.x else -step
+                self.windows.move_to(self.x, self.y)
             else:
                 self.is_hiding = True
 
-        if self.is_yawning:
-            self.yawn_timer -= 1
-            if self.yawn_timer <= 0:
-                self.is_yawning = False
-        elif idle_time > 60 and random.random() < 0.005 and not self.is_walking and not self.shake_angry:
-            self.is_yawning = True
+        # 打哈欠、坐下到时间由状态机自动结束
+        if (not self.is_yawning and idle_time > 60 and self._chance(0.005)
+                and not self.is_walking and not self.shake_angry):
             self.yawn_timer = 40
 
-        if self.is_sitting:
-            self.sit_timer -= 1
-            if self.sit_timer <= 0:
-                self.is_sitting = False
-        elif (self.x <= 20 or self.x >= self.screen_w - 100) and not self.is_walking and not self.shake_angry:
-            if random.random() < 0.002:
-                self.is_sitting = True
+        if (not self.is_sitting and (self.x <= 20 or self.x >= self.screen_w - 100)
+                and not self.is_walking and not self.shake_angry):
+            if self._chance(0.002):
                 self.sit_timer = 200
 
         status = self.save_manager.get_status()
@@ -999,20 +943,28 @@ class Pet:
             self.walk_mode = 'normal'
             self.walk_speed = 2
 
+    def _end_shake_angry(self) -> None:
+        self.shake_count = 0
+        self.is_hiding = False
+
     def _update_walking(self) -> None:
-        if self.walk_pause_timer > 0:
-            self.walk_pause_timer -= 1
-            if self.walk_pause_timer == 80:
-                self.is_looking_around = True
-                self.look_direction = 'left'
-                self.look_count = 0
-                self.look_timer = 25
-            elif self.walk_pause_timer == 0:
-                self.is_looking_around = False
+        if self.anim.is_active('dead'):
             return
 
+        if self.walk_paused:
+            if self.walk_pause_timer <= 0:
+                self.walk_paused = False
+                self.is_looking_around = False
+            else:
+                # 停下 1 秒后开始东张西望
+                if self.walk_pause_timer <= 80 and not self.is_looking_around:
+                    self.is_looking_around = True
+                    self.look_direction = 'left'
+                    self.look_count = 0
+                    self.look_timer = 25
+                return
+
         if self.is_looking_around:
-            self.look_timer -= 1
             if self.look_timer <= 0:
                 self.look_count += 1
                 if self.look_count >= 2:
@@ -1021,21 +973,25 @@ class Pet:
                     self.look_direction = 'right' if self.look_direction == 'left' else 'left'
                     self.look_timer = 25
 
-        if random.random() < 0.005:
+        if self._chance(0.005):
+            self.walk_paused = True
             self.walk_pause_timer = 100
             return
 
+        prev_tick = self.walk_tick
+        self.walk_tick += self.frame_scale
+
         speed = self.walk_speed
         if self.walk_mode == 'hop':
             speed = 3
-            if self.walk_tick % 20 == 0 and not self.jumping:
+            if self._crossed(prev_tick, self.walk_tick, 20) and not self.jumping:
                 self.jumping = True
                 self.jump_vy = -6
                 self.jump_y = 0.0
         elif self.walk_mode == 'run':
             speed = 5
 
-        self.x += speed * self.walk_direction
+        self.x += round(speed * self.walk_direction * self.frame_scale)
 
         body_type = self.save_manager.get_body_type()
         sprite_w = 12 * sprites.PIXEL_SIZE if body_type == 'fat' else 10 * sprites.PIXEL_SIZE
@@ -1045,14 +1001,11 @@ class Pet:
         elif self.x >= self.screen_w - sprite_w - 30:
             self.walk_direction = -1
 
-        self.walk_tick += 1
         frame_speed = 5 if self.walk_mode == 'run' else 10
-        if self.walk_tick % frame_speed == 0:
+        if self._crossed(prev_tick, self.walk_tick, frame_speed):
             self.walk_frame = 1 - self.walk_frame
 
-        self.root.geometry(f'+{self.x}+{self.y}')
-        self.bubble.update_position()
-        self.paper_bubble.update_position()
+        self.windows.move_to(self.x, self.y)
 
     def _decay_loop(self) -> None:
         now = time.time()
@@ -1085,22 +1038,26 @@ class Pet:
 
         self._check_dream_trigger()
         self._check_paper_reminder()
-        self.root.after(10000, self._decay_loop)
+
+        # 数值变化时已增量解锁，这里只取通知队列
+        new_items = self.save_manager.check_new_unlocks()
+        if new_items:
+            self._show_unlock_notification(new_items)
 
     def _auto_save(self) -> None:
         """自动保存"""
         self.save_manager.save()
-        self.root.after(self.save_interval, self._auto_save)
 
     def _on_press(self, event: tk.Event) -> None:
         """鼠标按下"""
         if event.state & 0x4:  # Control 键
             return
-        self.drag_data['x'] = event.x
-        self.drag_data['y'] = event.y
+        self.last_mouse_move = time.time()
+        self.drag_data['x'] = self.x
+        self.drag_data['y'] = self.y
         self._press_rx = event.x_root
         self._press_ry = event.y_root
-        self.drag_data['dragging'] = False
+        self.is_dragging = False
 
     def _on_drag(self, event: tk.Event) -> None:
         """拖拽"""
@@ -1109,29 +1066,23 @@ class Pet:
 
         dx = event.x_root - self._press_rx
         dy = event.y_root - self._press_ry
-        if abs(dx) > 3 or abs(dy) > 3:
-            self.drag_data['dragging'] = True
-
-        if self.drag_data['dragging']:
-            new_x = self.root.winfo_x() + (event.x - self.drag_data['x'])
-            new_y = self.root.winfo_y() + (event.y - self.drag_data['y'])
-
-            # 记录拖拽历史用于检测晃动
-            now = time.time()
-            self.drag_history.append((now, new_x, new_y))
-            # 只保留最近0.5秒的记录
-            self.drag_history = [(t, x, y) for t, x, y in self.drag_history
-                                  if now - t < 0.5]
-
-            # 检测晃动程度
-            if len(self.drag_history) >= 5:
+        if (abs(dx) > 3 or abs(dy) > 3) and not self.is_dragging:
+            self.is_dragging = True
+            self._schedule_frame(0)
+
+        if self.is_dragging:
+            # 用屏幕坐标算位置，不用向窗口管理器查询当前窗口位置
+            new_x = self.drag_data['x'] + dx
+            new_y = self.drag_data['y'] + dy
+
+            # 记录拖拽轨迹用于检测晃动（环形缓冲，自动淘汰 0.5 秒前的记录）
+            self.drag_tracker.add(time.time(), new_x, new_y)
+            if len(self.drag_tracker) >= 5:
                 self._check_shake()
 
             self.x = new_x
             self.y = new_y
-            self.root.geometry(f'+{new_x}+{new_y}')
-            self.bubble.update_position()
-            self.paper_bubble.update_position()
+            self.windows.move_to(new_x, new_y)
 
             # 拖拽时停止走动
             if self.is_walking:
@@ -1142,38 +1093,18 @@ class Pet:
         if self.is_dizzy or self.is_falling:
             return
 
-        if len(self.drag_history) < 6:
-            return
-
-        # 计算移动距离总和和方向变化次数
-        total_distance = 0
-        direction_changes = 0
-        prev_dx, prev_dy = 0, 0
-
-        for i in range(1, len(self.drag_history)):
-            _, x1, y1 = self.drag_history[i - 1]
-            _, x2, y2 = self.drag_history[i]
-            dx = x2 - x1
-            dy = y2 - y1
-            total_distance += abs(dx) + abs(dy)
-
-            # 检测方向变化（x或y方向反转）
-            if (prev_dx * dx < 0) or (prev_dy * dy < 0):
-                direction_changes += 1
-
-            prev_dx, prev_dy = dx, dy
-
-        # 必须同时满足：移动距离够大 + 方向变化够多（真正的晃动）
-        if total_distance > self.shake_threshold and direction_changes >= 4:
+        # 距离和方向变化由 drag_tracker 增量维护，这里只做比较
+        if self.drag_tracker.is_shaking(self.shake_threshold):
             self._start_dizzy()
 
     def _on_release(self, event: tk.Event) -> None:
         """鼠标释放"""
-        if not self.drag_data['dragging']:
+        if not self.is_dragging:
             self._handle_click()
-        self.drag_data['dragging'] = False
-        self.drag_history = []  # 清空拖拽历史
+        self.is_dragging = False
+        self.drag_tracker.clear()  # 清空拖拽历史
         self.base_y = self.y  # 更新基准位置
+        self._schedule_frame(0)
 
     def _handle_click(self) -> None:
         self.save_manager.record_interaction()
@@ -1394,6 +1325,20 @@ class Pet:
         tk.Button(btn_frame, text='教它！', command=save_and_close).pack(side='left', padx=5)
         tk.Button(btn_frame, text='取消', command=dialog.destroy).pack(side='left', padx=5)
 
+    def _show_llm_usage(self) -> None:
+        """LLM 调用的用量和费用（今天 / 最近 7 天 / 最近 4 周）"""
+        from paper_agent.async_bridge import get_bridge
+        from paper_agent.metering import get_meter
+
+        def on_done(text):
+            messagebox.showinfo('小铁皮的 AI 用量', text)
+
+        def on_error(e):
+            messagebox.showinfo('小铁皮的 AI 用量', f'读取用量失败：{e}')
+
+        get_bridge(self.root).run_io(lambda: get_meter().report_text(),
+                                     on_done=on_done, on_error=on_error)
+
     def _set_api_key(self) -> None:
         from paper_agent.api_key_manager import get_api_key, save_api_key, has_api_key
 
@@ -1454,7 +1399,7 @@ class Pet:
     def _start_dizzy(self) -> None:
         self.is_dizzy = True
         self.dizzy_timer = 60
-        self.drag_history = []
+        self.drag_tracker.clear()
 
         self.save_manager.modify_stat('happiness', -10)
 
@@ -1467,7 +1412,7 @@ class Pet:
             self.bubble.say_random('dizzy')
 
     def _start_falling(self) -> None:
-        """开始下落"""
+        """开始下落（晕倒结束时由状态机调用）"""
         self.is_falling = True
         self.fall_velocity = 0
 
@@ -1478,7 +1423,7 @@ class Pet:
         if level >= 3:
             self.bubble.say_random('angry_severe')
             # 超级不爽时弹出道歉对话框
-            self.root.after(500, self._show_apology_dialog)
+            self.scheduler.call_later(0.5, self._show_apology_dialog, key='apology_dialog')
         elif level >= 2:
             self.bubble.say_random('angry')
 
@@ -1500,7 +1445,7 @@ class Pet:
         new_items = self.save_manager.check_new_unlocks()
         if new_items:
             # 延迟显示解锁通知
-            self.root.after(2000, lambda: self._show_unlock_notification(new_items))
+            self.scheduler.call_later(2.0, lambda: self._show_unlock_notification(new_items))
 
     def _show_unlock_notification(self, item_ids: list) -> None:
         """显示道具解锁通知"""
@@ -1522,7 +1467,7 @@ class Pet:
                 self.bubble.say_random('night_disturb_3')
                 self.sleep_disturb_state = 'super_annoyed'
                 # 超级不爽时弹出道歉对话框
-                self.root.after(500, self._show_apology_dialog)
+                self.scheduler.call_later(0.5, self._show_apology_dialog, key='apology_dialog')
             self.sleep_disturb_timer = 100
 
     def _show_apology_dialog(self) -> None:
@@ -1539,7 +1484,7 @@ class Pet:
         self.apology_dialog.attributes('-topmost', True)
 
         # 定位在小铁皮上方
-        pet_x, pet_y = self.root.winfo_x(), self.root.winfo_y()
+        pet_x, pet_y = self.windows.position
         self.apology_dialog.geometry(f"+{pet_x - 30}+{pet_y - 100}")
 
         # 样式
@@ -1808,26 +1753,11 @@ class Pet:
                 on_click=self._open_casual_chat
             )
 
-    def _update_dizzy(self) -> None:
-        """更新晕倒状态"""
-        if not self.is_dizzy:
-            return
-
-        self.dizzy_timer -= 1
-
-        if self.dizzy_timer <= 0:
-            # 晕倒结束，开始下落
-            self.is_dizzy = False
-            self._start_falling()
-
     def _update_falling(self) -> None:
         """更新下落状态"""
-        if not self.is_falling:
-            return
-
         # 重力加速
-        self.fall_velocity += 2
-        self.y += self.fall_velocity
+        self.fall_velocity += 2 * self.frame_scale
+        self.y += round(self.fall_velocity * self.frame_scale)
 
         # 计算屏幕底部位置
         sprite_h = 9 * sprites.PIXEL_SIZE
@@ -1840,21 +1770,17 @@ class Pet:
             self.base_y = self.y
             self.bubble.say_random('recover')
 
-        self.root.geometry(f'+{self.x}+{self.y}')
-        self.bubble.update_position()
+        self.windows.move_to(self.x, self.y)
 
     def _update_bath(self) -> None:
         """更新洗澡动画"""
-        if not self.is_bathing:
-            return
-
-        self.bath_timer -= 1
-
         # 喷头微微上下晃动
         self.shower_offset_y = int(math.sin(self.bath_timer * 0.2) * 2)
 
-        # 生成新水滴（从喷头位置）
-        if self.bath_timer % 3 == 0:
+        # 生成新水滴（从喷头位置，每 3 帧一批）
+        self.water_drop_acc += self.frame_scale
+        while self.water_drop_acc >= 3:
+            self.water_drop_acc -= 3
             ps = sprites.PIXEL_SIZE
             pad = ps * 2
             for _ in range(2):
@@ -1869,60 +1795,42 @@ class Pet:
 
         # 更新水滴位置
         for drop in self.water_drops:
-            drop['y'] += drop['speed']
+            drop['y'] += drop['speed'] * self.frame_scale
             drop['x'] += random.uniform(-0.5, 0.5)
 
         # 移除超出范围的水滴
         canvas_h = get_canvas_size()[1]
         self.water_drops = [d for d in self.water_drops if d['y'] < canvas_h + 10]
 
-        # 动画结束
-        if self.bath_timer <= 0:
-            self.is_bathing = False
-            self.water_drops = []
+    def _end_bath(self) -> None:
+        self.water_drops = []
+        self.water_drop_acc = 0.0
 
     def _update_eating(self) -> None:
         """更新喂食动画"""
-        if not self.is_eating:
-            return
-
-        self.eat_timer -= 1
-
         # 咀嚼相位（快速循环）
-        self.eat_phase = (self.eat_phase + 0.3) % (2 * math.pi)
+        self.eat_phase = (self.eat_phase + 0.3 * self.frame_scale) % (2 * math.pi)
 
         # 饭团逐渐被吃掉
         progress = 1 - (self.eat_timer / self.eat_duration)
         self.onigiri_offset = int(progress * 3)
 
-        # 动画结束
-        if self.eat_timer <= 0:
-            self.is_eating = False
-            self.onigiri_offset = 0
+    def _end_eating(self) -> None:
+        self.onigiri_offset = 0
 
     def _update_playing(self) -> None:
         """更新玩耍动画"""
-        if not self.is_playing_game:
-            return
-
-        self.play_timer -= 1
-
         # 手柄晃动
         self.controller_shake = math.sin(self.play_timer * 0.5) * 2
 
-        # 按钮闪烁
-        self.button_blink_timer = (self.button_blink_timer + 1) % 10
+        # 按钮闪烁（10 帧一个周期）
+        self.button_blink_timer = (self.play_duration - self.play_timer) % 10
 
-        # 动画结束
-        if self.play_timer <= 0:
-            self.is_playing_game = False
-            self.controller_shake = 0
+    def _end_playing(self) -> None:
+        self.controller_shake = 0
 
     def _draw_bath(self, pad: int, oy: int) -> None:
         """绘制洗澡动画"""
-        if not self.is_bathing:
-            return
-
         ps = sprites.PIXEL_SIZE
         colors = get_all_colors(self.save_manager.get_vitality())
 
@@ -1954,9 +1862,6 @@ class Pet:
 
     def _draw_eating(self, pad: int, oy: int) -> None:
         """绘制喂食动画"""
-        if not self.is_eating:
-            return
-
         ps = sprites.PIXEL_SIZE
         colors = get_all_colors(self.save_manager.get_vitality())
 
@@ -1997,9 +1902,6 @@ class Pet:
 
     def _draw_playing(self, pad: int, oy: int) -> None:
         """绘制玩耍动画"""
-        if not self.is_playing_game:
-            return
-
         ps = sprites.PIXEL_SIZE
         colors = get_all_colors(self.save_manager.get_vitality())
 
@@ -2041,11 +1943,8 @@ class Pet:
 
     # ========== 睡眠打扰系统 ==========
 
-    def _update_sleep_disturb(self) -> None:
-        if self.sleep_disturb_state and self.sleep_disturb_timer > 0:
-            self.sleep_disturb_timer -= 1
-            if self.sleep_disturb_timer <= 0:
-                self.sleep_disturb_state = None
+    def _end_sleep_disturb(self) -> None:
+        self.sleep_disturb_state = None
 
     # ========== 梦境系统 ==========
 
@@ -2091,16 +1990,10 @@ class Pet:
         self.last_dream_time = time.time()
 
     def _update_dream(self) -> None:
-        if not self.is_dreaming:
-            return
-
-        self.dream_timer -= 1
-        self.dream_float_phase += 0.1
-
-        if self.dream_timer <= 0:
-            self._end_dream()
+        self.dream_float_phase += 0.1 * self.frame_scale
 
     def _end_dream(self) -> None:
+        """梦醒（dream_timer 到期时由状态机调用）"""
         if self.dream_type == 'good':
             msgs = ["嘿嘿...梦到好吃的了...", "zzZ...好多星星...", "梦到被主人夸了...嘿嘿",
                     "梦里在跳舞...转圈圈...", "梦到了一个大大的拥抱..."]
@@ -2120,7 +2013,7 @@ class Pet:
         self.dream_type = None
 
     def _draw_dream(self, pad: int, oy: int) -> None:
-        if not self.is_dreaming or not self.dream_type:
+        if not self.dream_type:
             return
 
         ps = sprites.PIXEL_SIZE
@@ -2184,12 +2077,6 @@ class Pet:
                         "被安慰了，小铁皮充满力量！", "这个拥抱好温暖..."]
                 self.bubble.show(random.choice(msgs))
 
-    def _update_comfort(self) -> None:
-        if self.is_being_comforted:
-            self.comfort_timer -= 1
-            if self.comfort_timer <= 0:
-                self.is_being_comforted = False
-
     # ========== 随机开心事件 ==========
 
     def _check_random_happy_event(self) -> None:
@@ -2234,27 +2121,23 @@ class Pet:
             'cookie': '诶？地上有块饼干耶！',
             'music': '这首歌好好听～ ♪'
         }
-        self.root.after(500, lambda: self.bubble.show(msgs[event_type]))
+        self.scheduler.call_later(0.5, lambda: self.bubble.show(msgs[event_type]))
 
     def _update_happy_event(self) -> None:
-        if not self.happy_event_active:
-            return
-
-        self.happy_event_timer -= 1
-        self.happy_event_phase += 0.15
+        k = self.frame_scale
+        self.happy_event_phase += 0.15 * k
 
         if self.happy_event_type == 'butterfly':
-            self.happy_event_pos[0] += math.sin(self.happy_event_phase) * 2
-            self.happy_event_pos[1] += math.cos(self.happy_event_phase * 0.5) * 1.5
+            self.happy_event_pos[0] += math.sin(self.happy_event_phase) * 2 * k
+            self.happy_event_pos[1] += math.cos(self.happy_event_phase * 0.5) * 1.5 * k
         elif self.happy_event_type == 'music':
-            self.happy_event_pos[1] -= 0.5
+            self.happy_event_pos[1] -= 0.5 * k
 
-        if self.happy_event_timer <= 0:
-            self.happy_event_active = False
-            self.happy_event_type = None
+    def _end_happy_event(self) -> None:
+        self.happy_event_type = None
 
     def _draw_happy_event(self, pad: int, oy: int) -> None:
-        if not self.happy_event_active or not self.happy_event_type:
+        if not self.happy_event_type:
             return
 
         ps = sprites.PIXEL_SIZE
@@ -2307,6 +2190,7 @@ class Pet:
 
     def _start_daily_check_loop(self) -> None:
         """启动跨天检测循环（处理程序持续运行时的跨天）"""
+        pending = {'day': False, 'dream': None}
 
         def check_new_day():
             is_new_day = self.save_manager.check_day_change()
@@ -2315,21 +2199,27 @@ class Pet:
                 print(f"检测到新的一天，执行每日流程...")
 
                 # 结算梦境
-                dream_result = self.save_manager.settle_dream()
+                pending['day'] = True
+                pending['dream'] = self.save_manager.settle_dream()
 
-                # 抓取今日论文
-                if not self.save_manager.is_papers_fetched_today():
-                    self._fetch_today_papers_on_startup()
+            # 零点之后先不抓，等 FETCH_HOUR 的后台预取把论文准备好；
+            # 预取还在跑就下一轮再来
+            from paper_agent.config import FETCH_HOUR
+            if not pending['day'] or datetime.now().hour < FETCH_HOUR or self.paper_fetching:
+                return
+            pending['day'] = False
 
-                # 显示早安问候
-                if not self.save_manager.is_greeted_today():
-                    self._show_morning_greeting(dream_result)
+            # 抓取今日论文（一般已经预取好，这里只是从归档读出来）
+            if not self.save_manager.is_papers_fetched_today():
+                self._fetch_today_papers_on_startup()
 
-            # 每10分钟检查一次
-            self.root.after(10 * 60 * 1000, check_new_day)
+            # 显示早安问候
+            if not self.save_manager.is_greeted_today():
+                self._show_morning_greeting(pending['dream'])
 
-        # 延迟启动，避免和 _on_app_start 冲突
-        self.root.after(15 * 60 * 1000, check_new_day)
+        # 每10分钟检查一次，延迟15分钟启动，避免和 _on_app_start 冲突
+        self.scheduler.call_every(10 * 60, check_new_day, key='daily_check',
+                                  first_delay=15 * 60)
 
     def _fetch_today_papers_on_startup(self) -> None:
         """启动时抓取论文（静默模式，不显示阅读动画）"""
@@ -2467,12 +2357,8 @@ class Pet:
 
     def _briefing_delivered(self) -> bool:
         try:
-            from paper_agent.config import PAPER_DATA_FILE
-            import json
-            if PAPER_DATA_FILE.exists():
-                with open(PAPER_DATA_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('briefing_delivered', False)
+            from paper_agent.archive import get_archive
+            return get_archive().is_briefing_delivered(datetime.now().strftime('%Y-%m-%d'))
         except:
             pass
         return False
@@ -2480,36 +2366,48 @@ class Pet:
     def _start_paper_fetch(self) -> None:
         self.paper_fetching = True
         self.is_reading_papers = True
-        self.reading_timer = 0
+        self.reading_started = self.scheduler.now()
         self.bubble.show('让我看看今天有什么新论文... 🤓')
 
-        def fetch_task():
-            try:
-                from paper_agent.fetcher import PaperFetcher
-                from paper_agent.summarizer import PaperSummarizer
-                from paper_agent.taste import TasteProfile
-
-                fetcher = PaperFetcher()
-                papers = fetcher.fetch_all()
-
-                if papers:
-                    summarizer = PaperSummarizer()
-                    papers = summarizer.summarize_papers(papers)
-                    summarizer.save_summarized_papers(papers)
-
-                    taste = TasteProfile()
-                    taste.update_from_papers(papers)
-
-                    self.today_papers = papers
-                    self.root.after(0, self._on_paper_fetch_done)
-                else:
-                    self.root.after(0, self._on_paper_fetch_failed)
+        def on_done(papers):
+            if papers:
+                self.today_papers = papers
+                self._on_paper_fetch_done()
+            else:
+                self._on_paper_fetch_failed()
 
-            except Exception as e:
-                print(f"Paper fetch error: {e}")
-                self.root.after(0, self._on_paper_fetch_failed)
+        self._start_pipeline_worker(on_done)
 
-        threading.Thread(target=fetch_task, daemon=True).start()
+    def _start_pipeline_worker(self, on_done) -> None:
+        """在子进程里跑论文流水线，定时收消息；结束时 on_done(papers)，失败或取消时 papers 为空"""
+        try:
+            from paper_agent.worker import PipelineWorker
+            worker = PipelineWorker()
+            worker.start()
+        except Exception as e:
+            print(f"Paper worker start error: {e}")
+            self.scheduler.call_later(0, lambda: on_done([]))
+            return
+        self.paper_worker = worker
+
+        def poll():
+            from paper_agent.worker import MSG_STAGE, MSG_DONE, MSG_ERROR
+            papers = []
+            for kind, payload in worker.poll():
+                if kind == MSG_STAGE:
+                    print(f"论文流水线 {payload['stage']}: {payload['seconds']:.1f}s, {payload['count']} 篇")
+                elif kind == MSG_DONE:
+                    papers = payload['papers']
+                elif kind == MSG_ERROR:
+                    print(f"Paper fetch error: {payload['error']}")
+            if worker.finished:
+                self.scheduler.cancel_key('paper_worker')
+                if self.paper_worker is worker:
+                    self.paper_worker = None
+                on_done(papers)
+
+        self.scheduler.call_every(WORKER_POLL_SECONDS, poll, priority=PRIORITY_LOW,
+                                  key='paper_worker')
 
     def _on_paper_fetch_done(self) -> None:
         self.paper_fetching = False
@@ -2546,6 +2444,48 @@ class Pet:
         self.is_reading_papers = False
         self.bubble.show('今天网络不太好，没读到论文 😔')
 
+    # ========== 后台预取 ==========
+
+    def _start_prefetch_loop(self) -> None:
+        """到了 FETCH_HOUR（或睡眠唤醒后的第一个空闲时刻）静默跑完整条论文流水线"""
+        self.prefetch_failed_at = 0.0
+        self.scheduler.call_every(PREFETCH_CHECK_SECONDS, self._check_prefetch,
+                                  priority=PRIORITY_LOW, key='paper_prefetch')
+
+    def _is_idle_for_prefetch(self) -> bool:
+        if self.paper_chat_window or self.is_dragging:
+            return False
+        return time.time() - self.last_mouse_move >= PREFETCH_IDLE_SECONDS
+
+    def _check_prefetch(self) -> None:
+        if self.paper_fetching:
+            return
+        if time.time() - self.prefetch_failed_at < PREFETCH_RETRY_SECONDS:
+            return
+        try:
+            from paper_agent.pipeline import is_fetch_due
+            if not is_fetch_due():
+                return
+        except Exception as e:
+            print(f"Prefetch check error: {e}")
+            return
+        if not self._is_idle_for_prefetch():
+            return
+
+        self.paper_fetching = True
+        print("后台预取今日论文...")
+        self._start_pipeline_worker(self._on_prefetch_done)
+
+    def _on_prefetch_done(self, papers) -> None:
+        """预取完成：只把论文放好，问候和气泡交给每日流程"""
+        self.paper_fetching = False
+        if not papers:
+            self.prefetch_failed_at = time.time()
+            return
+        print(f"后台预取完成：{len(papers)} 篇")
+        self.today_papers = papers
+        self.paper_briefing_ready = True
+
     def _open_paper_chat(self) -> None:
         if self.paper_chat_window:
             return
@@ -2584,34 +2524,18 @@ class Pet:
 
     def _mark_briefing_delivered(self) -> None:
         try:
-            from paper_agent.config import PAPER_DATA_FILE
-            import json
-            if PAPER_DATA_FILE.exists():
-                with open(PAPER_DATA_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                data['briefing_delivered'] = True
-                with open(PAPER_DATA_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+            from paper_agent.archive import get_archive
+            get_archive().mark_briefing_delivered(datetime.now().strftime('%Y-%m-%d'))
         except:
             pass
         self.paper_briefing_ready = False
 
     def _update_reading(self) -> None:
-        if not self.is_reading_papers:
-            return
-
-        self.reading_timer += 1
-
-        if self.reading_timer % 60 == 0:
-            self.reading_eye_phase = (self.reading_eye_phase + 1) % 3
-
-        if self.push_glasses_timer > 0:
-            self.push_glasses_timer -= 1
+        # 每 3 秒换一次视线
+        elapsed = self.scheduler.now() - self.reading_started
+        self.reading_eye_phase = int(elapsed / (60 * FRAME_SECONDS)) % 3
 
     def _draw_paper(self, pad: int, oy: int) -> None:
-        if not self.is_reading_papers:
-            return
-
         ps = sprites.PIXEL_SIZE
         colors = get_all_colors(self.save_manager.get_vitality())
 
@@ -2635,7 +2559,14 @@ class Pet:
 
     def _quit(self) -> None:
         """退出"""
+        if self.paper_worker:
+            self.paper_worker.cancel()
+        self.watchdog.stop()
         self.save_manager.save()
+        self.scheduler.shutdown()
+        from paper_agent.async_bridge import shutdown_bridge
+        shutdown_bridge()
+        sounds.shutdown()
         self.bubble.hide()
         self.paper_bubble.hide()
         self.root.destroy()
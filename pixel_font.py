@@ -0,0 +1,211 @@
+"""
+pixel_font.py - 像素字体
+3x5 点阵字形定义在模块级；一段文字按（文字, 像素大小, 颜色）渲染成一张图片并缓存，
+每帧只需要一个 create_image，内容变了（比如升级）才重新渲染
+"""
+
+import tkinter as tk
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# 3x5 点阵字形
+GLYPHS: Dict[str, List[List[int]]] = {
+    'L': [
+        [1, 0, 0],
+        [1, 0, 0],
+        [1, 0, 0],
+        [1, 0, 0],
+        [1, 1, 1],
+    ],
+    'v': [
+        [0, 0, 0],
+        [1, 0, 1],
+        [1, 0, 1],
+        [1, 0, 1],
+        [0, 1, 0],
+    ],
+    '.': [
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 1, 0],
+    ],
+    '0': [
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 0, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+    ],
+    '1': [
+        [0, 1, 0],
+        [1, 1, 0],
+        [0, 1, 0],
+        [0, 1, 0],
+        [1, 1, 1],
+    ],
+    '2': [
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 1, 1],
+        [1, 0, 0],
+        [1, 1, 1],
+    ],
+    '3': [
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 1, 1],
+    ],
+    '4': [
+        [1, 0, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+        [0, 0, 1],
+        [0, 0, 1],
+    ],
+    '5': [
+        [1, 1, 1],
+        [1, 0, 0],
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 1, 1],
+    ],
+    '6': [
+        [1, 1, 1],
+        [1, 0, 0],
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+    ],
+    '7': [
+        [1, 1, 1],
+        [0, 0, 1],
+        [0, 0, 1],
+        [0, 0, 1],
+        [0, 0, 1],
+    ],
+    '8': [
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+    ],
+    '9': [
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 1, 1],
+    ],
+    '+': [
+        [0, 0, 0],
+        [0, 1, 0],
+        [1, 1, 1],
+        [0, 1, 0],
+        [0, 0, 0],
+    ],
+    '-': [
+        [0, 0, 0],
+        [0, 0, 0],
+        [1, 1, 1],
+        [0, 0, 0],
+        [0, 0, 0],
+    ],
+    ':': [
+        [0, 0, 0],
+        [0, 1, 0],
+        [0, 0, 0],
+        [0, 1, 0],
+        [0, 0, 0],
+    ],
+    ' ': [
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+        [0, 0, 0],
+    ],
+}
+
+GLYPH_HEIGHT = 5
+CHAR_GAP = 1            # 字符间距（屏幕像素）
+SHADOW_OFFSET = 1       # 阴影偏移（屏幕像素）
+IMAGE_CACHE_SIZE = 32
+
+Run = Tuple[int, int, int, int]   # (x, y, 宽, 高)
+
+
+def text_width(text: str, pixel_size: int = 2, gap: int = CHAR_GAP) -> int:
+    """文字总宽度（和原来一样，每个字符后都算一个间距）"""
+    return sum(len(GLYPHS[ch][0]) * pixel_size + gap for ch in text if ch in GLYPHS)
+
+
+def text_runs(text: str, pixel_size: int = 2, gap: int = CHAR_GAP) -> List[Run]:
+    """把点亮的像素合并成横向的连续矩形"""
+    runs: List[Run] = []
+    x0 = 0
+    for ch in text:
+        glyph = GLYPHS.get(ch)
+        if glyph is None:
+            continue
+        for r, row in enumerate(glyph):
+            c = 0
+            while c < len(row):
+                if not row[c]:
+                    c += 1
+                    continue
+                start = c
+                while c < len(row) and row[c]:
+                    c += 1
+                runs.append((x0 + start * pixel_size, r * pixel_size,
+                             (c - start) * pixel_size, pixel_size))
+        x0 += len(glyph[0]) * pixel_size + gap
+    return runs
+
+
+def render_image(root, text: str, pixel_size: int = 2, fg: str = '#FFFFFF',
+                 shadow: str = '#000000', gap: int = CHAR_GAP) -> tk.PhotoImage:
+    """渲染成一张透明底的图片（阴影在右下偏移 1 像素）"""
+    width = max(1, text_width(text, pixel_size, gap) + SHADOW_OFFSET)
+    height = GLYPH_HEIGHT * pixel_size + SHADOW_OFFSET
+    image = tk.PhotoImage(master=root, width=width, height=height)
+    runs = text_runs(text, pixel_size, gap)
+    if shadow:
+        for x, y, w, h in runs:
+            image.put(shadow, to=(x + SHADOW_OFFSET, y + SHADOW_OFFSET,
+                                  x + w + SHADOW_OFFSET, y + h + SHADOW_OFFSET))
+    for x, y, w, h in runs:
+        image.put(fg, to=(x, y, x + w, y + h))
+    return image
+
+
+class PixelTextCache:
+    """渲染好的文字图片缓存（最近使用的保留）"""
+
+    def __init__(self, root, size: int = IMAGE_CACHE_SIZE):
+        self.root = root
+        self.size = size
+        self._images: 'OrderedDict[tuple, tk.PhotoImage]' = OrderedDict()
+
+    def get(self, text: str, pixel_size: int = 2, fg: str = '#FFFFFF',
+            shadow: str = '#000000') -> tk.PhotoImage:
+        key = (text, pixel_size, fg, shadow)
+        image = self._images.get(key)
+        if image is None:
+            image = render_image(self.root, text, pixel_size, fg, shadow)
+            self._images[key] = image
+            if len(self._images) > self.size:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(key)
+        return image
+
+    def draw(self, canvas: tk.Canvas, x: int, y: int, text: str, pixel_size: int = 2,
+             fg: str = '#FFFFFF', shadow: str = '#000000', anchor: str = 'nw') -> int:
+        """在 canvas 上画一段像素文字，返回图片项 id"""
+        image = self.get(text, pixel_size, fg, shadow)
+        return canvas.create_image(x, y, image=image, anchor=anchor)
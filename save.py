@@ -10,6 +10,14 @@ from typing import Dict, Any, Optional, Tuple
 import random
 from pathlib import Path
 
+import growth
+from timeseries import RollingCounter
+
+try:
+    from items import get_unlock_index
+except ImportError:
+    get_unlock_index = None
+
 
 SAVE_DIR = Path.home() / '.xiaotiepi'
 SAVE_FILE = SAVE_DIR / 'save.json'
@@ -25,8 +33,7 @@ DEFAULT_DATA: Dict[str, Any] = {
     'is_dead': False,
     'sick_since': None,
     'last_save_time': None,
-    'click_history': {},
-    'hourly_clicks': {},
+    'click_stats': None,  # 点击计数（timeseries.RollingCounter 编码）
     'last_interaction': None,
     'created_at': None,
     'hunger_history': [],
@@ -133,6 +140,9 @@ DEFAULT_DATA: Dict[str, Any] = {
     },
 }
 
+# 行为统计默认值（独立副本，新存档浅拷贝 DEFAULT_DATA 时不会被改动）
+BEHAVIOR_STAT_DEFAULTS: Dict[str, int] = dict(DEFAULT_DATA['behavior_stats'])
+
 # 摸鱼检测阈值
 FISHING_THRESHOLD = 20      # 每小时点击超过20次判定为摸鱼
 LONELY_HOURS_BASE = 3       # 基础寂寞阈值（信任度会延长）
@@ -277,8 +287,12 @@ class SaveManager:
 
     def __init__(self):
         self.data: Dict[str, Any] = {}
+        self._pending_unlocks: list = []  # 已解锁、还没通知的道具
+        self.click_stats = RollingCounter()
         self._ensure_save_dir()
         self.load()
+        # 补查一次（旧存档可能已满足条件但还没解锁），之后只做增量检查
+        self._queue_unlocks(self._check_all_unlocks())
 
     def _ensure_save_dir(self) -> None:
         """确保存档目录存在"""
@@ -306,9 +320,17 @@ class SaveManager:
             if key not in self.data:
                 self.data[key] = default_value
 
+        # 旧版按日期/小时字符串记录的点击 → 滚动计数
+        if 'click_history' in self.data or 'hourly_clicks' in self.data:
+            counter = RollingCounter.from_legacy(self.data.pop('click_history', None),
+                                                 self.data.pop('hourly_clicks', None))
+            self.data['click_stats'] = counter.to_dict()
+        self.click_stats = RollingCounter.from_dict(self.data.get('click_stats'))
+
     def _create_new_save(self) -> None:
         """创建新存档"""
         self.data = DEFAULT_DATA.copy()
+        self.click_stats = RollingCounter()
         self.data['created_at'] = time.time()
         self.data['last_save_time'] = time.time()
         self.save()
@@ -369,6 +391,7 @@ class SaveManager:
     def save(self) -> None:
         """保存当前状态到文件"""
         self.data['last_save_time'] = time.time()
+        self.data['click_stats'] = self.click_stats.to_dict()
         try:
             with open(SAVE_FILE, 'w', encoding='utf-8') as f:
                 json.dump(self.data, f, indent=2, ensure_ascii=False)
@@ -541,21 +564,9 @@ class SaveManager:
     def record_click(self) -> Optional[int]:
         """记录一次点击，返回升级后的等级（如果升级了的话）"""
         from datetime import datetime
-        now = time.time()
-
-        # 记录每日点击
-        today = datetime.now().strftime('%Y-%m-%d')
-        if 'click_history' not in self.data:
-            self.data['click_history'] = {}
-        self.data['click_history'][today] = self.data['click_history'].get(today, 0) + 1
-
-        # 记录每小时点击（用于摸鱼检测）
-        current_hour = datetime.now().strftime('%Y-%m-%d-%H')
-        if 'hourly_clicks' not in self.data:
-            self.data['hourly_clicks'] = {}
-        self.data['hourly_clicks'][current_hour] = self.data['hourly_clicks'].get(current_hour, 0) + 1
+        # 记录点击（小时/天/周/月滚动计数，小时计数用于摸鱼检测）
+        self.click_stats.increment()
 
-        self._cleanup_hourly_clicks()
         self.modify_stat('vitality', VITALITY_BOOST['click'])
         mood_bonus = random.randint(MOOD_CLICK_BONUS[0], MOOD_CLICK_BONUS[1])
         self.apply_mood_gain(mood_bonus)
@@ -575,26 +586,13 @@ class SaveManager:
         """记录一次互动（喂食/洗澡/玩耍/点击）"""
         self.data['last_interaction'] = time.time()
 
-    def _cleanup_hourly_clicks(self) -> None:
-        """清理超过24小时的点击记录"""
-        from datetime import datetime, timedelta
-        if 'hourly_clicks' not in self.data:
-            return
-
-        cutoff = datetime.now() - timedelta(hours=24)
-        cutoff_str = cutoff.strftime('%Y-%m-%d-%H')
-
-        old_keys = [k for k in self.data['hourly_clicks'].keys() if k < cutoff_str]
-        for k in old_keys:
-            del self.data['hourly_clicks'][k]
-
     def get_current_hour_clicks(self) -> int:
         """获取当前小时的点击次数"""
-        from datetime import datetime
-        current_hour = datetime.now().strftime('%Y-%m-%d-%H')
-        if 'hourly_clicks' not in self.data:
-            return 0
-        return self.data['hourly_clicks'].get(current_hour, 0)
+        return self.click_stats.current_hour()
+
+    def get_today_clicks(self) -> int:
+        """获取今天的点击次数"""
+        return self.click_stats.today()
 
     def is_fishing(self) -> bool:
         return self.get_anger_level() > 0
@@ -606,9 +604,9 @@ class SaveManager:
         return weekday < 5 and 9 <= hour < 18
 
     def get_anger_level(self) -> int:
-        clicks = self.get_current_hour_clicks()
         if not self.is_work_time():
             return 0
+        clicks = self.click_stats.current_hour()
         if clicks > 50:
             return 3
         elif clicks > 35:
@@ -740,6 +738,7 @@ class SaveManager:
     def modify_trust(self, delta: float) -> None:
         current = self.data.get('trust', 30)
         self.data['trust'] = max(0, min(100, current + delta))
+        self._on_value_changed('trust', '', current, self.data['trust'])
 
     def get_trust_level(self) -> Tuple[str, str]:
         """获取亲密度等级名称和描述"""
@@ -797,6 +796,7 @@ class SaveManager:
         # 检查是否升级
         new_trust = self.get_trust()
         self._check_trust_level_up(old_trust, new_trust)
+        self._on_value_changed('trust', '', old_trust, new_trust)
 
         return True
 
@@ -1645,16 +1645,17 @@ class SaveManager:
         self.data['growth_data'] = gd
         return gd
 
+    def get_growth_curve(self) -> growth.GrowthCurve:
+        """当前成长曲线（growth_data.curve，默认线性）"""
+        return growth.get_curve(self.data.get('growth_data', {}).get('curve'))
+
     def get_required_exp(self, level: int) -> int:
         """获取升到下一级需要的累计经验"""
-        return level * 100 + (level - 1) * 50
+        return self.get_growth_curve().required(level)
 
     def get_level_from_exp(self, total_exp: int) -> int:
-        """根据总经验计算等级"""
-        level = 1
-        while total_exp >= self.get_required_exp(level):
-            level += 1
-        return level - 1 if level > 1 else 1
+        """根据总经验计算等级（闭式/查表，O(1)）"""
+        return self.get_growth_curve().level_for(total_exp)
 
     def get_exp_progress(self) -> Tuple[int, int]:
         """获取当前等级的经验进度 (当前, 需要)"""
@@ -1669,6 +1670,16 @@ class SaveManager:
 
     def add_experience(self, amount: int, source: str = None) -> Optional[int]:
         """增加经验值，返回升级后的新等级（如果升级了的话）"""
+        return self._apply_exp(amount)
+
+    def apply_exp_events(self, events) -> Optional[int]:
+        """批量增加经验（离线结算、导入），只换算一次等级
+
+        events: 经验值，或 (来源, 经验值) 元组；经验值为 None 时按 EXP_REWARDS 取
+        """
+        return self._apply_exp(growth.sum_exp_events(events, EXP_REWARDS))
+
+    def _apply_exp(self, amount: float) -> Optional[int]:
         gd = self.get_growth_data()
         old_level = gd['level']
         gd['total_exp'] += amount
@@ -1677,6 +1688,7 @@ class SaveManager:
         if new_level > old_level:
             gd['level'] = new_level
             self.data['growth_data'] = gd
+            self._on_value_changed('level', '', old_level, new_level)
             return new_level
 
         self.data['growth_data'] = gd
@@ -1699,41 +1711,53 @@ class SaveManager:
 
     def get_behavior_stats(self) -> Dict:
         """获取行为统计数据"""
-        bs = self.data.get('behavior_stats', {})
-        defaults = {
-            'feed_count': 0, 'clean_count': 0, 'play_count': 0,
-            'pet_count': 0, 'comfort_count': 0,
-            'paper_reads': 0, 'paper_likes': 0, 'paper_bookmarks': 0,
-            'chat_count': 0, 'chat_messages': 0,
-            'anger_triggered': 0, 'disturb_sleep': 0,
-            'neglect_days': 0, 'death_count': 0,
-            'total_alive_days': 0, 'consecutive_care': 0,
-            'consecutive_care_max': 0, 'night_interactions': 0,
-        }
-        for key, default in defaults.items():
-            if key not in bs:
-                bs[key] = default
-        self.data['behavior_stats'] = bs
+        bs = self.data.get('behavior_stats')
+        if bs is None:
+            bs = self.data['behavior_stats'] = {}
+        if not bs.keys() >= BEHAVIOR_STAT_DEFAULTS.keys():
+            for key, default in BEHAVIOR_STAT_DEFAULTS.items():
+                bs.setdefault(key, default)
         return bs
 
     def increment_behavior_stat(self, stat_name: str, amount: int = 1) -> None:
         """增加行为统计"""
         bs = self.get_behavior_stats()
-        bs[stat_name] = bs.get(stat_name, 0) + amount
+        old_value = bs.get(stat_name, 0)
+        bs[stat_name] = old_value + amount
+        self._on_value_changed('stat', stat_name, old_value, bs[stat_name])
         # 更新最大连续照顾天数
         if stat_name == 'consecutive_care':
-            if bs['consecutive_care'] > bs['consecutive_care_max']:
+            old_max = bs['consecutive_care_max']
+            if bs['consecutive_care'] > old_max:
                 bs['consecutive_care_max'] = bs['consecutive_care']
-        self.data['behavior_stats'] = bs
+                self._on_value_changed('stat', 'consecutive_care_max',
+                                       old_max, bs['consecutive_care_max'])
 
-    def check_new_unlocks(self) -> list:
-        """检查是否有新道具解锁，返回解锁的道具ID列表"""
+    def _on_value_changed(self, kind: str, stat: str, old_value: float, new_value: float) -> None:
+        """等级/亲密度/统计值变化时，只解锁阈值刚被跨过的道具"""
+        if get_unlock_index is None or new_value <= old_value:
+            return
+        self._queue_unlocks(
+            item_id for item_id in get_unlock_index().crossed(kind, stat, old_value, new_value)
+            if self.unlock_item(item_id)
+        )
+
+    def _queue_unlocks(self, item_ids) -> None:
+        self._pending_unlocks.extend(item_ids)
+
+    def _check_all_unlocks(self) -> list:
+        """全量检查一次所有道具"""
         try:
             from items import check_all_unlocks
             return check_all_unlocks(self)
         except ImportError:
             return []
 
+    def check_new_unlocks(self) -> list:
+        """取出新解锁的道具ID列表（解锁在数值变化时已完成）"""
+        new_items, self._pending_unlocks = self._pending_unlocks, []
+        return new_items
+
     # ========== 道具系统 ==========
 
     def get_inventory(self) -> Dict:
@@ -0,0 +1,352 @@
+"""
+scheduler.py - 小铁皮的统一定时调度器
+分层时间轮（hierarchical timing wheel）驱动 Tk 事件循环：
+所有定时任务挂在同一个时间轮上，Tk 只在下一个到期时间点被唤醒一次
+"""
+
+import math
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+# 时间轮参数
+WHEEL_RESOLUTION = 0.01         # 第 0 层每格 10ms
+WHEEL_BITS = 6                  # 每层 64 格
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4                # 10ms × 64^4 ≈ 46 小时
+
+# 任务优先级（同一时刻到期时，数值大的先执行）
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+# 帧 ↔ 秒的换算基准（原动画 tick 为 50ms 一帧）
+FRAME_SECONDS = 0.05
+
+
+class TimerTask:
+    """定时任务句柄（可用于取消）"""
+
+    __slots__ = ('callback', 'deadline', 'interval', 'priority', 'key',
+                 'coalesce', 'cancelled', 'expires', 'seq', '_slot', '_level')
+
+    def __init__(self, callback: Callable, deadline: float, interval: Optional[float],
+                 priority: int, key: Optional[str], coalesce: bool, seq: int):
+        self.callback = callback
+        self.deadline = deadline        # 到期时间（调度器时钟，秒）
+        self.interval = interval        # 周期任务的间隔，一次性任务为 None
+        self.priority = priority
+        self.key = key
+        self.coalesce = coalesce        # 周期任务落后时是否合并错过的触发
+        self.cancelled = False
+        self.expires = 0                # 到期的时间轮刻度
+        self.seq = seq
+        self._slot: Optional[list] = None
+        self._level = -1                # 所在时间轮层级，-1 表示到期队列/溢出表
+
+    @property
+    def periodic(self) -> bool:
+        return self.interval is not None
+
+
+class FrameTimer:
+    """按帧数读写、按墙钟到期的倒计时描述符
+
+    `pet.happy_timer = 40` 记下 40 帧（2 秒）后的截止时间，读取时返回剩余帧数，
+    不再需要每帧手动递减，掉帧或卡顿时也按真实时间结束。
+    宿主对象需要有 `scheduler` 属性提供时钟。
+    """
+
+    def __set_name__(self, owner, name):
+        self.attr = f'_{name}_deadline'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        deadline = obj.__dict__.get(self.attr)
+        if deadline is None:
+            return 0
+        remaining = deadline - obj.scheduler.now()
+        if remaining <= 0:
+            return 0
+        return math.ceil(remaining / FRAME_SECONDS - 1e-6)
+
+    def __set__(self, obj, frames):
+        if frames > 0:
+            obj.__dict__[self.attr] = obj.scheduler.now() + frames * FRAME_SECONDS
+        else:
+            obj.__dict__[self.attr] = None
+
+
+class TimerWheel:
+    """分层时间轮，插入/取消 O(1)，推进按需级联"""
+
+    def __init__(self, current_tick: int = 0):
+        self.current = current_tick
+        self.levels = [[[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)]
+        self.counts = [0] * WHEEL_LEVELS
+        self.overflow: List[TimerTask] = []   # 超出时间轮范围的任务
+        self.due: List[TimerTask] = []        # 已到期待执行
+
+    def __len__(self) -> int:
+        return sum(self.counts) + len(self.overflow) + len(self.due)
+
+    def add(self, task: TimerTask) -> None:
+        """按到期刻度放入对应层级的格子"""
+        delta = task.expires - self.current
+        task._level = -1
+        if delta <= 0:
+            slot = self.due
+        else:
+            slot = self.overflow
+            for level in range(WHEEL_LEVELS):
+                if delta < 1 << (WHEEL_BITS * (level + 1)):
+                    index = (task.expires >> (WHEEL_BITS * level)) & WHEEL_MASK
+                    slot = self.levels[level][index]
+                    self.counts[level] += 1
+                    task._level = level
+                    break
+        slot.append(task)
+        task._slot = slot
+
+    def remove(self, task: TimerTask) -> None:
+        """从所在格子中摘除"""
+        slot = task._slot
+        if slot is None:
+            return
+        try:
+            slot.remove(task)
+        except ValueError:
+            pass
+        else:
+            if task._level >= 0:
+                self.counts[task._level] -= 1
+        task._slot = None
+        task._level = -1
+
+    def next_tick(self) -> Optional[int]:
+        """下一个需要唤醒的刻度（到期或需要级联），没有任务时返回 None"""
+        if self.due:
+            return self.current
+
+        best = None
+        # 第 0 层：最近的非空格子
+        if self.counts[0]:
+            for step in range(1, WHEEL_SIZE):
+                tick = self.current + step
+                if self.levels[0][tick & WHEEL_MASK]:
+                    best = tick
+                    break
+
+        # 更高层：最近一次会带来任务的级联点（可能早于第 0 层的任务）
+        for level in range(1, WHEEL_LEVELS):
+            if not self.counts[level]:
+                continue
+            shift = WHEEL_BITS * level
+            base = self.current >> shift
+            for step in range(1, WHEEL_SIZE + 1):
+                if self.levels[level][(base + step) & WHEEL_MASK]:
+                    tick = (base + step) << shift
+                    if best is None or tick < best:
+                        best = tick
+                    break
+
+        if self.overflow:
+            shift = WHEEL_BITS * (WHEEL_LEVELS - 1)
+            tick = ((self.current >> shift) + 1) << shift
+            if best is None or tick < best:
+                best = tick
+        return best
+
+    def advance(self, target: int) -> List[TimerTask]:
+        """推进到 target 刻度，返回期间到期的任务"""
+        while True:
+            tick = self.next_tick()
+            if tick is None or tick > target:
+                self.current = max(self.current, target)
+                break
+            if tick == self.current and self.due:
+                break
+            self.current = tick
+            self._cascade(tick)
+            slot = self.levels[0][tick & WHEEL_MASK]
+            if slot:
+                self.counts[0] -= len(slot)
+                for task in slot:
+                    task._slot = self.due
+                    task._level = -1
+                self.due.extend(slot)
+                slot.clear()
+
+        due, self.due = self.due, []
+        for task in due:
+            task._slot = None
+        return due
+
+    def _cascade(self, tick: int) -> None:
+        """低层转满一圈时，把高层对应格子的任务重新分配下来"""
+        for level in range(1, WHEEL_LEVELS):
+            if (tick >> (WHEEL_BITS * (level - 1))) & WHEEL_MASK:
+                return
+            index = (tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+            slot = self.levels[level][index]
+            if slot:
+                tasks = list(slot)
+                slot.clear()
+                self.counts[level] -= len(tasks)
+                for task in tasks:
+                    self.add(task)
+        if self.overflow and not tick & ((1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1):
+            tasks, self.overflow = self.overflow, []
+            for task in tasks:
+                self.add(task)
+
+
+class Scheduler:
+    """基于时间轮的 Tk 调度器
+
+    - 一次性任务 call_later / 周期任务 call_every
+    - 同 key 的任务互相替换（合并），周期任务落后时合并错过的触发
+    - 同一时刻到期的任务按优先级执行
+    - Tk 只保留一个 after 回调，指向下一个到期时间点
+    """
+
+    def __init__(self, root, clock: Callable[[], float] = time.monotonic):
+        self.root = root
+        self.clock = clock
+        self._origin = clock()
+        self._wheel = TimerWheel(0)
+        self._keys: Dict[str, TimerTask] = {}
+        self._seq = 0
+        self._job: Optional[str] = None
+        self._job_tick: Optional[int] = None
+        self._running = False
+
+    # ===== 公共接口 =====
+
+    def now(self) -> float:
+        """调度器时钟（秒，单调递增）"""
+        return self.clock()
+
+    def call_later(self, delay: float, callback: Callable, priority: int = PRIORITY_NORMAL,
+                   key: str = None) -> TimerTask:
+        """delay 秒后执行一次"""
+        return self._schedule(callback, max(0.0, delay), None, priority, key, True)
+
+    def call_every(self, interval: float, callback: Callable, priority: int = PRIORITY_NORMAL,
+                   key: str = None, first_delay: float = None,
+                   coalesce: bool = True) -> TimerTask:
+        """每隔 interval 秒执行一次（首次延迟 first_delay，默认等于 interval）"""
+        delay = interval if first_delay is None else first_delay
+        return self._schedule(callback, max(0.0, delay), interval, priority, key, coalesce)
+
+    def cancel(self, task: Optional[TimerTask]) -> None:
+        """取消任务（可重复调用）"""
+        if task is None or task.cancelled:
+            return
+        task.cancelled = True
+        self._wheel.remove(task)
+        if task.key and self._keys.get(task.key) is task:
+            del self._keys[task.key]
+
+    def cancel_key(self, key: str) -> None:
+        """按 key 取消任务"""
+        self.cancel(self._keys.get(key))
+
+    def get(self, key: str) -> Optional[TimerTask]:
+        """获取 key 对应的待执行任务"""
+        return self._keys.get(key)
+
+    def shutdown(self) -> None:
+        """取消所有任务和 Tk 回调"""
+        for task in list(self._keys.values()):
+            self.cancel(task)
+        self._wheel = TimerWheel(self._tick_at(self.now()))
+        self._disarm()
+
+    # ===== 内部实现 =====
+
+    def _tick_at(self, t: float) -> int:
+        # 加一点容差，避免浮点误差让刚到期的任务被推迟一格
+        return math.floor((t - self._origin) / WHEEL_RESOLUTION + 1e-6)
+
+    def _schedule(self, callback: Callable, delay: float, interval: Optional[float],
+                  priority: int, key: Optional[str], coalesce: bool) -> TimerTask:
+        if key:
+            self.cancel(self._keys.get(key))
+
+        self._seq += 1
+        task = TimerTask(callback, self.now() + delay, interval, priority, key,
+                         coalesce, self._seq)
+        self._insert(task)
+        if key:
+            self._keys[key] = task
+        if not self._running:
+            self._arm()
+        return task
+
+    def _insert(self, task: TimerTask) -> None:
+        # 向上取整，保证不会早于 deadline 触发
+        task.expires = max(self._wheel.current,
+                           math.ceil((task.deadline - self._origin) / WHEEL_RESOLUTION - 1e-6))
+        self._wheel.add(task)
+
+    def _run(self) -> None:
+        """Tk 回调：执行所有到期任务，然后重新定时"""
+        self._job = None
+        self._job_tick = None
+        self._running = True
+        try:
+            now = self.now()
+            due = self._wheel.advance(self._tick_at(now))
+            due.sort(key=lambda t: (-t.priority, t.deadline, t.seq))
+            for task in due:
+                if task.cancelled:
+                    continue
+                if task.periodic:
+                    # 先排下一次，回调里可以安全地 cancel 自己
+                    next_deadline = task.deadline + task.interval
+                    if task.coalesce and next_deadline <= now:
+                        next_deadline = now + task.interval
+                    task.deadline = next_deadline
+                    self._insert(task)
+                elif task.key and self._keys.get(task.key) is task:
+                    del self._keys[task.key]
+                try:
+                    task.callback()
+                except Exception:
+                    print(f"定时任务出错: {getattr(task.callback, '__name__', task.callback)}")
+                    traceback.print_exc()
+        finally:
+            self._running = False
+            self._arm()
+
+    def _arm(self) -> None:
+        """让 Tk 在下一个到期刻度唤醒"""
+        tick = self._wheel.next_tick()
+        if tick is None:
+            self._disarm()
+            return
+        if self._job is not None and self._job_tick is not None and self._job_tick <= tick:
+            return
+
+        self._disarm()
+        wake_at = self._origin + tick * WHEEL_RESOLUTION
+        delay_ms = max(0, math.ceil((wake_at - self.now()) * 1000))
+        try:
+            self._job = self.root.after(delay_ms, self._run)
+            self._job_tick = tick
+        except Exception:
+            # 窗口已销毁
+            self._job = None
+            self._job_tick = None
+
+    def _disarm(self) -> None:
+        if self._job is not None:
+            try:
+                self.root.after_cancel(self._job)
+            except Exception:
+                pass
+        self._job = None
+        self._job_tick = None
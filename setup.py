@@ -34,7 +34,7 @@ OPTIONS = {
             'NSAllowsArbitraryLoads': True,
         },
     },
-    'packages': ['paper_agent', 'anthropic', 'httpx', 'httpcore', 'anyio', 'sniffio', 'certifi', 'idna', 'h11'],
+    'packages': ['paper_agent', 'anthropic', 'httpx', 'httpcore', 'anyio', 'sniffio', 'certifi', 'idna', 'h11', 'numpy'],
     'excludes': ['setuptools', 'pkg_resources', 'wheel', 'pip'],
     'includes': ['tkinter', 'json', 'threading', 'pathlib', 'xml.etree.ElementTree'],
 }
@@ -1,12 +1,25 @@
 """
 sounds.py - 小铁皮的音效模块
-使用 macOS 系统命令 afplay 播放音效
+单个常驻播放线程 + 队列：音效只解码一次缓存在内存里，重叠的音效混音播放，
+同时发声数有上限；后端可选 coreaudio（macOS AudioQueue，ctypes 调用）、
+paplay（PulseAudio）、aplay（ALSA）；AudioToolbox 加载失败、或者 AudioQueue 在运行时
+建不起来 / 设备不再取数据时退回 afplay。运行时可切换，找不到音效文件时用合成的小音效代替
 """
 
+import ctypes
+import ctypes.util
+import os
+import queue
+import shutil
+import struct
 import subprocess
+import sys
 import threading
+import time
+import wave
+from array import array
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 # 系统音效路径
 SYSTEM_SOUNDS = Path('/System/Library/Sounds')
@@ -20,6 +33,22 @@ SOUND_EFFECTS = {
     'click': SYSTEM_SOUNDS / 'Tink.aiff',
 }
 
+# 没有系统音效时的合成音效：[(频率 Hz, 时长 秒), ...]
+SYNTH_SOUNDS = {
+    'feed': [(660, 0.05), (990, 0.07)],
+    'bath': [(330, 0.08), (392, 0.08), (440, 0.12)],
+    'play': [(523, 0.06), (659, 0.06), (784, 0.1)],
+    'happy': [(784, 0.08), (988, 0.08), (1175, 0.14)],
+    'click': [(1760, 0.03)],
+}
+
+# 混音参数：单声道 16 位
+MIX_RATE = 22050
+BLOCK_FRAMES = 512          # 每次混音写出的帧数（约 23ms）
+STREAM_LEAD = 0.06          # 最多领先播放进度 60ms，保证新音效延迟低
+MAX_VOICES = 4              # 同时发声数上限，超出时挤掉最早的
+RETRIGGER_GAP = 0.06        # 同一音效 60ms 内重复触发只播一次
+
 # 音量控制（0.0 - 1.0）
 _volume = 0.5
 _enabled = True
@@ -42,26 +71,563 @@ def is_enabled() -> bool:
     return _enabled
 
 
+# ============ 解码与缓存 ============
+
+def _to_mono16(raw: bytes, channels: int, sampwidth: int, rate: int,
+               big_endian: bool) -> Optional[array]:
+    """把 16/24/32 位整数 PCM 转成 MIX_RATE 的单声道 16 位（高位两个字节直接截下来）"""
+    if sampwidth not in (2, 3, 4):
+        return None
+    count = len(raw) // sampwidth
+    raw = raw[:count * sampwidth]
+    if big_endian:
+        high, low = raw[0::sampwidth], raw[1::sampwidth]
+    else:
+        high, low = raw[sampwidth - 1::sampwidth], raw[sampwidth - 2::sampwidth]
+    pcm = bytearray(count * 2)
+    pcm[0::2] = low
+    pcm[1::2] = high
+    samples = array('h')
+    samples.frombytes(bytes(pcm))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    if channels > 1:
+        samples = array('h', (sum(samples[i:i + channels]) // channels
+                              for i in range(0, len(samples) - channels + 1, channels)))
+    if rate != MIX_RATE:
+        step = rate / MIX_RATE
+        count = int(len(samples) / step)
+        samples = array('h', (samples[int(i * step)] for i in range(count)))
+    return samples
+
+
+def _read_aiff(path: Path) -> Optional[array]:
+    """解析 AIFF / AIFF-C（未压缩或 sowt 小端），标准库的 aifc 在 3.13 已移除"""
+    data = path.read_bytes()
+    if len(data) < 12 or data[:4] != b'FORM' or data[8:12] not in (b'AIFF', b'AIFC'):
+        return None
+    comm = ssnd = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        body = data[pos + 8:pos + 8 + size]
+        if chunk_id == b'COMM':
+            comm = body
+        elif chunk_id == b'SSND':
+            ssnd = body
+        pos += 8 + size + (size & 1)
+    if comm is None or ssnd is None or len(comm) < 18 or len(ssnd) < 8:
+        return None
+
+    channels, frames, bits = struct.unpack('>hIh', comm[:8])
+    # 采样率是 80 位扩展精度浮点数
+    exponent, mantissa = struct.unpack('>HQ', comm[8:18])
+    rate = round(mantissa * 2.0 ** ((exponent & 0x7FFF) - 16383 - 63))
+    compression = comm[18:22] if data[8:12] == b'AIFC' else b'NONE'
+    if compression not in (b'NONE', b'twos', b'sowt') or channels < 1:
+        return None
+
+    offset = struct.unpack('>I', ssnd[:4])[0]
+    sampwidth = (bits + 7) // 8
+    raw = ssnd[8 + offset:8 + offset + frames * channels * sampwidth]
+    return _to_mono16(raw, channels, sampwidth, rate, compression != b'sowt')
+
+
+def decode_file(path: Path) -> Optional[array]:
+    """解码 WAV/AIFF 文件，失败返回 None"""
+    suffix = path.suffix.lower()
+    try:
+        if suffix == '.wav':
+            with wave.open(str(path), 'rb') as f:
+                return _to_mono16(f.readframes(f.getnframes()), f.getnchannels(),
+                                  f.getsampwidth(), f.getframerate(), False)
+        if suffix in ('.aiff', '.aif', '.aifc'):
+            return _read_aiff(path)
+    except Exception as e:
+        print(f"音效解码失败 {path.name}: {e}")
+    return None
+
+
+def synthesize(notes: List[tuple]) -> array:
+    """合成方波小音效（带淡出，避免爆音）"""
+    samples = array('h')
+    for freq, duration in notes:
+        count = int(MIX_RATE * duration)
+        period = MIX_RATE / freq
+        for i in range(count):
+            fade = 1.0 - i / count
+            level = 9000 if (i % period) < period / 2 else -9000
+            samples.append(int(level * fade))
+    return samples
+
+
+_clips: Dict[str, array] = {}
+_clips_lock = threading.Lock()
+
+
+def get_clip(sound_name: str) -> Optional[array]:
+    """取音效的 PCM 数据（首次使用时解码并缓存）"""
+    clip = _clips.get(sound_name)
+    if clip is not None:
+        return clip
+    with _clips_lock:
+        clip = _clips.get(sound_name)
+        if clip is None:
+            path = SOUND_EFFECTS.get(sound_name)
+            if path is not None and path.exists():
+                clip = decode_file(path)
+            if clip is None and sound_name in SYNTH_SOUNDS:
+                clip = synthesize(SYNTH_SOUNDS[sound_name])
+            if clip is not None:
+                _clips[sound_name] = clip
+    return clip
+
+
+def get_file_clip(file_path: str) -> Optional[array]:
+    """按路径取任意音频文件的 PCM 数据（缓存）"""
+    key = f'file:{file_path}'
+    clip = _clips.get(key)
+    if clip is None:
+        clip = decode_file(Path(file_path))
+        if clip is not None:
+            with _clips_lock:
+                _clips[key] = clip
+    return clip
+
+
+# ============ 播放后端 ============
+
+class AudioBackend:
+    """播放后端基类
+
+    streaming 后端接收混好的 PCM 流（write），
+    否则按文件逐个播放（play_path）。
+    failed 置位后播放线程会换成 afplay
+    """
+
+    name = 'null'
+    streaming = False
+    failed = False
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def write(self, pcm: bytes) -> None:
+        pass
+
+    def play_path(self, path: Path, volume: float) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# ---- CoreAudio（AudioToolbox 的 AudioQueue）----
+
+K_AUDIO_FORMAT_LINEAR_PCM = 0x6C70636D        # 'lpcm'
+K_LINEAR_PCM_FLAGS = (1 << 2) | (1 << 3)      # 有符号整数 | 紧凑排列（小端）
+AQ_BUFFERS = 4                                # 队列里轮流使用的缓冲数（4 × 512 帧 ≈ 93ms，大于 STREAM_LEAD）
+AQ_WAIT = 0.5                                 # 等空闲缓冲的时间
+AQ_MAX_STALLS = 3                             # 连续这么多次等不到缓冲（设备不取数据）就算失败
+
+
+class _StreamFormat(ctypes.Structure):
+    """AudioStreamBasicDescription"""
+    _fields_ = [('mSampleRate', ctypes.c_double), ('mFormatID', ctypes.c_uint32),
+                ('mFormatFlags', ctypes.c_uint32), ('mBytesPerPacket', ctypes.c_uint32),
+                ('mFramesPerPacket', ctypes.c_uint32), ('mBytesPerFrame', ctypes.c_uint32),
+                ('mChannelsPerFrame', ctypes.c_uint32), ('mBitsPerChannel', ctypes.c_uint32),
+                ('mReserved', ctypes.c_uint32)]
+
+
+class _QueueBuffer(ctypes.Structure):
+    """AudioQueueBuffer"""
+    _fields_ = [('mAudioDataBytesCapacity', ctypes.c_uint32), ('mAudioData', ctypes.c_void_p),
+                ('mAudioDataByteSize', ctypes.c_uint32), ('mUserData', ctypes.c_void_p),
+                ('mPacketDescriptionCapacity', ctypes.c_uint32),
+                ('mPacketDescriptions', ctypes.c_void_p),
+                ('mPacketDescriptionCount', ctypes.c_uint32)]
+
+
+_QUEUE_CALLBACK = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p,
+                                   ctypes.POINTER(_QueueBuffer))
+
+_audio_toolbox = None   # None：还没加载；False：加载失败
+
+
+def _load_audio_toolbox():
+    """加载 AudioToolbox 并声明用到的函数，失败返回 None"""
+    global _audio_toolbox
+    if _audio_toolbox is None:
+        _audio_toolbox = False
+        if sys.platform == 'darwin':
+            try:
+                lib = ctypes.CDLL(ctypes.util.find_library('AudioToolbox'))
+                lib.AudioQueueNewOutput.argtypes = [
+                    ctypes.POINTER(_StreamFormat), _QUEUE_CALLBACK, ctypes.c_void_p,
+                    ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32,
+                    ctypes.POINTER(ctypes.c_void_p)]
+                lib.AudioQueueAllocateBuffer.argtypes = [
+                    ctypes.c_void_p, ctypes.c_uint32, ctypes.POINTER(ctypes.POINTER(_QueueBuffer))]
+                lib.AudioQueueEnqueueBuffer.argtypes = [
+                    ctypes.c_void_p, ctypes.POINTER(_QueueBuffer), ctypes.c_uint32, ctypes.c_void_p]
+                lib.AudioQueueStart.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+                lib.AudioQueueStop.argtypes = [ctypes.c_void_p, ctypes.c_bool]
+                lib.AudioQueueDispose.argtypes = [ctypes.c_void_p, ctypes.c_bool]
+                for fn in (lib.AudioQueueNewOutput, lib.AudioQueueAllocateBuffer,
+                           lib.AudioQueueEnqueueBuffer, lib.AudioQueueStart,
+                           lib.AudioQueueStop, lib.AudioQueueDispose):
+                    fn.restype = ctypes.c_int32
+                _audio_toolbox = lib
+            except Exception as e:
+                print(f"AudioToolbox 加载失败: {e}")
+    return _audio_toolbox or None
+
+
+class CoreAudioBackend(AudioBackend):
+    """macOS：混好的 PCM 直接放进一个常驻的 AudioQueue（进程内，不再每个音效起一个 afplay）
+
+    几个缓冲轮流用：写满一个就入队，CoreAudio 播完后在它自己的线程里回调，把缓冲还回空闲池
+    """
+
+    name = 'coreaudio'
+    streaming = True
+
+    def __init__(self):
+        self.lib = _load_audio_toolbox()
+        self.queue: Optional[ctypes.c_void_p] = None
+        self.free: List = []
+        self.cond = threading.Condition()
+        self.stalls = 0
+        # 回调对象要一直引用着，否则被回收后 CoreAudio 会调到野指针
+        self._callback = _QUEUE_CALLBACK(self._on_buffer_done)
+
+    @classmethod
+    def available(cls) -> bool:
+        return _load_audio_toolbox() is not None
+
+    def _on_buffer_done(self, user_data, queue_ref, buffer) -> None:
+        with self.cond:
+            self.free.append(buffer)
+            self.cond.notify()
+
+    def _open(self) -> bool:
+        lib = self.lib
+        fmt = _StreamFormat(MIX_RATE, K_AUDIO_FORMAT_LINEAR_PCM, K_LINEAR_PCM_FLAGS,
+                            2, 1, 2, 1, 16, 0)
+        queue_ref = ctypes.c_void_p()
+        status = lib.AudioQueueNewOutput(ctypes.byref(fmt), self._callback, None, None, None,
+                                         0, ctypes.byref(queue_ref))
+        if status:
+            print(f"AudioQueue 创建失败: {status}")
+            return False
+        buffers = []
+        for _ in range(AQ_BUFFERS):
+            buffer = ctypes.POINTER(_QueueBuffer)()
+            if lib.AudioQueueAllocateBuffer(queue_ref, BLOCK_FRAMES * 2, ctypes.byref(buffer)) == 0:
+                buffers.append(buffer)
+        status = lib.AudioQueueStart(queue_ref, None) if buffers else -1
+        if status:
+            print(f"AudioQueue 启动失败: {status}")
+            lib.AudioQueueDispose(queue_ref, True)
+            return False
+        with self.cond:
+            self.free = buffers
+        self.queue = queue_ref
+        return True
+
+    def write(self, pcm: bytes) -> None:
+        if self.queue is None and not self._open():
+            self.failed = True
+            return
+        with self.cond:
+            if not self.free:
+                self.cond.wait(timeout=AQ_WAIT)
+            if not self.free:
+                # 音频设备没在取数据（被占用、断开），丢掉这一块
+                self.stalls += 1
+                self.failed = self.stalls >= AQ_MAX_STALLS
+                return
+            self.stalls = 0
+            buffer = self.free.pop()
+        size = min(len(pcm), buffer.contents.mAudioDataBytesCapacity)
+        ctypes.memmove(buffer.contents.mAudioData, pcm, size)
+        buffer.contents.mAudioDataByteSize = size
+        if self.lib.AudioQueueEnqueueBuffer(self.queue, buffer, 0, None):
+            with self.cond:
+                self.free.append(buffer)
+
+    def close(self) -> None:
+        if self.queue is not None:
+            self.lib.AudioQueueStop(self.queue, True)
+            self.lib.AudioQueueDispose(self.queue, True)    # 缓冲随队列一起释放
+            self.queue = None
+        with self.cond:
+            self.free = []
+
+
+class AfplayBackend(AudioBackend):
+    """macOS afplay（AudioToolbox 不可用时的退路）：每个音效一个进程，但同时存活的进程数有上限"""
+
+    name = 'afplay'
+
+    def __init__(self):
+        self.procs: List[subprocess.Popen] = []
+
+    @classmethod
+    def available(cls) -> bool:
+        return sys.platform == 'darwin' and shutil.which('afplay') is not None
+
+    def play_path(self, path: Path, volume: float) -> None:
+        self.procs = [p for p in self.procs if p.poll() is None]
+        if len(self.procs) >= MAX_VOICES:
+            return
+        self.procs.append(subprocess.Popen(
+            ['afplay', '-v', str(volume), str(path)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+
+    def close(self) -> None:
+        for p in self.procs:
+            if p.poll() is None:
+                p.terminate()
+        self.procs = []
+
+
+class PipeBackend(AudioBackend):
+    """把混好的 PCM 流写进一个常驻的播放进程（aplay / paplay）"""
+
+    streaming = True
+    command: List[str] = []
+
+    def __init__(self):
+        self.proc: Optional[subprocess.Popen] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return shutil.which(cls.command[0]) is not None
+
+    def write(self, pcm: bytes) -> None:
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+        try:
+            self.proc.stdin.write(pcm)
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.proc = None
+
+    def close(self) -> None:
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+                self.proc.terminate()
+            except Exception:
+                pass
+            self.proc = None
+
+
+class PaplayBackend(PipeBackend):
+    name = 'paplay'
+    command = ['paplay', '--raw', '--format=s16le', f'--rate={MIX_RATE}', '--channels=1']
+
+
+class AplayBackend(PipeBackend):
+    name = 'aplay'
+    command = ['aplay', '-q', '-t', 'raw', '-f', 'S16_LE', '-r', str(MIX_RATE), '-c', '1']
+
+
+# 自动选择时的优先顺序
+BACKENDS = {
+    'coreaudio': CoreAudioBackend,
+    'afplay': AfplayBackend,
+    'paplay': PaplayBackend,
+    'aplay': AplayBackend,
+    'null': AudioBackend,
+}
+
+
+def detect_backend() -> str:
+    """选择可用的后端（环境变量 XIAOTIEPI_AUDIO 可指定）"""
+    forced = os.environ.get('XIAOTIEPI_AUDIO')
+    if forced in BACKENDS and BACKENDS[forced].available():
+        return forced
+    for name, cls in BACKENDS.items():
+        if cls.available():
+            return name
+    return 'null'
+
+
+# ============ 播放线程 ============
+
+class _Voice:
+    __slots__ = ('clip', 'pos', 'gain', 'path')
+
+    def __init__(self, clip: array, gain: float, path: Optional[Path]):
+        self.clip = clip
+        self.pos = 0
+        self.gain = gain
+        self.path = path    # 退回 afplay 时重播用
+
+
+class SoundEngine:
+    """常驻播放线程：主线程只往队列里放请求，不会阻塞也不会每次开线程"""
+
+    def __init__(self, backend_name: str = None):
+        self.backend: AudioBackend = BACKENDS[backend_name or detect_backend()]()
+        self.requests: 'queue.Queue' = queue.Queue()
+        self.voices: List[_Voice] = []
+        self._last_trigger: Dict[str, float] = {}
+        self._stream_start: Optional[float] = None
+        self._frames_written = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, target: str) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self.requests.put((kind, target))
+
+    def _run(self) -> None:
+        while True:
+            # 有声音在播时不阻塞，继续混音
+            try:
+                request = self.requests.get(block=not self.voices)
+            except queue.Empty:
+                request = None
+            while request is not None:
+                if request[0] == 'stop':
+                    self.voices = []
+                    self.backend.close()
+                    return
+                try:
+                    self._start(*request)
+                except Exception as e:
+                    print(f"音效播放失败: {e}")
+                try:
+                    request = self.requests.get_nowait()
+                except queue.Empty:
+                    request = None
+
+            if self.voices:
+                self._stream_block()
+
+    def _start(self, kind: str, target: str) -> None:
+        now = time.monotonic()
+        if now - self._last_trigger.get(target, float('-inf')) < RETRIGGER_GAP:
+            return
+        self._last_trigger[target] = now
+
+        path = SOUND_EFFECTS.get(target) if kind == 'effect' else Path(target)
+        if not self.backend.streaming:
+            if path is not None and path.exists():
+                self.backend.play_path(path, _volume)
+            return
+
+        clip = get_clip(target) if kind == 'effect' else get_file_clip(target)
+        if not clip:
+            return
+        if len(self.voices) >= MAX_VOICES:
+            self.voices.pop(0)
+        self.voices.append(_Voice(clip, _volume, path))
+
+    def _stream_block(self) -> None:
+        """混一个块写给后端，并按实际播放进度节流"""
+        mixed = [0] * BLOCK_FRAMES
+        for voice in self.voices:
+            chunk = voice.clip[voice.pos:voice.pos + BLOCK_FRAMES]
+            gain = voice.gain
+            for i, sample in enumerate(chunk):
+                mixed[i] += sample * gain
+            voice.pos += BLOCK_FRAMES
+        self.voices = [v for v in self.voices if v.pos < len(v.clip)]
+
+        pcm = array('h', (-32768 if s < -32768 else 32767 if s > 32767 else int(s)
+                          for s in mixed))
+        if sys.byteorder == 'big':
+            pcm.byteswap()
+
+        now = time.monotonic()
+        if self._stream_start is None or self._frames_written / MIX_RATE < now - self._stream_start:
+            # 上次的流已经播完，重新计时
+            self._stream_start = now
+            self._frames_written = 0
+        self.backend.write(pcm.tobytes())
+        if self.backend.failed:
+            self._fall_back()
+            return
+        self._frames_written += BLOCK_FRAMES
+
+        ahead = self._frames_written / MIX_RATE - (time.monotonic() - self._stream_start)
+        if ahead > STREAM_LEAD:
+            time.sleep(ahead - STREAM_LEAD)
+
+    def _fall_back(self) -> None:
+        """流式后端用不了：换成 afplay，刚开始播的音效用它重播一遍"""
+        print(f"音效后端 {self.backend.name} 不可用，改用 afplay")
+        self.backend.close()
+        self.backend = AfplayBackend() if AfplayBackend.available() else AudioBackend()
+        for voice in self.voices:
+            if voice.pos <= BLOCK_FRAMES and voice.path is not None and voice.path.exists():
+                self.backend.play_path(voice.path, voice.gain)
+        self.voices = []
+        self._stream_start = None
+
+    def shutdown(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self.requests.put(('stop', ''))
+        else:
+            self.backend.close()
+
+
+_engine: Optional[SoundEngine] = None
+
+
+def _get_engine() -> SoundEngine:
+    global _engine
+    if _engine is None:
+        _engine = SoundEngine()
+    return _engine
+
+
+def set_backend(name: str) -> bool:
+    """切换播放后端（coreaudio / afplay / paplay / aplay / null），不可用时返回 False"""
+    global _engine
+    cls = BACKENDS.get(name)
+    if cls is None or not cls.available():
+        return False
+    if _engine is not None:
+        _engine.shutdown()
+    _engine = SoundEngine(name)
+    return True
+
+
+def get_backend_name() -> str:
+    return _get_engine().backend.name
+
+
+def preload() -> None:
+    """预先解码所有音效（可在后台线程调用）"""
+    for sound_name in SOUND_EFFECTS:
+        get_clip(sound_name)
+
+
+def shutdown() -> None:
+    """停止播放线程"""
+    if _engine is not None:
+        _engine.shutdown()
+
+
 def play(sound_name: str) -> None:
     """播放指定音效"""
     if not _enabled:
         return
-
-    sound_file = SOUND_EFFECTS.get(sound_name)
-    if not sound_file or not sound_file.exists():
+    if sound_name not in SOUND_EFFECTS and sound_name not in SYNTH_SOUNDS:
         return
-
-    def _play():
-        try:
-            subprocess.run(
-                ['afplay', '-v', str(_volume), str(sound_file)],
-                check=False,
-                capture_output=True
-            )
-        except Exception:
-            pass
-
-    threading.Thread(target=_play, daemon=True).start()
+    _get_engine().submit('effect', sound_name)
 
 
 def play_file(file_path: str) -> None:
@@ -69,18 +635,6 @@ def play_file(file_path: str) -> None:
     if not _enabled:
         return
 
-    path = Path(file_path)
-    if not path.exists():
+    if not Path(file_path).exists():
         return
-
-    def _play():
-        try:
-            subprocess.run(
-                ['afplay', '-v', str(_volume), str(path)],
-                check=False,
-                capture_output=True
-            )
-        except Exception:
-            pass
-
-    threading.Thread(target=_play, daemon=True).start()
+    _get_engine().submit('file', file_path)
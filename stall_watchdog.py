@@ -0,0 +1,158 @@
+"""
+stall_watchdog.py - 主线程卡顿检测
+调度器在 Tk 主线程上定时跳一次心跳；看门狗线程发现心跳迟到超过阈值，
+就用 sys._current_frames() 抓主线程当时的调用栈（卡住期间持续采样），
+卡顿结束后按调用点（栈里最内层的本项目代码行）汇总到 ~/.xiaotiepi/stall_report.json，
+排在前面的就是该挪出界面线程的 I/O
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import PRIORITY_HIGH
+
+STALL_REPORT_FILE = Path.home() / '.xiaotiepi' / 'stall_report.json'
+
+HEARTBEAT_SECONDS = 0.2     # 心跳间隔
+STALL_THRESHOLD = 0.25      # 心跳迟到超过这么久算一次卡顿
+SAMPLE_SECONDS = 0.05       # 看门狗检查 / 卡顿期间采样的间隔
+STACK_DEPTH = 12            # 报告里每个调用点保留的栈深度
+MAX_SITES = 100             # 报告里最多保留的调用点数
+
+APP_DIR = Path(__file__).resolve().parent
+
+
+def _is_app_frame(filename: str) -> bool:
+    """本项目的代码（不含看门狗自己）"""
+    try:
+        path = Path(filename).resolve()
+    except Exception:
+        return False
+    return path.is_relative_to(APP_DIR) and path.name != 'stall_watchdog.py'
+
+
+def _call_site(frame) -> Tuple[str, List[str]]:
+    """(调用点, 栈)：调用点是最内层的本项目代码行，栈从外到内"""
+    summary = traceback.extract_stack(frame)
+    site_frame = next((f for f in reversed(summary) if _is_app_frame(f.filename)), summary[-1])
+    site_path = Path(site_frame.filename)
+    if _is_app_frame(site_frame.filename):
+        site_path = site_path.resolve().relative_to(APP_DIR)
+    site = f"{site_path}:{site_frame.lineno} {site_frame.name}"
+    stack = [f"{Path(f.filename).name}:{f.lineno} {f.name}  {f.line or ''}".rstrip()
+             for f in summary[-STACK_DEPTH:]]
+    return site, stack
+
+
+class StallWatchdog:
+    """Tk 主线程卡顿看门狗
+
+    start() / stop() 在主线程调用；采样、汇总和写报告都在看门狗线程里做
+    """
+
+    def __init__(self, scheduler, threshold: float = STALL_THRESHOLD,
+                 report_file: Path = STALL_REPORT_FILE):
+        self.scheduler = scheduler
+        self.threshold = threshold
+        self.report_file = report_file
+        self.sites: Dict[str, Dict] = {}
+        self.stall_count = 0
+        self._last_beat = time.monotonic()
+        self._main_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        """接着之前的报告累计"""
+        if not self.report_file.exists():
+            return
+        try:
+            with open(self.report_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stall_count = data.get('stalls', 0)
+            self.sites = {s['site']: s for s in data.get('sites', [])}
+        except Exception as e:
+            print(f"Load stall report error: {e}")
+
+    def start(self) -> None:
+        self._last_beat = time.monotonic()
+        self.scheduler.call_every(HEARTBEAT_SECONDS, self._beat,
+                                  priority=PRIORITY_HIGH, key='watchdog_heartbeat')
+        self._thread = threading.Thread(target=self._run, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.scheduler.cancel_key('watchdog_heartbeat')
+        self._stop.set()
+
+    def _beat(self) -> None:
+        # 主线程：只记一下时间
+        self._last_beat = time.monotonic()
+
+    # ===== 看门狗线程 =====
+
+    def _run(self) -> None:
+        samples: Optional[Counter] = None
+        stacks: Dict[str, List[str]] = {}
+        stall_beat = 0.0
+
+        while not self._stop.wait(SAMPLE_SECONDS):
+            beat = self._last_beat
+            late = time.monotonic() - beat - HEARTBEAT_SECONDS
+
+            if late >= self.threshold:
+                if samples is None:
+                    samples, stacks, stall_beat = Counter(), {}, beat
+                frame = sys._current_frames().get(self._main_id)
+                if frame is not None:
+                    site, stack = _call_site(frame)
+                    samples[site] += 1
+                    stacks.setdefault(site, stack)
+                del frame
+            elif samples is not None and beat != stall_beat:
+                # 心跳恢复：按采样最多的调用点记一次卡顿
+                duration = beat - stall_beat - HEARTBEAT_SECONDS
+                if samples and duration >= self.threshold:
+                    site = samples.most_common(1)[0][0]
+                    self._record(site, duration, stacks[site])
+                samples = None
+
+    def _record(self, site: str, duration: float, stack: List[str]) -> None:
+        ms = round(duration * 1000)
+        print(f"主线程卡顿 {ms}ms @ {site}")
+        entry = self.sites.setdefault(site, {
+            'site': site, 'count': 0, 'total_ms': 0, 'max_ms': 0, 'stack': stack})
+        entry['count'] += 1
+        entry['total_ms'] += ms
+        entry['max_ms'] = max(entry['max_ms'], ms)
+        entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+        entry['stack'] = stack
+        self.stall_count += 1
+        self._write_report()
+
+    def _write_report(self) -> None:
+        sites = sorted(self.sites.values(), key=lambda s: s['total_ms'], reverse=True)[:MAX_SITES]
+        self.sites = {s['site']: s for s in sites}
+        report = {
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'threshold_ms': round(self.threshold * 1000),
+            'stalls': self.stall_count,
+            'sites': sites,
+        }
+        try:
+            self.report_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.report_file.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.report_file)
+        except Exception as e:
+            print(f"Save stall report error: {e}")
@@ -0,0 +1,146 @@
+"""
+test_drag_tracker.py - 回放录下的拖拽轨迹，检查晃动检测
+
+参照实现是换成环形缓冲之前 pet.py 里的写法：每个事件重建 0.5 秒内的列表，
+_check_shake 再整段重新扫描。增量维护的距离 / 方向变化次数要和它逐个事件一致
+
+    python -m unittest test_drag_tracker
+"""
+
+import json
+import random
+import unittest
+from pathlib import Path
+
+from drag_tracker import DragTracker, DRAG_CAPACITY, replay
+
+TRACES = json.loads((Path(__file__).parent / 'test_data' / 'drag_traces.json').read_text(encoding='utf-8'))
+SHAKE_THRESHOLD = 400
+
+
+def rescan(history):
+    """旧的 _check_shake：(总距离, 方向变化次数)"""
+    total_distance = 0
+    direction_changes = 0
+    prev_dx, prev_dy = 0, 0
+    for i in range(1, len(history)):
+        _, x1, y1 = history[i - 1]
+        _, x2, y2 = history[i]
+        dx = x2 - x1
+        dy = y2 - y1
+        total_distance += abs(dx) + abs(dy)
+        if (prev_dx * dx < 0) or (prev_dy * dy < 0):
+            direction_changes += 1
+        prev_dx, prev_dy = dx, dy
+    return total_distance, direction_changes
+
+
+def old_replay(trace, capacity=None):
+    """旧的 _on_drag + _check_shake，逐个事件返回 (窗口内采样, 总距离, 方向变化, 是否晃动)
+
+    capacity：只保留最近这么多个采样（和环形缓冲满了丢最旧的对齐）
+    """
+    history = []
+    for now, x, y in trace:
+        history.append((now, x, y))
+        history = [(t, hx, hy) for t, hx, hy in history if now - t < 0.5]
+        if capacity is not None:
+            history = history[-capacity:]
+        total_distance, direction_changes = rescan(history)
+        shaking = (len(history) >= 6 and total_distance > SHAKE_THRESHOLD
+                   and direction_changes >= 4)
+        yield list(history), total_distance, direction_changes, shaking
+
+
+def samples(name):
+    return [tuple(s) for s in TRACES[name]['samples']]
+
+
+class DragTraceTest(unittest.TestCase):
+
+    def assert_matches_rescan(self, trace, capacity=DRAG_CAPACITY):
+        tracker = DragTracker(capacity=capacity)
+        for n, (sample, expected) in enumerate(zip(trace, old_replay(trace, capacity))):
+            tracker.add(*sample)
+            history, total_distance, direction_changes, shaking = expected
+            msg = f'sample {n}'
+            self.assertEqual(list(tracker.samples()), history, msg)
+            self.assertEqual(tracker.total_distance, total_distance, msg)
+            self.assertEqual(tracker.direction_changes, direction_changes, msg)
+            self.assertEqual(tracker.is_shaking(SHAKE_THRESHOLD), shaking, msg)
+
+    # ===== 录下的轨迹 =====
+
+    def test_real_shake(self):
+        trace = samples('shake')
+        first = replay(trace, SHAKE_THRESHOLD)
+        self.assertNotEqual(first, -1)
+        # 60Hz 下不到 0.5 秒就应该判定为晃动
+        self.assertLess(trace[first][0] - trace[0][0], 0.5)
+        self.assert_matches_rescan(trace)
+
+    def test_slow_drag(self):
+        trace = samples('slow_drag')
+        self.assertEqual(replay(trace, SHAKE_THRESHOLD), -1)
+        self.assert_matches_rescan(trace)
+
+    def test_jittery_high_rate(self):
+        # 1000Hz 的窗口里有 500 个采样，超过容量：只保留最近 DRAG_CAPACITY 个，手抖不算晃动
+        trace = samples('jitter_1000hz')
+        tracker = DragTracker()
+        for sample in trace:
+            tracker.add(*sample)
+            self.assertLessEqual(len(tracker), DRAG_CAPACITY)
+            self.assertFalse(tracker.is_shaking(SHAKE_THRESHOLD))
+        self.assert_matches_rescan(trace)
+
+    def test_jittery_high_rate_unbounded(self):
+        # 容量足够时和旧写法（不限个数）完全一致
+        trace = samples('jitter_1000hz')
+        tracker = DragTracker(capacity=1024)
+        for sample, (history, total_distance, direction_changes, _) in zip(trace, old_replay(trace)):
+            tracker.add(*sample)
+            self.assertEqual(len(tracker), len(history))
+            self.assertEqual(tracker.total_distance, total_distance)
+            self.assertEqual(tracker.direction_changes, direction_changes)
+
+    def test_expiry(self):
+        trace = samples('burst_then_pause')
+        self.assertNotEqual(replay(trace, SHAKE_THRESHOLD), -1)
+        self.assert_matches_rescan(trace)
+
+        # 停顿之后甩的那几下全部过期，只剩慢拖的部分
+        tracker = DragTracker()
+        for sample in trace:
+            tracker.add(*sample)
+        resumed = [s for s in trace if trace[-1][0] - s[0] < 0.5]
+        self.assertEqual(list(tracker.samples()), resumed)
+        self.assertEqual((tracker.total_distance, tracker.direction_changes), rescan(resumed))
+        self.assertFalse(tracker.is_shaking(SHAKE_THRESHOLD))
+
+    def test_clear(self):
+        tracker = DragTracker()
+        for sample in samples('shake')[:20]:
+            tracker.add(*sample)
+        tracker.clear()
+        self.assertEqual((len(tracker), tracker.total_distance, tracker.direction_changes), (0, 0, 0))
+        tracker.add(1.0, 10, 10)
+        self.assertEqual(list(tracker.samples()), [(1.0, 10, 10)])
+
+    # ===== 随机轨迹 =====
+
+    def test_random_traces_match_rescan(self):
+        rnd = random.Random(2024)
+        for _ in range(50):
+            t, x, y = 0.0, 500, 500
+            trace = []
+            for _ in range(rnd.randint(1, 300)):
+                t += rnd.choice((0.001, 0.008, 0.016, 0.05, 0.3, 0.6))
+                x += rnd.randint(-40, 40)
+                y += rnd.randint(-40, 40)
+                trace.append((t, x, y))
+            self.assert_matches_rescan(trace, capacity=rnd.choice((8, 32, DRAG_CAPACITY)))
+
+
+if __name__ == '__main__':
+    unittest.main()
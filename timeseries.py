@@ -0,0 +1,205 @@
+"""
+timeseries.py - 交互计数的滚动时间序列
+固定大小的环形数组保存最近若干小时/天/周的计数，更早的按月汇总；
+递增和“当前小时”查询都是 O(1)，存档只保存紧凑的数组
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+HOUR_SLOTS = 48     # 最近 48 小时
+DAY_SLOTS = 62      # 最近两个月的每天
+WEEK_SLOTS = 104    # 最近两年的每周
+MONTH_KEEP = 120    # 月汇总最多保留 10 年
+
+ENCODING_VERSION = 1
+
+
+def hour_index(dt: datetime) -> int:
+    """本地时间的绝对小时号"""
+    return dt.toordinal() * 24 + dt.hour
+
+
+def day_index(dt: datetime) -> int:
+    return dt.toordinal()
+
+
+def week_index(dt: datetime) -> int:
+    """绝对周号（周一开始）"""
+    return (dt.toordinal() - 1) // 7
+
+
+class _Ring:
+    """按绝对序号寻址的环形计数数组"""
+
+    __slots__ = ('slots', 'head')
+
+    def __init__(self, size: int):
+        self.slots = array('l', [0]) * size
+        self.head: Optional[int] = None  # 最新写入的序号
+
+    def _advance(self, index: int) -> None:
+        """推进到 index，清掉被覆盖的旧槽位（最多清一圈）"""
+        if self.head is None:
+            self.head = index
+            return
+        if index <= self.head:
+            return
+        size = len(self.slots)
+        gap = index - self.head
+        if gap >= size:
+            for i in range(size):
+                self.slots[i] = 0
+        else:
+            for i in range(self.head + 1, index + 1):
+                self.slots[i % size] = 0
+        self.head = index
+
+    def add(self, index: int, amount: int = 1) -> None:
+        self._advance(index)
+        if self.head - index < len(self.slots):
+            self.slots[index % len(self.slots)] += amount
+
+    def get(self, index: int) -> int:
+        if self.head is None or index > self.head or self.head - index >= len(self.slots):
+            return 0
+        return self.slots[index % len(self.slots)]
+
+    def window(self, end: int, count: int) -> List[int]:
+        """以 end 结尾的 count 个序号的计数（旧 → 新）"""
+        return [self.get(i) for i in range(end - count + 1, end + 1)]
+
+    def to_list(self) -> List[int]:
+        """编码：从最新往前，去掉最旧一端的 0"""
+        if self.head is None:
+            return []
+        values = self.window(self.head, len(self.slots))
+        start = 0
+        while start < len(values) and values[start] == 0:
+            start += 1
+        return values[start:]
+
+    def load_list(self, head: Optional[int], values: List[int]) -> None:
+        self.head = head
+        for i in range(len(self.slots)):
+            self.slots[i] = 0
+        if head is None:
+            return
+        values = values[-len(self.slots):]
+        for offset, value in enumerate(reversed(values)):
+            self.slots[(head - offset) % len(self.slots)] = int(value)
+
+
+class RollingCounter:
+    """交互计数：小时/天/周环形数组 + 月汇总"""
+
+    def __init__(self):
+        self.hours = _Ring(HOUR_SLOTS)
+        self.days = _Ring(DAY_SLOTS)
+        self.weeks = _Ring(WEEK_SLOTS)
+        self.months: Dict[str, int] = {}
+        self.total = 0
+
+    # ===== 写入 =====
+
+    def increment(self, amount: int = 1, now: datetime = None) -> None:
+        """记录一次（或 amount 次）"""
+        now = now or datetime.now()
+        self.hours.add(hour_index(now), amount)
+        self.days.add(day_index(now), amount)
+        self.weeks.add(week_index(now), amount)
+
+        month = now.strftime('%Y-%m')
+        if month not in self.months:
+            self.months[month] = 0
+            if len(self.months) > MONTH_KEEP:
+                for key in sorted(self.months)[:-MONTH_KEEP]:
+                    del self.months[key]
+        self.months[month] += amount
+        self.total += amount
+
+    # ===== 查询 =====
+
+    def current_hour(self, now: datetime = None) -> int:
+        """当前小时的次数"""
+        return self.hours.get(hour_index(now or datetime.now()))
+
+    def last_hours(self, count: int = 24, now: datetime = None) -> List[int]:
+        """最近 count 小时（旧 → 新）"""
+        return self.hours.window(hour_index(now or datetime.now()), min(count, HOUR_SLOTS))
+
+    def today(self, now: datetime = None) -> int:
+        return self.days.get(day_index(now or datetime.now()))
+
+    def on_day(self, day: datetime) -> int:
+        """某一天的次数（超出日窗口时返回 0）"""
+        return self.days.get(day_index(day))
+
+    def last_days(self, count: int = 7, now: datetime = None) -> List[int]:
+        return self.days.window(day_index(now or datetime.now()), min(count, DAY_SLOTS))
+
+    def this_week(self, now: datetime = None) -> int:
+        return self.weeks.get(week_index(now or datetime.now()))
+
+    def last_weeks(self, count: int = 4, now: datetime = None) -> List[int]:
+        return self.weeks.window(week_index(now or datetime.now()), min(count, WEEK_SLOTS))
+
+    def month(self, key: str) -> int:
+        """某月的次数，key 形如 '2026-10'"""
+        return self.months.get(key, 0)
+
+    # ===== 存档编码 =====
+
+    def to_dict(self) -> Dict:
+        return {
+            'v': ENCODING_VERSION,
+            'h': [self.hours.head, self.hours.to_list()],
+            'd': [self.days.head, self.days.to_list()],
+            'w': [self.weeks.head, self.weeks.to_list()],
+            'm': self.months,
+            'total': self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'RollingCounter':
+        counter = cls()
+        if not data or data.get('v') != ENCODING_VERSION:
+            return counter
+        try:
+            counter.hours.load_list(*data.get('h', [None, []]))
+            counter.days.load_list(*data.get('d', [None, []]))
+            counter.weeks.load_list(*data.get('w', [None, []]))
+            counter.months = {k: int(v) for k, v in data.get('m', {}).items()}
+            counter.total = int(data.get('total', 0))
+        except (TypeError, ValueError):
+            return cls()
+        return counter
+
+    @classmethod
+    def from_legacy(cls, click_history: Dict[str, int] = None,
+                    hourly_clicks: Dict[str, int] = None) -> 'RollingCounter':
+        """从旧存档的 click_history（按天）和 hourly_clicks（按小时）迁移"""
+        counter = cls()
+
+        for key, count in sorted((click_history or {}).items()):
+            try:
+                day = datetime.strptime(key, '%Y-%m-%d')
+            except ValueError:
+                continue
+            counter.days.add(day_index(day), count)
+            counter.weeks.add(week_index(day), count)
+            month = day.strftime('%Y-%m')
+            counter.months[month] = counter.months.get(month, 0) + count
+            counter.total += count
+
+        cutoff = datetime.now() - timedelta(hours=HOUR_SLOTS)
+        for key, count in sorted((hourly_clicks or {}).items()):
+            try:
+                hour = datetime.strptime(key, '%Y-%m-%d-%H')
+            except ValueError:
+                continue
+            if hour >= cutoff:
+                counter.hours.add(hour_index(hour), count)
+
+        return counter
@@ -0,0 +1,75 @@
+"""
+window_position.py - 小铁皮的窗口位置管理
+本地记录宠物位置，不再每次用 winfo_* 向窗口管理器查询；
+多次移动合并成每帧一次，宠物窗口和跟随的气泡窗口一起更新
+"""
+
+from typing import List, Optional, Tuple
+
+from scheduler import PRIORITY_HIGH
+
+# 两次真正移动窗口之间的最短间隔（约 60fps）
+MOVE_INTERVAL = 1 / 60
+
+
+class WindowPositionManager:
+    """合并窗口移动请求
+
+    - move_to 只记下目标位置，最多每 MOVE_INTERVAL 真正移动一次
+    - 跟随窗口（气泡等）实现 follow(x, y)，和宠物窗口在同一次更新里移动
+    - flush 立即应用挂起的移动（每帧绘制前调用）
+    """
+
+    def __init__(self, root, scheduler, x: int, y: int):
+        self.root = root
+        self.scheduler = scheduler
+        self.x = x
+        self.y = y
+        self.satellites: List = []
+        self._applied: Optional[Tuple[int, int]] = None
+        self._last_flush = float('-inf')
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    def attach(self, satellite) -> None:
+        """注册跟随窗口，并立即告诉它当前位置"""
+        if satellite not in self.satellites:
+            self.satellites.append(satellite)
+        satellite.follow(self.x, self.y)
+
+    def detach(self, satellite) -> None:
+        if satellite in self.satellites:
+            self.satellites.remove(satellite)
+
+    def move_to(self, x: int, y: int) -> None:
+        """请求移动到 (x, y)，合并到下一次刷新"""
+        self.x = int(x)
+        self.y = int(y)
+        if (self.x, self.y) == self._applied:
+            self.scheduler.cancel_key('window_move')
+            return
+        if self.scheduler.get('window_move'):
+            return
+        delay = max(0.0, self._last_flush + MOVE_INTERVAL - self.scheduler.now())
+        self.scheduler.call_later(delay, self.flush, priority=PRIORITY_HIGH,
+                                  key='window_move')
+
+    def flush(self) -> None:
+        """应用挂起的移动：宠物窗口和所有跟随窗口一次性更新"""
+        self.scheduler.cancel_key('window_move')
+        position = (self.x, self.y)
+        if position == self._applied:
+            return
+        self._applied = position
+        self._last_flush = self.scheduler.now()
+        try:
+            self.root.geometry(f'+{self.x}+{self.y}')
+        except Exception:
+            return
+        for satellite in self.satellites:
+            try:
+                satellite.follow(self.x, self.y)
+            except Exception as e:
+                print(f"跟随窗口移动失败: {e}")